@@ -0,0 +1,334 @@
+# benchmark.py
+"""
+Micro-benchmarks of the hot paths, with results kept per commit.
+
+Every benchmark is timed like timeit: the loop count is doubled until a run takes
+long enough, then the fastest of several runs gives the time per operation. Results
+are stored in a JSON file keyed by `git describe --always --dirty`, and compared
+with a baseline entry; a benchmark slower than the baseline by more than the
+threshold is flagged and makes the exit status 1.
+
+Usage:
+    python benchmark.py [--only deck card] [--baseline COMMIT] [--threshold 0.1] [--results FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+from card.CardFactory import create_card
+from card.CardTable import CLASSIC_DECK
+from deck.Deck import Deck
+from engine.Engine import Engine
+from engine.Policy import random_policy
+from game.Game import Game
+from player.Player import Player
+
+DEFAULT_RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks.json")
+DEFAULT_THRESHOLD = 0.10
+MIN_RUN_TIME = 0.05
+REPEAT = 5
+
+# Name -> setup; a setup returns the operation to time, a function or a coroutine function
+BENCHMARKS: Dict[str, Callable[[], Callable]] = {}
+
+
+def benchmark(name: str):
+    """Registers a benchmark setup under a name."""
+
+    def register(setup: Callable[[], Callable]) -> Callable[[], Callable]:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+class StubUser:
+    """A user that drops every message after encoding it, counting the round ends."""
+
+    __slots__ = ("user_id", "name", "rounds")
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.name = f"User {user_id}"
+        self.rounds = 0
+
+    async def send_message(self, message: dict) -> None:
+        if message.get("type") == "round_end":
+            self.rounds += 1
+
+    async def send_frame(self, frame) -> None:
+        # Encoded like a websocket user would; a broadcast encodes once for everyone
+        frame.text
+        if frame.type == "round_end":
+            self.rounds += 1
+
+
+def make_game(num_players: int = 4, seed: int = 0, start: bool = True) -> Game:
+    """Returns a game between stub users, started unless told otherwise."""
+    players = [Player(StubUser(str(seat))) for seat in range(num_players)]
+    game = Game(players, rng=random.Random(seed))
+    if start:
+        asyncio.run(game.initialize())
+    return game
+
+
+@benchmark("deck.initialize_classic_deck")
+def _initialize_classic_deck():
+    return Deck(rng=random.Random(0)).initialize_classic_deck
+
+
+@benchmark("deck.initialize_extended_deck")
+def _initialize_extended_deck():
+    return Deck(rng=random.Random(0)).initialize_extended_deck
+
+
+@benchmark("deck.shuffle")
+def _shuffle():
+    deck = Deck(rng=random.Random(0))
+    deck.initialize_classic_deck()
+    return deck.shuffle
+
+
+@benchmark("deck.draw")
+def _draw():
+    deck = Deck(CLASSIC_DECK)
+    cards = deck.cards
+
+    def draw():
+        if not cards:
+            cards.extend(CLASSIC_DECK)
+        deck.draw()
+
+    return draw
+
+
+@benchmark("game.get_player")
+def _get_player():
+    game = make_game()
+    last = game.players[-1].user.user_id
+    return lambda: game.get_player(last)
+
+
+@benchmark("game.find_next_player")
+def _find_next_player():
+    game = make_game()
+    player = game.players[0]
+    return lambda: game.find_next_player(player)
+
+
+@benchmark("game.check_end_conditions")
+def _check_end_conditions():
+    # A round in progress: the common case on every turn
+    game = make_game()
+    return game.check_end_conditions
+
+
+def _card_play(name: str, kept: str, held: str, target_info: Callable[[Game], dict]):
+    card = create_card(name)
+    kept_card = create_card(kept)
+    held_card = create_card(held)
+
+    def setup():
+        game = make_game()
+        actor, target = game.players[0], game.players[1]
+        info = target_info(game)
+        cards = game.deck.cards
+
+        async def play():
+            # Restore what the previous play changed
+            actor.hand = [kept_card]
+            target.hand = [held_card]
+            actor.is_active = target.is_active = True
+            game.ring.reset()
+            actor.is_protected = target.is_protected = False
+            if len(cards) < 2:
+                cards.extend(CLASSIC_DECK)
+            await card.play(game, actor, info)
+
+        return play
+
+    return setup
+
+
+def _target(game: Game) -> dict:
+    return {"target_player_id": game.players[1].user.user_id}
+
+
+for _name, _kept, _held, _info in (
+    ("Assassin", "Guard", "Guard", lambda game: {}),
+    # A wrong guess, so nobody is eliminated
+    ("Guard", "Guard", "Priest", lambda game: {**_target(game), "guessed_value": 3}),
+    ("Priest", "Guard", "Priest", _target),
+    ("Baron", "King", "Priest", _target),
+    ("Handmaid", "Guard", "Guard", lambda game: {}),
+    ("Prince", "Guard", "Priest", _target),
+    ("King", "Guard", "Priest", _target),
+    ("Countess", "Guard", "Guard", lambda game: {}),
+    ("Princess", "Guard", "Guard", lambda game: {}),
+):
+    benchmark(f"card.{_name}.play")(_card_play(_name, _kept, _held, _info))
+
+
+@benchmark("round.engine")
+def _engine_round():
+    engine = Engine(4, [random_policy] * 4, random.Random(0))
+    return engine.play_round
+
+
+@benchmark("round.game")
+def _game_round():
+    # One round of the live game, every move a random legal one
+    rng = random.Random(0)
+    players = [Player(StubUser(str(seat))) for seat in range(4)]
+    watcher = players[0].user
+
+    async def play_round():
+        game = Game(players, rng=rng)
+        await game.initialize()
+        rounds = watcher.rounds
+        for _ in range(64):
+            if watcher.rounds != rounds:
+                break
+            player = game.player_in_turn()
+            move = rng.choice(game.legal_actions(player))
+            card_index = move.pop("card_index")
+            await game.handle_player_action(player.user.user_id, card_index, move)
+
+    return play_round
+
+
+def _fan_out(num_players: int):
+    def setup():
+        # Not started: a classic deck cannot deal to every table size measured
+        game = make_game(num_players, start=False)
+        message = {"type": "play_card", "card": "Guard(1)", "outcome": "guess_wrong", "message": "benchmark"}
+
+        async def notify():
+            await game.notify_players(message)
+
+        return notify
+
+    return setup
+
+
+for _players in (4, 8):
+    benchmark(f"game.notify_players.{_players}")(_fan_out(_players))
+
+
+def measure(operation: Callable) -> float:
+    """Returns the best time of an operation, in seconds per call; coroutine functions are awaited."""
+    if asyncio.iscoroutinefunction(operation):
+
+        async def timed(loops: int) -> float:
+            started = time.perf_counter()
+            for _ in range(loops):
+                await operation()
+            return time.perf_counter() - started
+
+        loop = asyncio.new_event_loop()
+        try:
+            return _best(lambda loops: loop.run_until_complete(timed(loops)))
+        finally:
+            loop.close()
+
+    def run(loops: int) -> float:
+        started = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        return time.perf_counter() - started
+
+    return _best(run)
+
+
+def _best(run: Callable[[int], float]) -> float:
+    loops = 1
+    while run(loops) < MIN_RUN_TIME:
+        loops *= 2
+    return min(run(loops) for _ in range(REPEAT)) / loops
+
+
+def commit_id() -> str:
+    """Returns the commit the results belong to, marked if the tree has changes."""
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_results(path: str) -> dict:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Returns the names of the benchmarks slower than the baseline by more than the threshold."""
+    return [
+        name for name, seconds in results.items() if name in baseline and seconds > baseline[name] * (1 + threshold)
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the micro-benchmarks and compare them with a baseline.")
+    parser.add_argument("--only", nargs="*", default=None, help="Name prefixes of the benchmarks to run.")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="JSON file of the results of every commit.")
+    parser.add_argument("--baseline", default=None, help="Commit to compare with; the latest other one by default.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown, e.g. 0.1.")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    names = [
+        name for name in BENCHMARKS if not args.only or any(name.startswith(prefix) for prefix in args.only)
+    ]
+    results: Dict[str, float] = {}
+    for name in names:
+        results[name] = measure(BENCHMARKS[name]())
+        print(f"{name:40} {results[name] * 1e6:12.3f} us")
+
+    history = load_results(args.results)
+    commit = commit_id()
+    baseline_id = args.baseline
+    if baseline_id is None:
+        others = [key for key in history if key != commit]
+        baseline_id = max(others, key=lambda key: history[key]["timestamp"]) if others else None
+    regressions: List[str] = []
+    if baseline_id is not None:
+        if baseline_id not in history:
+            print(f"No results for baseline {baseline_id}")
+            return 2
+        baseline = history[baseline_id]["results"]
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\nCompared with {baseline_id}:")
+        for name in names:
+            if name in baseline:
+                change = results[name] / baseline[name] - 1
+                flag = "  REGRESSION" if name in regressions else ""
+                print(f"{name:40} {change:+8.1%}{flag}")
+
+    if not args.no_save:
+        entry = history.get(commit, {"results": {}})
+        entry["results"].update(results)
+        entry["timestamp"] = time.time()
+        entry["python"] = sys.version.split()[0]
+        history[commit] = entry
+        with open(args.results, "w") as file:
+            json.dump(history, file, indent=2, sort_keys=True)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
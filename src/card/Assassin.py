@@ -3,6 +3,8 @@ from player.Player import Player
 
 
 class Assassin(Card):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             "Assassin",
@@ -15,8 +17,10 @@ class Assassin(Card):
         await game.notify_players(
             {
                 "type": "play_card",
-                "card": self.__repr__(),
+                "card": self.label,
                 "target": player.user.user_id,
+                "actor_id": player.user.user_id,
+                "outcome": "played",
                 "message": f"{player.user.name} played Assassin. This card has no effects.",
             }
         )
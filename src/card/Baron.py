@@ -3,6 +3,8 @@ from player.Player import Player
 
 
 class Baron(Card):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             "Baron",
@@ -14,15 +16,17 @@ class Baron(Card):
         target_player_id = target_info.get("target_player_id")
         target_player = game.get_player(target_player_id)
         if not target_player or not target_player.is_active:
-            player.send_message({"type": "error", "message": "Invalid target player."})
+            await player.send_message({"type": "error", "message": "Invalid target player."})
             return
 
         if target_player.is_protected:
             await game.notify_players(
                 {
                     "type": "play_card",
-                    "card": self.__repr__(),
+                    "card": self.label,
                     "target": target_player.user.user_id,
+                    "actor_id": player.user.user_id,
+                    "outcome": "protected",
                     "message": f"{player.user.name} tried to compare hands with {target_player.user.name} but they are protected.",
                 }
             )
@@ -32,20 +36,26 @@ class Baron(Card):
         target_card_value = target_player.hand_value()
 
         if player_card_value > target_card_value:
-            target_player.is_active = False
+            game.eliminate(target_player)
             await game.notify_players(
                 {
                     "type": "player_eliminated",
+                    "card": self.label,
+                    "actor_id": player.user.user_id,
+                    "outcome": "won",
                     "message": f"{player.user.name} compared hands with {target_player.user.name} and won! {target_player.user.name} is eliminated.",
                     "player_id": target_player.user.user_id,
                 }
             )
         elif player_card_value < target_card_value:
-            player.is_active = False
+            game.eliminate(player)
 
             await game.notify_players(
                 {
                     "type": "player_eliminated",
+                    "card": self.label,
+                    "actor_id": player.user.user_id,
+                    "outcome": "lost",
                     "message": f"{player.user.name} compared hands with {target_player.user.name} and lost! {player.user.name} is eliminated.",
                     "player_id": player.user.user_id,
                 }
@@ -54,8 +64,10 @@ class Baron(Card):
             await game.notify_players(
                 {
                     "type": "play_card",
-                    "card": self.__repr__(),
+                    "card": self.label,
                     "target": target_player.user.user_id,
+                    "actor_id": player.user.user_id,
+                    "outcome": "tie",
                     "message": f"{player.user.name} compared hands with {target_player.user.name} and it's a tie!",
                 }
             )
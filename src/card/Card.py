@@ -1,17 +1,24 @@
 # card.py
 
+from card.CardTable import CARD_CODES, CARD_LABELS, NO_CARD
+
 
 class Card:
+    __slots__ = ("name", "value", "description", "code", "label")
+
     def __init__(self, name, value, description):
         self.name = name
         self.value = value
         self.description = description
+        self.code = CARD_CODES.get(name, NO_CARD)
+        # Precomputed so messages do not rebuild it on every play
+        self.label = CARD_LABELS[self.code] if self.code != NO_CARD else f"{name}({value})"
 
     async def play(self, game, player, target_info):
         raise NotImplementedError("Each card must implement its play method.")
 
     def __str__(self):
-        return self.name + "(" + str(self.value) + ")"
+        return self.label
 
     def __repr__(self):
-        return self.name + "(" + str(self.value) + ")"
+        return self.label
@@ -1,5 +1,8 @@
 # card_factory.py
+from typing import Dict
 from card.Card import Card
+from card.CardTable import CARD_NAMES, CARD_VALUES, CARD_CODES
+from card.Assassin import Assassin
 from card.Guard import Guard
 from card.Priest import Priest
 from card.King import King
@@ -11,6 +14,7 @@ from card.Prince import Prince
 # ... import other card classes
 
 CARD_CLASSES = {
+    'Assassin': Assassin,
     'Guard': Guard,
     'Priest': Priest,
     'King': King,
@@ -22,12 +26,36 @@ CARD_CLASSES = {
     # ... other card classes
 }
 
+
+class _NotImplementedCard(Card):
+    __slots__ = ()
+
+    def __init__(self, card_name):
+        super().__init__(card_name, CARD_VALUES[CARD_CODES[card_name]], "Not implemented")
+
+    async def play(self, game, player, target_info):
+        pass
+
+
+# Cards carry no per-copy state, so every copy of a card shares one instance.
+_CARD_CACHE: Dict[str, Card] = {}
+
+
 def create_card(card_name):
+    card = _CARD_CACHE.get(card_name)
+    if card:
+        return card
     card_class = CARD_CLASSES.get(card_name)
     if card_class:
-        return card_class()
+        card = card_class()
+    elif card_name in CARD_CODES:
+        card = _NotImplementedCard(card_name)
     else:
-        _not_implemented_card = Card(card_name, 0, "Not implemented")
-        _not_implemented_card.play = lambda game, player, target_info: None
-        return _not_implemented_card
         raise ValueError(f"Unknown card name: {card_name}")
+    _CARD_CACHE[card_name] = card
+    return card
+
+
+def card_for_code(code: int) -> Card:
+    """Returns the shared card instance for an integer card code."""
+    return create_card(CARD_NAMES[code])
@@ -0,0 +1,125 @@
+# card_table.py
+"""
+Integer card codes and the static per-card tables indexed by them.
+
+The nine implemented cards use their value as their code, so the classic game
+can compare codes directly; the rest of the extended deck is numbered after them.
+"""
+
+from typing import Dict, Tuple
+
+ASSASSIN, GUARD, PRIEST, BARON, HANDMAID, PRINCE, KING, COUNTESS, PRINCESS = range(9)
+(
+    JESTER,
+    CARDINAL,
+    BARONESS,
+    SYCOPHANT,
+    COMET,
+    CONSTABLE,
+    DOWAGER_QUEEN,
+    ARCHBISHOP,
+    BISHOP,
+) = range(9, 18)
+
+# Marks an empty slot in byte-backed hands.
+NO_CARD = 0xFF
+
+CARD_NAMES: Tuple[str, ...] = (
+    "Assassin",
+    "Guard",
+    "Priest",
+    "Baron",
+    "Handmaid",
+    "Prince",
+    "King",
+    "Countess",
+    "Princess",
+    "Jester",
+    "Cardinal",
+    "Baroness",
+    "Sycophant",
+    "Comet",
+    "Constable",
+    "Dowager Queen",
+    "Archbishop",
+    "Bishop",
+)
+
+CARD_VALUES: Tuple[float, ...] = (0, 1, 2, 3, 4, 5, 6, 7, 8, 0, 2, 3, 4, 5, 6, 7, 7.5, 9)
+
+# Display label of each card, e.g. "Guard(1)".
+CARD_LABELS: Tuple[str, ...] = tuple(
+    f"{name}({value})" for name, value in zip(CARD_NAMES, CARD_VALUES)
+)
+
+# Cards whose effect is aimed at another player (the Prince may also target yourself).
+TARGETED_CARDS = frozenset((GUARD, PRIEST, BARON, PRINCE, KING))
+
+CARD_CODES: Dict[str, int] = {name: code for code, name in enumerate(CARD_NAMES)}
+
+# What playing a card did, as reported in "outcome" message fields. The engine and
+# the binary protocol use the index of an outcome as its code.
+OUTCOMES: Tuple[str, ...] = (
+    "played",
+    "protect",
+    "protected",
+    "tie",
+    "won",
+    "lost",
+    "assassinated",
+    "guess_right",
+    "guess_wrong",
+    "swapped",
+    "looked",
+    "peek",
+    "discarded",
+    "deck_empty",
+    "princess",
+    "redraw",
+)
+(
+    PLAYED,
+    PROTECT,
+    PROTECTED,
+    TIE,
+    WON,
+    LOST,
+    ASSASSINATED,
+    GUESS_RIGHT,
+    GUESS_WRONG,
+    SWAPPED,
+    LOOKED,
+    PEEK,
+    DISCARDED,
+    DECK_EMPTY,
+    PRINCESS_DISCARDED,
+    REDRAW,
+) = range(len(OUTCOMES))
+
+CLASSIC_DECK = bytes(
+    [GUARD] * 5
+    + [PRIEST] * 2
+    + [BARON] * 2
+    + [HANDMAID] * 2
+    + [PRINCE] * 2
+    + [KING, COUNTESS, PRINCESS]
+)
+
+EXTENDED_DECK = bytes(
+    [ASSASSIN, JESTER]
+    + [GUARD] * 8
+    + [PRIEST] * 2
+    + [CARDINAL] * 2
+    + [BARON] * 2
+    + [BARONESS] * 2
+    + [SYCOPHANT] * 2
+    + [HANDMAID] * 2
+    + [PRINCE] * 2
+    + [COMET] * 2
+    + [KING, CONSTABLE, COUNTESS, DOWAGER_QUEEN, ARCHBISHOP, PRINCESS, BISHOP]
+)
+
+DECK_VARIANTS: Dict[str, bytes] = {
+    "classic": CLASSIC_DECK,
+    "extended": EXTENDED_DECK,
+}
@@ -2,6 +2,8 @@ from card.Card import Card
 
 
 class Countess(Card):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             name="Countess",
@@ -13,8 +15,10 @@ class Countess(Card):
         await game.notify_players(
             {
                 "type": "play_card",
-                "card": self.__repr__(),
+                "card": self.label,
                 "target": player.user.user_id,
+                "actor_id": player.user.user_id,
+                "outcome": "played",
                 "message": f"{player.user.name} played Countess. This card has no effects.",
             }
         )
@@ -6,6 +6,8 @@ from player.Player import Player
 
 
 class Guard(Card):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             name="Guard",
@@ -33,6 +35,15 @@ class Guard(Card):
             )
             return
 
+        # Guesses may arrive as strings from the client
+        try:
+            guessed_value = int(guessed_value)
+        except (TypeError, ValueError):
+            await player.send_message(
+                {"type": "error", "message": "Invalid guess."}
+            )
+            return
+
         # Cannot guess Guard
         if guessed_value == 1:
             await player.send_message(
@@ -45,8 +56,10 @@ class Guard(Card):
             await game.notify_players(
                 {
                     "type": "play_card",
-                    "card": self.__repr__(),
+                    "card": self.label,
                     "target": target_player.user.user_id,
+                    "actor_id": player.user.user_id,
+                    "outcome": "protected",
                     "message": f"{player.user.name} tried to guess {target_player.user.name}'s card but they are protected.",
                 }
             )
@@ -54,12 +67,15 @@ class Guard(Card):
 
         # Check if target's hand is assassin
         if target_player.hand[0].name == "Assassin":
-            player.is_active = False  # Eliminate the player who guessed
+            game.eliminate(player)  # Eliminate the player who guessed
             await game.notify_players(
                 {
                     "type": "play_card",
-                    "card": self.__repr__(),
+                    "card": self.label,
                     "target": target_player.user.user_id,
+                    "actor_id": player.user.user_id,
+                    "outcome": "assassinated",
+                    "guess": guessed_value,
                     "message": f"{player.user.name} tried to guess {target_player.user.name}'s card and be assassinated.",
                 }
             )
@@ -68,12 +84,16 @@ class Guard(Card):
 
         # Check if guess is correct
         target_card = target_player.hand[0]
-        if target_card.value == int(guessed_value):
+        if target_card.value == guessed_value:
             # Eliminate the target player
-            target_player.is_active = False
+            game.eliminate(target_player)
             await game.notify_players(
                 {
                     "type": "player_eliminated",
+                    "card": self.label,
+                    "actor_id": player.user.user_id,
+                    "outcome": "guess_right",
+                    "guess": guessed_value,
                     "message": f"{player.user.name} guessed {target_player.user.name}'s card as {guessed_value} correctly! {target_player.user.name} is eliminated.",
                     "player_id": target_player.user.user_id,
                 }
@@ -84,8 +104,11 @@ class Guard(Card):
             await game.notify_players(
                 {
                     "type": "play_card",
-                    "card": self.__repr__(),
+                    "card": self.label,
                     "target": target_player.user.user_id,
+                    "actor_id": player.user.user_id,
+                    "outcome": "guess_wrong",
+                    "guess": guessed_value,
                     "message": f"{player.user.name} guessed {target_player.user.name}'s card as {guessed_value}, but they guessed incorrectly.",
                 }
             )
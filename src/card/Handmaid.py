@@ -3,6 +3,8 @@ from player.Player import Player
 
 
 class Handmaid(Card):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             "Handmaid",
@@ -15,8 +17,10 @@ class Handmaid(Card):
         await game.notify_players(
             {
                 "type": "play_card",
-                "card": self.__repr__(),
+                "card": self.label,
                 "target": player.user.user_id,  # target is the player who played the card
+                "actor_id": player.user.user_id,
+                "outcome": "protect",
                 "message": f"{player.user.name} played Handmaid and is protected until their next turn.",
             }
         )
@@ -6,6 +6,8 @@ from typing import Dict, Optional
 
 
 class King(Card):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             name="King",
@@ -37,8 +39,10 @@ class King(Card):
             await game.notify_players(
                 {
                     "type": "play_card",
-                    "card": self.__repr__(),
+                    "card": self.label,
                     "target": target_player.user.user_id,
+                    "actor_id": player.user.user_id,
+                    "outcome": "protected",
                     "message": f"{player.user.name} tried to swap hands with {target_player.user.name} but they are protected.",
                 }
             )
@@ -50,8 +54,10 @@ class King(Card):
         await game.notify_players(
             {
                 "type": "play_card",
-                "card": self.__repr__(),
+                "card": self.label,
                 "target": target_player.user.user_id,
+                "actor_id": player.user.user_id,
+                "outcome": "swapped",
                 "message": f"{player.user.name} swapped hands with {target_player.user.name}.",
             }
         )
@@ -59,6 +65,9 @@ class King(Card):
         await player.send_message(
             {
                 "type": "private_info",
+                "outcome": "swapped",
+                "target": target_player.user.user_id,
+                "card": player.hand[0].label,
                 "message": f"You swapped hands with {target_player.user.name} and got a {player.hand}.",
             }
         )
@@ -66,6 +75,9 @@ class King(Card):
         await target_player.send_message(
             {
                 "type": "private_info",
+                "outcome": "swapped",
+                "target": player.user.user_id,
+                "card": target_player.hand[0].label,
                 "message": f"You swapped hands with {player.user.name} and got a {target_player.hand}.",
             }
         )
@@ -4,6 +4,8 @@ from card.Card import Card
 
 
 class Priest(Card):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             name="Priest", value=2, description="Look at another player's hand."
@@ -33,8 +35,10 @@ class Priest(Card):
             await game.notify_players(
                 {
                     "type": "play_card",
-                    "card": self.__repr__(),
+                    "card": self.label,
                     "target": target_player.user.user_id,
+                    "actor_id": player.user.user_id,
+                    "outcome": "protected",
                     "message": f"{player.user.name} tried to look at {target_player.user.name}'s hand but they are protected.",
                 }
             )
@@ -45,15 +49,20 @@ class Priest(Card):
         await player.send_message(
             {
                 "type": "private_info",
-                "message": f"{target_player.user.name}'s card is {target_card.__repr__()}.",
+                "outcome": "peek",
+                "target": target_player.user.user_id,
+                "card": target_card.label,
+                "message": f"{target_player.user.name}'s card is {target_card.label}.",
             }
         )
 
         await game.notify_players(
             {
                 "type": "play_card",
-                "card": self.__repr__(),
+                "card": self.label,
                 "target": target_player.user.user_id,
+                "actor_id": player.user.user_id,
+                "outcome": "looked",
                 "message": f"{player.user.name} looked at {target_player.user.name}'s hand.",
             },
             exclude_player_ids={player.user.user_id},
@@ -3,6 +3,8 @@ from player.Player import Player
 
 
 class Prince(Card):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             "Prince",
@@ -23,8 +25,10 @@ class Prince(Card):
             await game.notify_players(
                 {
                     "type": "play_card",
-                    "card": self.__repr__(),
+                    "card": self.label,
                     "target": target_player.user.user_id,
+                    "actor_id": player.user.user_id,
+                    "outcome": "protected",
                     "message": f"{player.user.name} tried to make {target_player.user.name} discard their hand but they are protected.",
                 }
             )
@@ -34,26 +38,34 @@ class Prince(Card):
             await game.notify_players(
                 {
                     "type": "play_card",
-                    "card": self.__repr__(),
+                    "card": self.label,
                     "target": target_player.user.user_id,
+                    "actor_id": player.user.user_id,
+                    "outcome": "deck_empty",
                     "message": f"{player.user.name} tried to make {target_player.user.name} discard their hand but the deck is empty.",
                 }
             )
             return
 
         if target_player.hand[0].name == "Princess":
-            target_player.is_active = False
+            game.eliminate(target_player)
             await game.notify_players(
                 {
                     "type": "play_card",
-                    "card": self.__repr__(),
+                    "card": self.label,
                     "target": target_player.user.user_id,
+                    "actor_id": player.user.user_id,
+                    "outcome": "discarded",
+                    "discarded": target_player.hand[0].label,
                     "message": f"{player.user.name} made {target_player.user.name} discard their hand and draw a new card.",
                 }
             )
             await game.notify_players(
                 {
                     "type": "player_eliminated",
+                    "card": self.label,
+                    "actor_id": player.user.user_id,
+                    "outcome": "princess",
                     "message": f"{player.user.name} made {target_player.user.name} discard their Princess and thus they lost.",
                     "player_id": target_player.user.user_id,
                 }
@@ -67,15 +79,22 @@ class Prince(Card):
         await game.notify_players(
             {
                 "type": "play_card",
-                "card": self.__repr__(),
+                "card": self.label,
                 "target": target_player.user.user_id,
-                "message": f"{player.user.name} made {target_player.user.name} discard their {discarded_card.__repr__()} and draw a new card.",
+                "actor_id": player.user.user_id,
+                "outcome": "discarded",
+                "discarded": discarded_card.label,
+                "message": f"{player.user.name} made {target_player.user.name} discard their {discarded_card.label} and draw a new card.",
             }
         )
 
         await target_player.send_message(
             {
                 "type": "private_info",
-                "message": f"You discarded your {discarded_card.__repr__()} and drew a {card.__repr__()}.",
+                "outcome": "redraw",
+                "target": target_player.user.user_id,
+                "card": card.label,
+                "discarded": discarded_card.label,
+                "message": f"You discarded your {discarded_card.label} and drew a {card.label}.",
             }
         )
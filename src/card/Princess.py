@@ -3,6 +3,8 @@ from player.Player import Player
 
 
 class Princess(Card):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             "Princess",
@@ -11,10 +13,13 @@ class Princess(Card):
         )
 
     async def play(self, game, player: Player, target_info):
-        player.is_active = False
+        game.eliminate(player)
         await game.notify_players(
             {
                 "type": "player_eliminated",
+                "card": self.label,
+                "actor_id": player.user.user_id,
+                "outcome": "princess",
                 "message": f"{player.user.name} discarded their Princess and thus they lost.",
                 "player_id": player.user.user_id,
             }
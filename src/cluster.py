@@ -0,0 +1,57 @@
+# cluster.py
+"""
+Runs a sharded deployment: one server worker process per shard on this box.
+
+Each worker listens on its own port and owns the rooms that `shard_for_room`
+assigns to it; workers share an SQLite room registry, and a client asking a
+worker for a room hosted elsewhere receives a `redirect` with the right URL.
+
+Usage:
+    python cluster.py --workers 4 --port 8000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one Love Letter server worker per shard.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000, help="Port of shard 0; shard i uses port + i.")
+    parser.add_argument("--public-host", default=None, help="Host name put in redirect URLs.")
+    parser.add_argument("--registry", default="sqlite:rooms.db")
+    args = parser.parse_args()
+
+    public_host = args.public_host or args.host
+    urls = [f"ws://{public_host}:{args.port + shard}/ws" for shard in range(args.workers)]
+    workers = []
+    for shard in range(args.workers):
+        env = dict(
+            os.environ,
+            LOVE_LETTER_SHARD=str(shard),
+            LOVE_LETTER_SHARDS=str(args.workers),
+            LOVE_LETTER_SHARD_URLS=",".join(urls),
+            LOVE_LETTER_REGISTRY=args.registry,
+        )
+        command = [
+            sys.executable, "-m", "uvicorn", "server:app",
+            "--host", args.host, "--port", str(args.port + shard),
+        ]
+        workers.append(subprocess.Popen(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__))))
+        print(f"Shard {shard} listening on {urls[shard]}")
+
+    try:
+        for worker in workers:
+            worker.wait()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,48 @@
 # deck.py
 import random
-from time import time
-from card.CardFactory import create_card
-
-random.seed(time())
+from typing import Optional
+from card.Card import Card
+from card.CardFactory import card_for_code
+from card.CardTable import CLASSIC_DECK, EXTENDED_DECK
 
 class Deck:
-    def __init__(self, cards=[]):
-        self.cards = cards
-        self.discard_pile = []
-    
+    """
+    A deck of cards, stored as integer card codes.
+
+    Attributes:
+        cards (bytearray): Card codes of the draw pile; the last one is the top card.
+        discard_pile (bytearray): Card codes of the discarded cards.
+        rng (random.Random): Random source used for shuffling.
+    """
+
+    __slots__ = ("cards", "discard_pile", "rng")
+
+    def __init__(self, cards: Optional[bytes] = None, rng: Optional[random.Random] = None):
+        self.cards = bytearray(cards or b"")
+        self.discard_pile = bytearray()
+        self.rng = rng if rng else random.Random()
+
     def initialize_classic_deck(self):
         """Initializes a classic deck of 16 cards"""
-        cards = []
-        cards.extend([create_card("Guard") for _ in range(5)])
-        cards.extend([create_card("Priest") for _ in range(2)])
-        cards.extend([create_card("Baron") for _ in range(2)])
-        cards.extend([create_card("Handmaid") for _ in range(2)])
-        cards.extend([create_card("Prince") for _ in range(2)])
-        cards.extend([create_card("King") for _ in range(1)])
-        cards.extend([create_card("Countess") for _ in range(1)])
-        cards.extend([create_card("Princess") for _ in range(1)])
-
-        self.cards = cards
+        self.cards = bytearray(CLASSIC_DECK)
+        self.discard_pile = bytearray()
         self.shuffle()
-    
+
     def initialize_extended_deck(self):
         """Initializes an extended deck of 32 cards"""
-        cards = []
-        # 0 value cards
-        cards.extend([create_card("Assassin") for _ in range(1)])
-        cards.extend([create_card("Jester") for _ in range(1)])
-        # 1 value cards
-        cards.extend([create_card("Guard") for _ in range(8)])
-        # 2 value cards
-        cards.extend([create_card("Priest") for _ in range(2)])
-        cards.extend([create_card("Cardinal") for _ in range(2)])
-        # 3 value cards
-        cards.extend([create_card("Baron") for _ in range(2)])
-        cards.extend([create_card("Baroness") for _ in range(2)])
-        # 4 value cards
-        cards.extend([create_card("Sycophant") for _ in range(2)])
-        cards.extend([create_card("Handmaid") for _ in range(2)])
-        # 5 value cards
-        cards.extend([create_card("Prince") for _ in range(2)])
-        cards.extend([create_card("Comet") for _ in range(2)])
-        # 6 value cards
-        cards.extend([create_card("King") for _ in range(1)])
-        cards.extend([create_card("Constable") for _ in range(1)])
-        # 7 value cards
-        cards.extend([create_card("Countess") for _ in range(1)])
-        cards.extend([create_card("Dowager Queen") for _ in range(1)])
-        # 7.5 value cards
-        cards.extend([create_card("Archbishop") for _ in range(1)])
-        # 8 value cards
-        cards.extend([create_card("Princess") for _ in range(1)])
-        # 9 value cards
-        cards.extend([create_card("Bishop") for _ in range(1)])
-
-        self.cards = cards
+        self.cards = bytearray(EXTENDED_DECK)
+        self.discard_pile = bytearray()
         self.shuffle()
 
 
     def shuffle(self):
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.cards)
 
-    def draw(self):
-        return self.cards.pop() if self.cards else None
+    def draw(self) -> Optional[Card]:
+        return card_for_code(self.cards.pop()) if self.cards else None
 
-    def discard(self, card):
-        self.discard_pile.append(card)
+    def discard(self, card: Card):
+        self.discard_pile.append(card.code)
 
     def is_empty(self):
         return not self.cards
@@ -0,0 +1,166 @@
+# actions.py
+"""
+Legal move generation and a dense action index.
+
+A move is (card index, target seat, guess), as taken by `Engine.play`, with -1 for
+no target or guess. For a table size and a deck, `ActionIndex` numbers every such
+move densely, so a move can be stored, compared and looked up as one small int.
+
+Which seats a card may aim at is tabulated once per card code (`TARGET_RULES`),
+and the targetable seats of every seat mask are tabulated once per table size. The
+legal moves of a seat only depend on the seat, its two cards and which other seats
+are active and unprotected, so they are cached under that key: once the cache is
+warm, enumerating a decision's moves is a dict lookup that returns a shared tuple.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from card.CardTable import CARD_VALUES, CLASSIC_DECK, COUNTESS, GUARD, KING, NO_CARD, PRINCE, TARGETED_CARDS
+from engine.RoundState import RoundState
+
+# Who a card may aim at
+TARGETS_NONE, TARGETS_OTHERS, TARGETS_ANY = range(3)
+
+TARGET_RULES: Tuple[int, ...] = tuple(
+    TARGETS_ANY if code == PRINCE else TARGETS_OTHERS if code in TARGETED_CARDS else TARGETS_NONE
+    for code in range(len(CARD_VALUES))
+)
+
+# (card index, target seat or -1, guess or -1)
+Move = Tuple[int, int, int]
+# (card code, card index, target seat or -1, guess or -1)
+KeyedMove = Tuple[int, int, int, int]
+
+
+def guess_values(composition: bytes) -> List[int]:
+    """Returns the values a Guard may usefully name with a deck: every value but the Guard's."""
+    return sorted({CARD_VALUES[card] for card in composition if card != GUARD})
+
+
+class ActionIndex:
+    """
+    Legal moves and dense move numbers for one table size and deck.
+
+    Move number = (card index * (num_players + 1) + target + 1) * (guesses + 1)
+    + guess slot + 1, where the guess slot is the guess's position in `guesses`.
+
+    Attributes:
+        num_players (int): Number of seats at the table.
+        guesses (Tuple[int, ...]): The values a Guard may name.
+        size (int): Number of move numbers.
+        moves (Tuple[Move, ...]): The move of each move number.
+    """
+
+    __slots__ = ("num_players", "guesses", "size", "moves", "_guess_slots", "_others", "_seats", "_legal", "_keyed")
+
+    def __init__(self, num_players: int, composition: bytes = CLASSIC_DECK):
+        self.num_players = num_players
+        self.guesses = tuple(guess_values(composition))
+        self._guess_slots: Dict[int, int] = {guess: slot for slot, guess in enumerate(self.guesses)}
+        width = len(self.guesses) + 1
+        self.size = 2 * (num_players + 1) * width
+        self.moves: Tuple[Move, ...] = tuple(
+            (card_index, target, self.guesses[slot] if slot >= 0 else -1)
+            for card_index in (0, 1)
+            for target in range(-1, num_players)
+            for slot in range(-1, len(self.guesses))
+        )
+        everyone = (1 << num_players) - 1
+        self._others = tuple(everyone & ~(1 << seat) for seat in range(num_players))
+        # Seats in each seat mask, in seat order
+        self._seats = tuple(
+            tuple(seat for seat in range(num_players) if mask >> seat & 1) for mask in range(1 << num_players)
+        )
+        self._legal: Dict[int, Tuple[int, ...]] = {}
+        self._keyed: Dict[int, Tuple[KeyedMove, ...]] = {}
+
+    def encode(self, card_index: int, target: int = -1, guess: int = -1) -> int:
+        """Returns the number of a move, or -1 if the move is outside the index."""
+        if card_index != 0 and card_index != 1 or not -1 <= target < self.num_players:
+            return -1
+        slot = self._guess_slots.get(guess, -2) if guess != -1 else -1
+        if slot == -2:
+            return -1
+        return ((card_index * (self.num_players + 1) + target + 1) * (len(self.guesses) + 1)) + slot + 1
+
+    def decode(self, index: int) -> Move:
+        """Returns the move of a move number."""
+        return self.moves[index]
+
+    def targets(self, state: RoundState, seat: int, card: int) -> Tuple[int, ...]:
+        """Returns the seats a card played by a seat may aim at, in seat order."""
+        rule = TARGET_RULES[card]
+        if rule == TARGETS_NONE:
+            return ()
+        mask = state.active & ~state.protected & self._others[seat]
+        if rule == TARGETS_ANY:
+            mask |= 1 << seat
+        return self._seats[mask]
+
+    def _key(self, state: RoundState, seat: int) -> int:
+        hands = state.hands
+        mask = state.active & ~state.protected & self._others[seat]
+        return ((mask * self.num_players + seat) << 16) | hands[2 * seat] << 8 | hands[2 * seat + 1]
+
+    def keyed_moves(self, state: RoundState, seat: int) -> Tuple[KeyedMove, ...]:
+        """
+        Returns the moves a seat may make with the two cards in its hand, each
+        prefixed with the code of the card played.
+
+        The Countess rule is respected. A targeted card with no valid target can
+        still be played, with no target and no effect. Two copies of a card give
+        the moves of one of them.
+        """
+        key = self._key(state, seat)
+        moves = self._keyed.get(key)
+        if moves is None:
+            moves = self._keyed[key] = self._generate(state, seat)
+        return moves
+
+    def legal(self, state: RoundState, seat: int) -> Tuple[int, ...]:
+        """Returns the numbers of the moves a seat may make, as in `keyed_moves`."""
+        key = self._key(state, seat)
+        legal = self._legal.get(key)
+        if legal is None:
+            legal = self._legal[key] = tuple(
+                self.encode(card_index, target, guess) for _, card_index, target, guess in self.keyed_moves(state, seat)
+            )
+        return legal
+
+    def is_legal(self, state: RoundState, seat: int, card_index: int, target: int = -1, guess: int = -1) -> bool:
+        """
+        Returns whether a seat may make a move.
+
+        With two copies of a card, playing either one is legal, though only the
+        first is listed by `keyed_moves`.
+        """
+        hands = state.hands
+        if card_index == 1 and hands[2 * seat] == hands[2 * seat + 1]:
+            card_index = 0
+        index = self.encode(card_index, target, guess)
+        return index >= 0 and index in self.legal(state, seat)
+
+    def _generate(self, state: RoundState, seat: int) -> Tuple[KeyedMove, ...]:
+        hands = state.hands
+        first = hands[2 * seat]
+        second = hands[2 * seat + 1]
+        moves: List[KeyedMove] = []
+        for card_index, card, other in ((0, first, second), (1, second, first)):
+            if card_index == 1 and card == first or card == NO_CARD:
+                break
+            if other == COUNTESS and (card == KING or card == PRINCE):
+                continue
+            seats = self.targets(state, seat, card)
+            if TARGET_RULES[card] == TARGETS_NONE or not seats:
+                moves.append((card, card_index, -1, -1))
+            elif card == GUARD:
+                moves.extend((card, card_index, target, guess) for target in seats for guess in self.guesses)
+            else:
+                moves.extend((card, card_index, target, -1) for target in seats)
+        return tuple(moves)
+
+
+@lru_cache(maxsize=None)
+def action_index(num_players: int, composition: bytes = CLASSIC_DECK) -> ActionIndex:
+    """Returns the shared ActionIndex of a table size and deck, so every user shares its caches."""
+    return ActionIndex(num_players, composition)
@@ -0,0 +1,382 @@
+# archive.py
+"""
+Fixed-record archive of finished rounds, read through mmap.
+
+An archive is a directory of append-only files:
+    rounds.bin   one 64-byte ROUND record per round, in time order
+    actions.bin  one 8-byte ACTION record per card played, grouped by round
+    names.txt    room and player names, one per line; the line number is the name's ID
+    index.bin    rounds of each name, rebuilt when a writer is closed
+
+ROUND layout (little-endian):
+    u32 timestamp (Unix seconds), u32 room name ID, u32 index of the first action,
+    u16 action count, u8 players, u8 first seat, u8 winner seat bitmask,
+    u8 deck variant (index into VARIANTS, NO_VALUE if unknown),
+    8 x u32 player name IDs (NO_NAME for empty seats),
+    8 x u8 card left in each seat's hand at the end (NO_CARD if eliminated), 6 pad bytes
+
+ACTION layout, one unsigned byte per field of ACTION_FIELDS:
+    seat, card played, card kept, target seat, target's card before the effect,
+    guess (index into GUESS_VALUES), outcome (index into `card.CardTable.OUTCOMES`),
+    cards left in the deck
+Absent targets and guesses are NO_VALUE. Guesses are stored by index because some
+card values, like the Archbishop's 7.5, do not fit a byte; `Archive.action` and
+`Archive.match_actions` take and return the values.
+
+`Archive.match_actions` filters every action with a few C-level passes over
+whole columns of the mapped file, so it never builds a Python object per record:
+    archive.match_actions(card=PRINCE, target_card=PRINCESS, outcome=PRINCESS_DISCARDED)
+"""
+
+import bisect
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+from card.CardTable import CARD_VALUES, DECK_VARIANTS, NO_CARD
+from engine.Actions import guess_values
+from engine.RoundState import MAX_PLAYERS
+
+VARIANTS = tuple(sorted(DECK_VARIANTS))
+NO_VALUE = 0xFF
+NO_NAME = 0xFFFFFFFF
+# Every value a Guard may name with any deck
+GUESS_VALUES = tuple(guess_values(bytes(range(len(CARD_VALUES)))))
+_GUESS_SLOTS = {value: slot for slot, value in enumerate(GUESS_VALUES)}
+
+ROUND = struct.Struct(f"<IIIH4B{MAX_PLAYERS}I{MAX_PLAYERS}B6x")
+ACTION = struct.Struct("<8B")
+ACTION_FIELDS = ("seat", "card", "kept", "target", "target_card", "guess", "outcome", "deck_count")
+
+# Offsets of the u32 columns of a ROUND record, in units of 4 bytes
+_ROUND_WORDS = ROUND.size // 4
+_TIMESTAMP_WORD = 0
+_FIRST_ACTION_WORD = 2
+
+_ROUNDS = "rounds.bin"
+_ACTIONS = "actions.bin"
+_NAMES = "names.txt"
+_INDEX = "index.bin"
+
+
+class RoundRecorder:
+    """
+    Collects the rounds an `Engine` plays, as archive-ready records.
+
+    Set it as `engine.recorder`; the engine reports every action and the end of
+    every round. Names and timestamps are added by the ArchiveWriter.
+
+    Attributes:
+        rounds (list): (players, first seat, winner bitmask, variant, final hands,
+            actions) of each finished round; actions are packed ACTION records.
+    """
+
+    __slots__ = ("rounds", "_actions")
+
+    def __init__(self):
+        self.rounds: list = []
+        self._actions = bytearray()
+
+    def record_action(
+        self,
+        seat: int,
+        card: int,
+        kept: int,
+        target: int,
+        target_card: int,
+        guess: int,
+        outcome: int,
+        deck_count: int,
+    ) -> None:
+        """Records one card played; -1 targets and guesses are stored as NO_VALUE."""
+        self._actions += ACTION.pack(
+            seat,
+            card,
+            kept,
+            target if 0 <= target < NO_VALUE else NO_VALUE,
+            target_card,
+            _GUESS_SLOTS.get(guess, NO_VALUE),
+            outcome,
+            deck_count,
+        )
+
+    def record_round(self, engine, first_seat: int, winners: Sequence[int]) -> None:
+        """Records the end of a round, with the actions recorded since the last one."""
+        state = engine.state
+        mask = 0
+        for seat in winners:
+            mask |= 1 << seat
+        variant = NO_VALUE
+        for code, name in enumerate(VARIANTS):
+            if DECK_VARIANTS[name] == engine.composition:
+                variant = code
+        self.rounds.append(
+            (engine.num_players, first_seat, mask, variant, bytes(state.hands[0::2]), bytes(self._actions))
+        )
+        self._actions.clear()
+
+    def take(self) -> list:
+        """Returns the recorded rounds and forgets them."""
+        rounds, self.rounds = self.rounds, []
+        return rounds
+
+
+class ArchiveWriter:
+    """
+    Appends rounds to an archive; only one writer may have an archive open at a time.
+
+    Attributes:
+        directory (str): The archive directory.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._names: Dict[str, int] = {}
+        names_path = os.path.join(directory, _NAMES)
+        if os.path.exists(names_path):
+            with open(names_path, encoding="utf-8") as file:
+                for line in file:
+                    self._names[line.rstrip("\n")] = len(self._names)
+        self._names_file = open(names_path, "a", encoding="utf-8")
+        self._rounds_file = open(os.path.join(directory, _ROUNDS), "ab")
+        self._actions_file = open(os.path.join(directory, _ACTIONS), "ab")
+        self._round_count = self._rounds_file.tell() // ROUND.size
+        self._action_count = self._actions_file.tell() // ACTION.size
+        self._last_timestamp = 0
+        if self._round_count:
+            with open(os.path.join(directory, _ROUNDS), "rb") as file:
+                file.seek((self._round_count - 1) * ROUND.size)
+                self._last_timestamp = ROUND.unpack(file.read(ROUND.size))[0]
+
+    def _name_id(self, name: str) -> int:
+        name_id = self._names.get(name)
+        if name_id is None:
+            if "\n" in name:
+                raise ValueError("Names cannot contain newlines")
+            name_id = self._names[name] = len(self._names)
+            self._names_file.write(name + "\n")
+        return name_id
+
+    def append_round(
+        self,
+        room: str,
+        players: Sequence[str],
+        round_record: tuple,
+        timestamp: Optional[int] = None,
+    ) -> int:
+        """
+        Appends one round.
+
+        Args:
+            room (str): Name of the room the round was played in.
+            players (Sequence[str]): Name of the player in each seat.
+            round_record (tuple): A round taken from a RoundRecorder.
+            timestamp (Optional[int]): When the round ended, in Unix seconds;
+                defaults to now.
+
+        Returns:
+            int: The index of the round in the archive.
+
+        Raises:
+            ValueError: If the timestamp is older than the last archived round;
+                rounds are indexed by date through their order.
+        """
+        num_players, first_seat, winners, variant, hands, actions = round_record
+        if timestamp is None:
+            timestamp = max(int(time.time()), self._last_timestamp)
+        if timestamp < self._last_timestamp:
+            raise ValueError("Rounds must be archived in time order")
+        if len(players) != num_players:
+            raise ValueError("Exactly one player name per seat is required")
+        seats = [self._name_id(name) for name in players] + [NO_NAME] * (MAX_PLAYERS - num_players)
+        final_hands = bytes(hands) + bytes((NO_CARD,)) * (MAX_PLAYERS - num_players)
+        self._rounds_file.write(
+            ROUND.pack(
+                timestamp,
+                self._name_id(room),
+                self._action_count,
+                len(actions) // ACTION.size,
+                num_players,
+                first_seat,
+                winners,
+                variant,
+                *seats,
+                *final_hands,
+            )
+        )
+        self._actions_file.write(actions)
+        self._action_count += len(actions) // ACTION.size
+        self._last_timestamp = timestamp
+        self._round_count += 1
+        return self._round_count - 1
+
+    def close(self) -> None:
+        """Flushes the files and rebuilds the name index."""
+        for file in (self._names_file, self._rounds_file, self._actions_file):
+            file.close()
+        build_index(self.directory)
+
+
+def build_index(directory: str) -> None:
+    """
+    Rebuilds `index.bin`: for every name ID, the rounds whose room or a seat has it.
+
+    Layout: u32 name count N, then N + 1 u32 offsets into the posting area, then
+    the u32 round indexes of each name in ascending order.
+    """
+    with open(os.path.join(directory, _NAMES), encoding="utf-8") as file:
+        count = sum(1 for _ in file)
+    postings: List[List[int]] = [[] for _ in range(count)]
+    with open(os.path.join(directory, _ROUNDS), "rb") as file:
+        data = file.read()
+    for index, record in enumerate(ROUND.iter_unpack(data)):
+        for name_id in {record[1], *record[8 : 8 + record[4]]}:
+            postings[name_id].append(index)
+    offsets = [0]
+    for rounds in postings:
+        offsets.append(offsets[-1] + len(rounds))
+    flat = [index for rounds in postings for index in rounds]
+    path = os.path.join(directory, _INDEX)
+    with open(path + ".tmp", "wb") as file:
+        file.write(struct.pack(f"<{count + 2}I", count, *offsets))
+        file.write(struct.pack(f"<{len(flat)}I", *flat))
+    os.replace(path + ".tmp", path)
+
+
+def _map(path: str):
+    with open(path, "rb") as file:
+        if not os.fstat(file.fileno()).st_size:
+            return b""
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Archive:
+    """
+    Read-only view of an archive, backed by memory-mapped files.
+
+    Records are decoded only when asked for; scans work on the mapped bytes.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, _NAMES), encoding="utf-8") as file:
+            self.names: List[str] = [line.rstrip("\n") for line in file]
+        self._name_ids = {name: name_id for name_id, name in enumerate(self.names)}
+        self._rounds = _map(os.path.join(directory, _ROUNDS))
+        self._actions = _map(os.path.join(directory, _ACTIONS))
+        index_path = os.path.join(directory, _INDEX)
+        self._index = _map(index_path) if os.path.exists(index_path) else b""
+        self.round_count = len(self._rounds) // ROUND.size
+        self.action_count = len(self._actions) // ACTION.size
+        self._words = memoryview(self._rounds).cast("I")
+        self._timestamps = self._words[_TIMESTAMP_WORD::_ROUND_WORDS]
+        self._first_actions = self._words[_FIRST_ACTION_WORD::_ROUND_WORDS]
+        self._index_words = memoryview(self._index).cast("I")
+
+    def __len__(self) -> int:
+        return self.round_count
+
+    def round(self, index: int) -> dict:
+        """Returns one round, with its names resolved and its actions decoded."""
+        record = ROUND.unpack_from(self._rounds, index * ROUND.size)
+        timestamp, room, first_action, action_count, num_players, first_seat, winners, variant = record[:8]
+        seats = record[8 : 8 + num_players]
+        hands = record[8 + MAX_PLAYERS : 8 + MAX_PLAYERS + num_players]
+        return {
+            "timestamp": timestamp,
+            "room": self.names[room],
+            "players": [self.names[name_id] for name_id in seats],
+            "first_seat": first_seat,
+            "winners": [seat for seat in range(num_players) if winners >> seat & 1],
+            "variant": VARIANTS[variant] if variant < len(VARIANTS) else None,
+            "final_hands": list(hands),
+            "actions": [self.action(i) for i in range(first_action, first_action + action_count)],
+        }
+
+    def action(self, index: int) -> dict:
+        """Returns one action as a dict keyed by ACTION_FIELDS, with the guessed value."""
+        action = dict(zip(ACTION_FIELDS, ACTION.unpack_from(self._actions, index * ACTION.size)))
+        if action["guess"] != NO_VALUE:
+            action["guess"] = GUESS_VALUES[action["guess"]]
+        return action
+
+    def round_of_action(self, action_index: int) -> int:
+        """Returns the index of the round an action belongs to."""
+        return bisect.bisect_right(self._first_actions, action_index) - 1
+
+    def rounds_between(self, start: int, end: int) -> range:
+        """Returns the indexes of the rounds that ended in [start, end), in Unix seconds."""
+        timestamps = self._timestamps
+        return range(bisect.bisect_left(timestamps, start), bisect.bisect_left(timestamps, end))
+
+    def _postings(self, name: str) -> Sequence[int]:
+        name_id = self._name_ids.get(name)
+        words = self._index_words
+        if name_id is None or not words or name_id >= words[0]:
+            return ()
+        base = words[0] + 2
+        return words[base + words[1 + name_id] : base + words[2 + name_id]]
+
+    def rounds_for_room(self, room: str) -> List[int]:
+        """Returns the indexes of the rounds played in a room."""
+        name_id = self._name_ids.get(room)
+        rounds = self._rounds
+        return [
+            index
+            for index in self._postings(room)
+            if struct.unpack_from("<I", rounds, index * ROUND.size + 4)[0] == name_id
+        ]
+
+    def rounds_for_player(self, player: str) -> List[int]:
+        """Returns the indexes of the rounds a player took a seat in."""
+        name_id = self._name_ids.get(player)
+        result = []
+        for index in self._postings(player):
+            record = ROUND.unpack_from(self._rounds, index * ROUND.size)
+            if name_id in record[8 : 8 + record[4]]:
+                result.append(index)
+        return result
+
+    def match_actions(self, **conditions: Union[int, Iterable[int]]) -> List[int]:
+        """
+        Returns the indexes of the actions matching every condition.
+
+        Args:
+            **conditions: One per ACTION_FIELDS name, with the wanted value or a
+                collection of accepted values; guesses are given as card values.
+
+        Raises:
+            ValueError: If a condition names an unknown field.
+        """
+        count = self.action_count
+        data = self._actions
+        # One byte per action, 1 while the action still matches
+        mask = int.from_bytes(b"\x01" * count, "little")
+        for field, wanted in conditions.items():
+            if field not in ACTION_FIELDS:
+                raise ValueError(f"Unknown action field: {field}")
+            accepted = {wanted} if isinstance(wanted, (int, float)) else set(wanted)
+            if field == "guess":
+                accepted = {value if value == NO_VALUE else _GUESS_SLOTS.get(value) for value in accepted}
+            table = bytes(1 if value in accepted else 0 for value in range(256))
+            # One strided copy, one translation and one big-int AND per column
+            column = data[ACTION_FIELDS.index(field) :: ACTION.size].translate(table)
+            mask &= int.from_bytes(column, "little")
+        hits = mask.to_bytes(count, "little")
+        result = []
+        find = hits.find
+        index = find(1)
+        while index != -1:
+            result.append(index)
+            index = find(1, index + 1)
+        return result
+
+    def close(self) -> None:
+        """Unmaps the files."""
+        for view in (self._timestamps, self._first_actions, self._words, self._index_words):
+            view.release()
+        for mapped in (self._rounds, self._actions, self._index):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
@@ -0,0 +1,490 @@
+# batch.py
+"""
+A NumPy engine that plays many games in lockstep.
+
+`BatchEngine` holds K games as arrays: hands, shuffled decks with a draw pointer,
+active and protected seats, discard counts and scores. Each `step` plays one turn
+in every game still in its round. Policies choose a move for all of them at once,
+and the effect of each card is resolved for every game that played it with array
+operations. The rules are those of `engine.Engine`.
+
+Batch policies take the engine and the indices of the games to move in, and return
+arrays of (card index, target seat, guess), with -1 for no target or guess.
+
+Usage:
+    python -m engine.Batch --games 1000000 --players 4 [--policies random keep-high ...]
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+import numpy as np
+from card.CardTable import (
+    ASSASSIN,
+    BARON,
+    CARD_NAMES,
+    CARD_VALUES,
+    CLASSIC_DECK,
+    COUNTESS,
+    GUARD,
+    HANDMAID,
+    KING,
+    NO_CARD,
+    PRIEST,
+    PRINCE,
+    PRINCESS,
+    TARGETED_CARDS,
+)
+from engine.Engine import DEFAULT_TOKENS_TO_WIN, TOKENS_TO_WIN
+
+DEFAULT_BATCH_SIZE = 100_000
+
+# Value of every byte a hand slot can hold; empty slots are worth less than any card
+VALUES = np.full(256, -1.0)
+VALUES[: len(CARD_VALUES)] = CARD_VALUES
+
+_TARGETED = np.zeros(256, dtype=bool)
+_TARGETED[list(TARGETED_CARDS)] = True
+
+Moves = Tuple[np.ndarray, np.ndarray, np.ndarray]
+BatchPolicy = Callable[["BatchEngine", np.ndarray], Moves]
+
+
+class BatchEngine:
+    """
+    K games of Love Letter held in arrays and played in lockstep.
+
+    Attributes:
+        size (int): Number of games K.
+        num_players (int): Number of seats in every game.
+        policies (List[BatchPolicy]): The batch policy of each seat.
+        rng (numpy.random.Generator): Random source of shuffles and policies.
+        composition (numpy.ndarray): Card codes of the full deck.
+        hands (numpy.ndarray): uint8 [K, seats, 2]; slot 1 holds the drawn card
+            during a turn, NO_CARD otherwise.
+        deck (numpy.ndarray): uint8 [K, deck size]; cards are drawn from the end.
+        deck_len (numpy.ndarray): Cards left in each draw pile.
+        burned (numpy.ndarray): uint8 [K, 4]; the face-down card, then the
+            face-up ones of a two-player game.
+        active (numpy.ndarray): bool [K, seats].
+        protected (numpy.ndarray): bool [K, seats].
+        current (numpy.ndarray): Seat whose turn it is in each game.
+        in_round (numpy.ndarray): Whether each game's round is still being played.
+        turns (numpy.ndarray): Turns played in each game's current round.
+        discards (numpy.ndarray): int16 [K, card codes]; face-up cards of each
+            game's current round, by card code.
+        scores (numpy.ndarray): int32 [K, seats]; favor tokens.
+        eliminations (numpy.ndarray): Eliminations caused by each card code, over
+            all games.
+    """
+
+    __slots__ = (
+        "size",
+        "num_players",
+        "policies",
+        "rng",
+        "composition",
+        "hands",
+        "deck",
+        "deck_len",
+        "burned",
+        "active",
+        "protected",
+        "current",
+        "in_round",
+        "turns",
+        "discards",
+        "scores",
+        "eliminations",
+    )
+
+    def __init__(
+        self,
+        size: int,
+        num_players: int,
+        policies: Sequence[BatchPolicy],
+        seed: Optional[int] = None,
+        deck: bytes = CLASSIC_DECK,
+    ):
+        if not 2 <= num_players <= len(deck) - 2:
+            raise ValueError("Invalid number of players")
+        if len(policies) != num_players:
+            raise ValueError("Exactly one policy per player is required")
+        self.size = size
+        self.num_players = num_players
+        self.policies = list(policies)
+        self.rng = np.random.default_rng(seed)
+        self.composition = np.frombuffer(bytes(deck), dtype=np.uint8)
+        self.hands = np.full((size, num_players, 2), NO_CARD, dtype=np.uint8)
+        self.deck = np.zeros((size, len(deck)), dtype=np.uint8)
+        self.deck_len = np.zeros(size, dtype=np.intp)
+        self.burned = np.full((size, 4), NO_CARD, dtype=np.uint8)
+        self.active = np.zeros((size, num_players), dtype=bool)
+        self.protected = np.zeros((size, num_players), dtype=bool)
+        self.current = np.zeros(size, dtype=np.intp)
+        self.in_round = np.zeros(size, dtype=bool)
+        self.turns = np.zeros(size, dtype=np.int32)
+        self.discards = np.zeros((size, len(CARD_NAMES)), dtype=np.int16)
+        self.scores = np.zeros((size, num_players), dtype=np.int32)
+        self.eliminations = np.zeros(len(CARD_NAMES), dtype=np.int64)
+
+    def _draw(self, games: np.ndarray) -> np.ndarray:
+        self.deck_len[games] -= 1
+        return self.deck[games, self.deck_len[games]]
+
+    def start_round(self, games: Optional[np.ndarray] = None, first_seat=0) -> None:
+        """
+        Shuffles, burns and deals a new round in some games, then starts the first
+        seat's turn, as `Engine.start_round` does.
+
+        Args:
+            games (Optional[numpy.ndarray]): Indices of the games; all by default.
+            first_seat: The first seat, one for all games or an array per game.
+        """
+        if games is None:
+            games = np.arange(self.size)
+        count = len(games)
+        first_seat = np.broadcast_to(np.asarray(first_seat, dtype=np.intp), (count,))
+        self.deck[games] = self.rng.permuted(np.tile(self.composition, (count, 1)), axis=1)
+        self.deck_len[games] = self.deck.shape[1]
+        self.burned[games] = NO_CARD
+        self.burned[games, 0] = self._draw(games)
+        if self.num_players == 2:
+            for slot in (1, 2, 3):
+                self.burned[games, slot] = self._draw(games)
+        self.hands[games] = NO_CARD
+        for seat in range(self.num_players):
+            self.hands[games, seat, 0] = self._draw(games)
+        self.hands[games, first_seat, 1] = self._draw(games)
+        self.active[games] = True
+        self.protected[games] = False
+        self.current[games] = first_seat
+        self.in_round[games] = True
+        self.turns[games] = 0
+        self.discards[games] = 0
+
+    def eliminate(self, games: np.ndarray, seats: np.ndarray, card: int) -> None:
+        """
+        Knocks seats out of their games' rounds; their hands are discarded face-up.
+
+        Args:
+            games (numpy.ndarray): Indices of the games.
+            seats (numpy.ndarray): The eliminated seat of each game.
+            card (int): The played card that caused the eliminations.
+        """
+        if not len(games):
+            return
+        self.eliminations[card] += len(games)
+        self.active[games, seats] = False
+        held = self.hands[games, seats, 0]
+        shown = held != NO_CARD
+        self.discards[games[shown], held[shown]] += 1
+        self.hands[games, seats] = NO_CARD
+
+    def play(self, games: np.ndarray, card_index: np.ndarray, target: np.ndarray, guess: np.ndarray) -> None:
+        """
+        Plays a card from the hand of the current seat of some games and resolves
+        the effects, like `Engine.play` does for one game.
+
+        Raises:
+            ValueError: If a move breaks the Countess rule.
+        """
+        hands = self.hands
+        seats = self.current[games]
+        card = hands[games, seats, card_index]
+        kept = hands[games, seats, 1 - card_index]
+        if np.any((kept == COUNTESS) & ((card == KING) | (card == PRINCE))):
+            raise ValueError("You must play the Countess when you have a King or Prince.")
+        hands[games, seats, 0] = kept
+        hands[games, seats, 1] = NO_CARD
+        self.discards[games, card] += 1
+
+        protect = card == HANDMAID
+        self.protected[games[protect], seats[protect]] = True
+        princess = card == PRINCESS
+        self.eliminate(games[princess], seats[princess], PRINCESS)
+
+        # Whether each targeted card has an effect, as in Engine.play
+        in_range = (target >= 0) & (target < self.num_players)
+        targets = np.where(in_range, target, 0)
+        valid = (
+            _TARGETED[card]
+            & in_range
+            & self.active[games, targets]
+            & np.where(targets == seats, card == PRINCE, ~self.protected[games, targets])
+        )
+        theirs = hands[games, targets, 0]
+
+        guard = valid & (card == GUARD) & (guess != CARD_VALUES[GUARD])
+        assassinated = guard & (theirs == ASSASSIN)
+        self.eliminate(games[assassinated], seats[assassinated], GUARD)
+        right = guard & ~assassinated & (VALUES[theirs] == guess)
+        self.eliminate(games[right], targets[right], GUARD)
+
+        baron = valid & (card == BARON)
+        mine_value = VALUES[kept]
+        theirs_value = VALUES[theirs]
+        won = baron & (mine_value > theirs_value)
+        self.eliminate(games[won], targets[won], BARON)
+        lost = baron & (mine_value < theirs_value)
+        self.eliminate(games[lost], seats[lost], BARON)
+
+        prince = valid & (card == PRINCE) & (self.deck_len[games] > 0)
+        princess = prince & (theirs == PRINCESS)
+        self.eliminate(games[princess], targets[princess], PRINCE)
+        redraw = prince & ~princess
+        redrawn = games[redraw]
+        self.discards[redrawn, theirs[redraw]] += 1
+        hands[redrawn, targets[redraw], 0] = self._draw(redrawn)
+
+        king = valid & (card == KING)
+        swapped = games[king]
+        hands[swapped, seats[king], 0] = theirs[king]
+        hands[swapped, targets[king], 0] = kept[king]
+
+    def _moves(self, games: np.ndarray) -> Moves:
+        seats = self.current[games]
+        card_index = np.empty(len(games), dtype=np.intp)
+        target = np.empty(len(games), dtype=np.intp)
+        guess = np.empty(len(games), dtype=np.float64)
+        by_policy: Dict[int, list] = {}
+        for seat, policy in enumerate(self.policies):
+            by_policy.setdefault(id(policy), [policy, []])[1].append(seat)
+        for policy, seat_list in by_policy.values():
+            if len(seat_list) == self.num_players:
+                chosen = slice(None)
+            else:
+                chosen = np.isin(seats, seat_list)
+            moves = policy(self, games[chosen])
+            card_index[chosen], target[chosen], guess[chosen] = moves
+        return card_index, target, guess
+
+    def step(self) -> int:
+        """
+        Plays one turn in every game still in its round, and hands each turn to
+        the next active seat, who draws a card.
+
+        Returns:
+            int: Number of games whose round continues.
+        """
+        games = np.flatnonzero(self.in_round)
+        if not len(games):
+            return 0
+        self.play(games, *self._moves(games))
+        self.turns[games] += 1
+        over = (self.deck_len[games] == 0) | (self.active[games].sum(axis=1) <= 1)
+        self.in_round[games[over]] = False
+        going = games[~over]
+        # The next active seat after the current one
+        n = self.num_players
+        candidates = (self.current[going, None] + np.arange(1, n + 1)) % n
+        first = np.argmax(self.active[going[:, None], candidates], axis=1)
+        seats = candidates[np.arange(len(going)), first]
+        self.protected[going, seats] = False
+        self.hands[going, seats, 1] = self._draw(going)
+        self.current[going] = seats
+        return len(going)
+
+    def winners(self, games: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Returns the winning seats of finished rounds, as `Engine.winners` does.
+
+        Returns:
+            numpy.ndarray: bool [games, seats]; True for every winner.
+        """
+        if games is None:
+            games = np.arange(self.size)
+        values = np.where(self.active[games], VALUES[self.hands[games, :, 0]], -2.0)
+        return values == values.max(axis=1, keepdims=True)
+
+    def play_round(self, games: Optional[np.ndarray] = None, first_seat=0) -> np.ndarray:
+        """
+        Plays a full round in some games and awards a favor token to each winner.
+
+        Returns:
+            numpy.ndarray: bool [games, seats]; True for every winner.
+        """
+        if games is None:
+            games = np.arange(self.size)
+        self.start_round(games, first_seat)
+        while self.step():
+            pass
+        winners = self.winners(games)
+        self.scores[games] += winners
+        return winners
+
+    def play_games(
+        self,
+        tokens: Optional[int] = None,
+        on_round_end: Optional[Callable[[np.ndarray, np.ndarray], None]] = None,
+    ) -> np.ndarray:
+        """
+        Plays every game until a seat holds the given number of favor tokens.
+
+        The rounds of all unfinished games are played in lockstep, and the first
+        winner of a round takes the first turn of the next one.
+
+        Args:
+            tokens (Optional[int]): Favor tokens needed to win; defaults to the
+                standard count for the number of players.
+            on_round_end (Optional[Callable]): Called with the indices of the games
+                and their winners after each round, while the arrays still hold it.
+
+        Returns:
+            numpy.ndarray: The seat that won each game.
+        """
+        if tokens is None:
+            tokens = TOKENS_TO_WIN.get(self.num_players, DEFAULT_TOKENS_TO_WIN)
+        self.scores[:] = 0
+        games = np.arange(self.size)
+        first_seat = np.zeros(self.size, dtype=np.intp)
+        while len(games):
+            winners = self.play_round(games, first_seat)
+            if on_round_end:
+                on_round_end(games, winners)
+            first_seat = np.argmax(winners, axis=1)
+            going = self.scores[games].max(axis=1) < tokens
+            games = games[going]
+            first_seat = first_seat[going]
+        return np.argmax(self.scores, axis=1)
+
+
+def _random_cards(engine: BatchEngine, games: np.ndarray) -> np.ndarray:
+    # A uniformly random card index that respects the Countess rule
+    hands = engine.hands[games, engine.current[games]]
+    card_index = (engine.rng.random(len(games)) < 0.5).astype(np.intp)
+    first, second = hands[:, 0], hands[:, 1]
+    card_index[(first == COUNTESS) & ((second == KING) | (second == PRINCE))] = 0
+    card_index[(second == COUNTESS) & ((first == KING) | (first == PRINCE))] = 1
+    return card_index
+
+
+def random_targets(engine: BatchEngine, games: np.ndarray, card_index: np.ndarray) -> np.ndarray:
+    """
+    Returns a uniformly random valid target of each game's played card, or -1 when
+    the card has no valid target or takes none.
+    """
+    seats = engine.current[games]
+    card = engine.hands[games, seats, card_index]
+    count = len(games)
+    rows = np.arange(count)
+    valid = engine.active[games] & ~engine.protected[games]
+    valid[rows, seats] = card == PRINCE
+    valid &= _TARGETED[card][:, None]
+    keys = np.where(valid, engine.rng.random((count, engine.num_players)), -1.0)
+    target = np.argmax(keys, axis=1)
+    return np.where(valid.any(axis=1), target, -1)
+
+
+def random_batch_policy(engine: BatchEngine, games: np.ndarray) -> Moves:
+    """
+    Plays a uniformly random card that respects the Countess rule, at a random
+    valid target, guessing a random non-Guard value; like `engine.Policy.random_policy`.
+    """
+    card_index = _random_cards(engine, games)
+    target = random_targets(engine, games, card_index)
+    guess = PRIEST + np.floor(engine.rng.random(len(games)) * (PRINCESS - GUARD))
+    return card_index, target, guess
+
+
+class TablePolicy:
+    """
+    A batch policy read from lookup tables: which card to play for every pair of
+    cards in hand, and which value a Guard names for every card kept. Targets are
+    random valid ones.
+
+    Attributes:
+        play_table (numpy.ndarray): [256, 256] card index to play, by (first, second) card.
+        guess_table (numpy.ndarray): [256] Guard guess, by the card kept.
+    """
+
+    __slots__ = ("play_table", "guess_table")
+
+    def __init__(self, play_table: np.ndarray, guess_table: np.ndarray):
+        self.play_table = play_table
+        self.guess_table = guess_table
+
+    @classmethod
+    def from_priority(cls, keep: Sequence[float], guess: Sequence[float]) -> "TablePolicy":
+        """
+        Builds the tables of a policy that keeps the card with the higher `keep`
+        score, respecting the Countess rule.
+
+        Args:
+            keep (Sequence[float]): Keep score of each card code.
+            guess (Sequence[float]): Guard guess for each card code kept.
+        """
+        scores = np.full(256, -np.inf)
+        scores[: len(keep)] = keep
+        first = np.arange(256)[:, None]
+        second = np.arange(256)[None, :]
+        play_table = (scores[second] < scores[first]).astype(np.intp)
+        play_table[COUNTESS, [KING, PRINCE]] = 0
+        play_table[[KING, PRINCE], COUNTESS] = 1
+        guess_table = np.full(256, float(PRIEST))
+        guess_table[: len(guess)] = guess
+        return cls(play_table, guess_table)
+
+    def __call__(self, engine: BatchEngine, games: np.ndarray) -> Moves:
+        hands = engine.hands[games, engine.current[games]]
+        card_index = self.play_table[hands[:, 0], hands[:, 1]]
+        kept = hands[np.arange(len(games)), 1 - card_index]
+        return card_index, random_targets(engine, games, card_index), self.guess_table[kept]
+
+
+# Keeps the higher card; a Guard names the most common card it does not hold
+# (Priest, or Baron when it holds a Priest)
+keep_high_policy = TablePolicy.from_priority(
+    CARD_VALUES[: PRINCESS + 1],
+    [PRIEST, PRIEST, CARD_VALUES[BARON]] + [PRIEST] * (PRINCESS - PRIEST),
+)
+
+BATCH_POLICIES: Dict[str, BatchPolicy] = {
+    "random": random_batch_policy,
+    "keep-high": keep_high_policy,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play Love Letter games in lockstep with NumPy.")
+    parser.add_argument("--games", type=int, default=1_000_000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--policies", nargs="+", default=["random"], help="One name, or one per seat.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    names = args.policies * args.players if len(args.policies) == 1 else args.policies
+    game_wins = np.zeros(args.players, dtype=np.int64)
+    round_wins = np.zeros(args.players, dtype=np.int64)
+    eliminations = np.zeros(len(CARD_NAMES), dtype=np.int64)
+    rounds = 0
+    started = time.perf_counter()
+    for batch, start in enumerate(range(0, args.games, args.batch_size)):
+        size = min(args.batch_size, args.games - start)
+        engine = BatchEngine(size, args.players, [BATCH_POLICIES[name] for name in names], seed=(args.seed, batch))
+
+        def count_round(games: np.ndarray, winners: np.ndarray) -> None:
+            global rounds
+            rounds += len(games)
+            round_wins[:] += winners.sum(axis=0)
+
+        game_wins += np.bincount(engine.play_games(on_round_end=count_round), minlength=args.players)
+        eliminations += engine.eliminations
+    elapsed = time.perf_counter() - started
+    print(
+        json.dumps(
+            {
+                "policies": names,
+                "games": args.games,
+                "rounds": rounds,
+                "seconds": round(elapsed, 3),
+                "rounds_per_second": round(rounds / elapsed),
+                "game_wins": game_wins.tolist(),
+                "round_wins": round_wins.tolist(),
+                "eliminations": {CARD_NAMES[code]: int(count) for code, count in enumerate(eliminations) if count},
+            },
+            indent=2,
+        )
+    )
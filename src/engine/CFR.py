@@ -0,0 +1,568 @@
+# cfr.py
+"""
+Monte Carlo counterfactual regret minimization (outcome sampling) for the
+two-player game, and a bot that plays the trained strategy.
+
+Information sets are abstracted to what a seat sees when it moves: its two cards,
+the multiset of face-up cards (the discard pile and the face-up burned cards), the
+opponent's card if the seat knows it (from a Priest or a King swap, as tracked by
+`engine.Knowledge`) and whether the opponent is protected. The card effects are the
+engine's, which mirror the `card` package.
+
+Moves in a two-player game only ever aim at the opponent or, for a Prince, at
+yourself, so each move is one entry of a fixed action table built from the deck:
+(card code, target kind, guess).
+
+Training runs in batches. Every batch plays fixed chunks of iterations in worker
+processes against a snapshot of the current strategy, and the chunks' regret and
+strategy-sum updates are merged in chunk order, so the result depends only on the
+arguments and not on the number of workers.
+
+The trained average strategy is saved as a compact file: sorted 64-bit info set
+keys followed by one byte per action and info set. `StrategyTable` maps each key
+to its row once at load time, so a lookup is one dict access.
+
+Usage:
+    python -m engine.CFR --iterations 1000000 --out strategy.bin [--workers 4]
+"""
+
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from card.CardTable import (
+    CARD_VALUES,
+    CLASSIC_DECK,
+    COUNTESS,
+    GUARD,
+    KING,
+    NO_CARD,
+    PRINCE,
+    TARGETED_CARDS,
+)
+from engine.Actions import guess_values
+from engine.Engine import Engine
+from engine.Knowledge import KnowledgeTracker
+from engine.RoundState import RoundState
+
+# Target kinds of an action
+NO_TARGET, OPPONENT, SELF = -1, 0, 1
+
+DEFAULT_EPSILON = 0.6
+DEFAULT_BATCH_SIZE = 20000
+DEFAULT_CHUNK_SIZE = 5000
+
+MAGIC = b"LLCF"
+VERSION = 1
+# magic, version, action count, info set count, composition length
+HEADER = struct.Struct("<4sHHIH")
+
+# (card code, target kind, guess or -1)
+Action = Tuple[int, int, int]
+
+_CODE_BASE = len(CARD_VALUES) + 1
+_UNKNOWN = len(CARD_VALUES)
+
+
+class Abstraction:
+    """
+    Information set keys and the action table of a deck, for two players.
+
+    Attributes:
+        composition (bytes): Card codes of the full deck.
+        actions (Tuple[Action, ...]): Every action, indexed by action id.
+    """
+
+    __slots__ = ("composition", "actions", "_action_ids", "_radix", "_legal")
+
+    def __init__(self, composition: bytes = CLASSIC_DECK):
+        self.composition = bytes(composition)
+        codes = sorted(set(composition))
+        actions: List[Action] = []
+        guesses = guess_values(composition)
+        for card in codes:
+            if card == GUARD:
+                actions.extend((card, OPPONENT, guess) for guess in guesses)
+                actions.append((card, NO_TARGET, -1))
+            elif card == PRINCE:
+                actions.extend(((card, OPPONENT, -1), (card, SELF, -1)))
+            elif card in TARGETED_CARDS:
+                actions.extend(((card, OPPONENT, -1), (card, NO_TARGET, -1)))
+            else:
+                actions.append((card, NO_TARGET, -1))
+        self.actions = tuple(actions)
+        self._action_ids = {action: index for index, action in enumerate(actions)}
+        # Mixed radix of the face-up counts: one digit per card code
+        self._radix = [0] * len(CARD_VALUES)
+        place = 1
+        for card in codes:
+            self._radix[card] = place
+            place *= composition.count(card) + 1
+        self._legal: Dict[int, Tuple[int, ...]] = {}
+
+    def key(self, state: RoundState, seat: int, knowledge: Optional[KnowledgeTracker] = None) -> int:
+        """
+        Returns the information set key of a seat about to move.
+
+        Args:
+            state (RoundState): The round; only what the seat can see is used.
+            seat (int): The seat to move; it must hold two cards.
+            knowledge (Optional[KnowledgeTracker]): What the seat learnt earlier in
+                the round; without it the opponent's card counts as unknown.
+        """
+        radix = self._radix
+        seen = 0
+        for card in state.discard_pile:
+            seen += radix[card]
+        for card in state.burned[1:]:
+            seen += radix[card]
+        opponent = 1 - seat
+        known = knowledge.known[opponent] if knowledge is not None else NO_CARD
+        if known == NO_CARD:
+            known = _UNKNOWN
+        first = state.hands[2 * seat]
+        second = state.hands[2 * seat + 1]
+        low, high = (first, second) if first <= second else (second, first)
+        protected = state.protected >> opponent & 1
+        return (((seen * _CODE_BASE + known) * 2 + protected) * _CODE_BASE + low) * _CODE_BASE + high
+
+    def legal(self, key: int) -> Tuple[int, ...]:
+        """Returns the ids of the actions legal in an information set."""
+        hand = key % (_CODE_BASE * _CODE_BASE * 2)
+        legal = self._legal.get(hand)
+        if legal is None:
+            high = hand % _CODE_BASE
+            low = hand // _CODE_BASE % _CODE_BASE
+            protected = hand // (_CODE_BASE * _CODE_BASE)
+            legal = self._legal[hand] = self._legal_ids(low, high, protected)
+        return legal
+
+    def _legal_ids(self, low: int, high: int, protected: int) -> Tuple[int, ...]:
+        legal: List[int] = []
+        for card, other in ((low, high), (high, low)):
+            if card == other and legal:
+                break
+            if other == COUNTESS and (card == KING or card == PRINCE):
+                continue
+            for index, (action_card, kind, _) in enumerate(self.actions):
+                if action_card != card:
+                    continue
+                if card not in TARGETED_CARDS or kind == SELF or (kind == NO_TARGET) == bool(protected):
+                    legal.append(index)
+        return tuple(sorted(set(legal)))
+
+    def move(self, state: RoundState, seat: int, action: int) -> Tuple[int, int, int]:
+        """Returns an action as (card index, target, guess) for `Engine.play`."""
+        card, kind, guess = self.actions[action]
+        card_index = 0 if state.hands[2 * seat] == card else 1
+        target = 1 - seat if kind == OPPONENT else seat if kind == SELF else -1
+        return card_index, target, guess
+
+
+class _Trackers:
+    # Feeds every action to the knowledge trackers of both seats
+    __slots__ = ("trackers",)
+
+    def __init__(self, trackers: Sequence[KnowledgeTracker]):
+        self.trackers = trackers
+
+    def record_action(self, seat, card, kept, target, target_card, guess, outcome, deck_count) -> None:
+        for tracker in self.trackers:
+            tracker.observe_action(seat, card, kept, target, target_card, guess, outcome)
+
+    def record_round(self, engine, first_seat, winners) -> None:
+        pass
+
+
+class _ActionLog:
+    # Keeps the actions an engine reports for a CFRBot, passing them on to the recorder it replaced
+    __slots__ = ("inner", "actions")
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.actions: List[tuple] = []
+
+    def record_action(self, *action) -> None:
+        self.actions.append(action)
+        if self.inner is not None:
+            self.inner.record_action(*action)
+
+    def record_round(self, engine, first_seat, winners) -> None:
+        if self.inner is not None:
+            self.inner.record_round(engine, first_seat, winners)
+
+
+def _run_chunk(job: tuple) -> Tuple[List[int], list, list]:
+    seed, batch, chunk, iterations, composition, epsilon, keys, sigma = job
+    rng = random.Random(f"cfr/{seed}/{batch}/{chunk}")
+    uniform = rng.random
+    abstraction = Abstraction(composition)
+    width = len(abstraction.actions)
+    rows = {key: row for row, key in enumerate(keys.tolist())}
+    regrets: Dict[int, List[float]] = {}
+    sums: Dict[int, List[float]] = {}
+    engine = Engine(2, [None, None], rng, composition)
+
+    for iteration in range(iterations):
+        traverser = iteration & 1
+        engine.start_round(int(uniform() * 2))
+        state = engine.state
+        face_up = state.burned[1:]
+        trackers = [KnowledgeTracker(seat, 2, composition, face_up) for seat in (0, 1)]
+        engine.recorder = _Trackers(trackers)
+        reach = [1.0, 1.0]
+        sampled = 1.0
+        path = []
+        ongoing = True
+        while ongoing:
+            seat = state.current
+            tracker = trackers[seat]
+            tracker.sync_hand(state.hand(seat))
+            key = abstraction.key(state, seat, tracker)
+            legal = abstraction.legal(key)
+            row = rows.get(key)
+            if row is None:
+                strategy = [1.0 / len(legal)] * len(legal)
+            else:
+                snapshot = sigma[row]
+                strategy = [float(snapshot[action]) for action in legal]
+            if seat == traverser:
+                explore = epsilon / len(legal)
+                weights = [explore + (1.0 - epsilon) * p for p in strategy]
+            else:
+                weights = strategy
+                # Stochastically weighted average strategy of the other seat
+                total = sums.get(key)
+                if total is None:
+                    total = sums[key] = [0.0] * width
+                weight = reach[seat] / sampled
+                for action, p in zip(legal, strategy):
+                    total[action] += weight * p
+            pick = uniform()
+            choice = len(legal) - 1
+            for index, weight in enumerate(weights):
+                pick -= weight
+                if pick < 0:
+                    choice = index
+                    break
+            path.append((key, seat, legal, strategy, choice, reach[1 - seat]))
+            reach[seat] *= strategy[choice]
+            sampled *= weights[choice]
+            ongoing = engine.take_turn(*abstraction.move(state, seat, legal[choice]))
+
+        winners = engine.winners()
+        utility = (traverser in winners) - ((1 - traverser) in winners)
+        tail = 1.0
+        for key, seat, legal, strategy, choice, opponent_reach in reversed(path):
+            p = strategy[choice]
+            if seat == traverser and utility:
+                regret = regrets.get(key)
+                if regret is None:
+                    regret = regrets[key] = [0.0] * width
+                value = utility * opponent_reach / sampled * tail
+                for index, action in enumerate(legal):
+                    regret[action] += value * (1.0 - p) if index == choice else -value * p
+            tail *= p
+
+    touched = sorted(regrets.keys() | sums.keys())
+    zero = [0.0] * width
+    return (
+        touched,
+        [regrets.get(key, zero) for key in touched],
+        [sums.get(key, zero) for key in touched],
+    )
+
+
+class CFRTrainer:
+    """
+    Outcome-sampling MCCFR over the abstracted two-player game.
+
+    Attributes:
+        abstraction (Abstraction): Information set keys and actions of the deck.
+        epsilon (float): Exploration of the traversing seat.
+        iterations (int): Iterations trained so far.
+        regrets (numpy.ndarray): Cumulative regret of each info set row and action.
+        strategy_sums (numpy.ndarray): Cumulative strategy of each info set row and action.
+    """
+
+    __slots__ = ("abstraction", "epsilon", "iterations", "regrets", "strategy_sums", "_keys", "_rows", "_legal")
+
+    def __init__(self, composition: bytes = CLASSIC_DECK, epsilon: float = DEFAULT_EPSILON):
+        self.abstraction = Abstraction(composition)
+        self.epsilon = epsilon
+        self.iterations = 0
+        width = len(self.abstraction.actions)
+        self.regrets = np.zeros((0, width))
+        self.strategy_sums = np.zeros((0, width))
+        self._legal = np.zeros((0, width), dtype=bool)
+        self._keys: List[int] = []
+        self._rows: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _grow(self, keys: Sequence[int]) -> List[int]:
+        rows = self._rows
+        new = [key for key in keys if key not in rows]
+        if new:
+            width = len(self.abstraction.actions)
+            legal = np.zeros((len(new), width), dtype=bool)
+            for index, key in enumerate(new):
+                rows[key] = len(self._keys)
+                self._keys.append(key)
+                legal[index, list(self.abstraction.legal(key))] = True
+            self.regrets = np.vstack((self.regrets, np.zeros((len(new), width))))
+            self.strategy_sums = np.vstack((self.strategy_sums, np.zeros((len(new), width))))
+            self._legal = np.vstack((self._legal, legal))
+        return [rows[key] for key in keys]
+
+    def _normalize(self, weights):
+        # Rows without weight fall back to uniform over their legal actions
+        legal = self._legal
+        totals = weights.sum(axis=1, keepdims=True)
+        uniform = legal / np.maximum(legal.sum(axis=1, keepdims=True), 1)
+        return np.where(totals > 0, weights / np.where(totals > 0, totals, 1), uniform)
+
+    def current_strategy(self):
+        """Returns the regret-matching strategy of every info set row."""
+        return self._normalize(np.maximum(self.regrets, 0) * self._legal)
+
+    def average_strategy(self):
+        """Returns the average strategy of every info set row; it converges to equilibrium."""
+        return self._normalize(self.strategy_sums * self._legal)
+
+    def train(
+        self,
+        iterations: int,
+        workers: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        seed: int = 0,
+        on_batch=None,
+    ) -> None:
+        """
+        Trains for a number of iterations.
+
+        Args:
+            iterations (int): Iterations to run; each samples one round.
+            workers (Optional[int]): Number of worker processes; defaults to the CPU
+                count. One worker runs in the calling process.
+            batch_size (int): Iterations played against one strategy snapshot.
+            chunk_size (int): Iterations per unit of work.
+            seed (int): Master seed; equal arguments give equal tables.
+            on_batch (Optional[Callable[[CFRTrainer], None]]): Called after each batch.
+        """
+        workers = workers or os.cpu_count() or 1
+        composition = self.abstraction.composition
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            done = 0
+            while done < iterations:
+                batch = self.iterations // batch_size
+                size = min(batch_size, iterations - done)
+                keys = np.array(self._keys, dtype=np.uint64)
+                sigma = self.current_strategy().astype(np.float32)
+                jobs = [
+                    (seed, batch, chunk, min(chunk_size, size - start), composition, self.epsilon, keys, sigma)
+                    for chunk, start in enumerate(range(0, size, chunk_size))
+                ]
+                results = executor.map(_run_chunk, jobs) if executor else map(_run_chunk, jobs)
+                # map() yields in submission order, so merging is deterministic.
+                for touched, regrets, sums in results:
+                    rows = self._grow(touched)
+                    self.regrets[rows] += np.array(regrets)
+                    self.strategy_sums[rows] += np.array(sums)
+                done += size
+                self.iterations += size
+                if on_batch:
+                    on_batch(self)
+        finally:
+            if executor:
+                executor.shutdown()
+
+    def save(self, path: str) -> None:
+        """Writes the average strategy as a compact strategy file."""
+        keys = np.array(self._keys, dtype=np.uint64)
+        order = np.argsort(keys)
+        strategy = self.average_strategy()[order]
+        # One byte per action; every legal action keeps a nonzero weight
+        quantized = np.round(strategy * 254).astype(np.uint8) + self._legal[order]
+        composition = self.abstraction.composition
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, strategy.shape[1], len(keys), len(composition)))
+            file.write(composition)
+            file.write(keys[order].astype("<u8").tobytes())
+            file.write(quantized.tobytes())
+
+
+class StrategyTable:
+    """
+    A trained strategy loaded from a strategy file.
+
+    Attributes:
+        abstraction (Abstraction): Information set keys and actions of the deck.
+    """
+
+    __slots__ = ("abstraction", "_width", "_weights", "_rows")
+
+    def __init__(self, abstraction: Abstraction, keys: Sequence[int], weights: bytes):
+        self.abstraction = abstraction
+        self._width = len(abstraction.actions)
+        self._weights = weights
+        self._rows = {key: row * self._width for row, key in enumerate(keys)}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @classmethod
+    def load(cls, path: str) -> "StrategyTable":
+        """
+        Reads a strategy file written by `CFRTrainer.save`.
+
+        Raises:
+            ValueError: If the file is not a strategy file of this version.
+        """
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, version, width, count, length = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a strategy file: {path}")
+        offset = HEADER.size
+        abstraction = Abstraction(data[offset : offset + length])
+        offset += length
+        if width != len(abstraction.actions) or len(data) != offset + count * (8 + width):
+            raise ValueError(f"Corrupt strategy file: {path}")
+        keys = array("Q", data[offset : offset + 8 * count])
+        if sys.byteorder == "big":
+            keys.byteswap()
+        return cls(abstraction, keys, data[offset + 8 * count :])
+
+    def policy(self, key: int) -> Optional[Dict[int, float]]:
+        """Returns the action id weights of an info set, or None if it was never trained."""
+        start = self._rows.get(key)
+        if start is None:
+            return None
+        weights = self._weights
+        return {action: weights[start + action] for action in self.abstraction.legal(key)}
+
+
+class CFRBot:
+    """
+    Plays a two-player seat from a `StrategyTable`; use it wherever a `Policy` is
+    expected, or in a `game.Bot.GameBot`.
+
+    Untrained info sets are played uniformly at random.
+
+    Info sets are keyed with what the seat knows, as in training. As a `Policy`,
+    the bot puts itself in front of the engine's recorder to see every action, and
+    keeps a knowledge tracker per seat; in a round it joins after the first turn,
+    it plays without knowledge until the next round.
+
+    Attributes:
+        table (StrategyTable): The trained strategy.
+    """
+
+    __slots__ = ("table", "_trackers")
+
+    def __init__(self, table: StrategyTable):
+        self.table = table
+        # (round state, tracker, actions observed) by seat, for the engine being played
+        self._trackers: Dict[int, Tuple[RoundState, KnowledgeTracker, int]] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "CFRBot":
+        """Returns a bot playing the strategy file at a path."""
+        return cls(StrategyTable.load(path))
+
+    def __call__(self, engine: Engine, seat: int) -> Tuple[int, int, int]:
+        return self.choose(engine.state, seat, engine.composition, engine.rng, self._knowledge(engine, seat))
+
+    def _knowledge(self, engine: Engine, seat: int) -> Optional[KnowledgeTracker]:
+        """Returns the seat's tracker for the engine's round, fed every action so far."""
+        state = engine.state
+        log = engine.recorder
+        if not isinstance(log, _ActionLog):
+            log = engine.recorder = _ActionLog(log)
+        actions = log.actions
+        # Every action is a turn: the last `turns` ones are the current round's
+        if len(actions) < state.turns:
+            return None
+        del actions[: len(actions) - state.turns]
+        entry = self._trackers.get(seat)
+        if entry is None or entry[0] is not state:
+            entry = (state, KnowledgeTracker(seat, 2, engine.composition, state.burned[1:]), 0)
+        _, tracker, observed = entry
+        for action in actions[observed:]:
+            tracker.record_action(*action)
+        self._trackers[seat] = (state, tracker, len(actions))
+        return tracker
+
+    def choose(
+        self,
+        state: RoundState,
+        seat: int,
+        composition: bytes = CLASSIC_DECK,
+        rng: Optional[random.Random] = None,
+        knowledge: Optional[KnowledgeTracker] = None,
+    ) -> Tuple[int, int, int]:
+        """
+        Picks the move of the seat whose turn it is.
+
+        Args:
+            state (RoundState): The round; only what the seat can see is used.
+            seat (int): The seat to move; it must hold two cards.
+            composition (bytes): Card codes of the full deck; unused, the table
+                knows its deck.
+            rng (Optional[random.Random]): Random source for mixed strategies.
+            knowledge (Optional[KnowledgeTracker]): What the seat learnt earlier in
+                the round.
+
+        Returns:
+            Tuple[int, int, int]: (played card index, target seat, guessed value),
+                with -1 for no target or guess.
+
+        Raises:
+            ValueError: If the game does not have two players.
+        """
+        if state.num_players != 2:
+            raise ValueError("CFR strategies are for two players")
+        rng = rng if rng else random.Random()
+        abstraction = self.table.abstraction
+        if knowledge is not None:
+            knowledge.sync_hand(state.hand(seat))
+        key = abstraction.key(state, seat, knowledge)
+        weights = self.table.policy(key)
+        if weights is None:
+            weights = dict.fromkeys(abstraction.legal(key), 1)
+        pick = rng.random() * sum(weights.values())
+        for action, weight in weights.items():
+            pick -= weight
+            if pick < 0:
+                break
+        return abstraction.move(state, seat, action)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a two-player strategy with MCCFR.")
+    parser.add_argument("--iterations", type=int, default=1000000)
+    parser.add_argument("--out", required=True, help="Path of the strategy file to write.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+
+    def report(trainer: CFRTrainer) -> None:
+        elapsed = time.perf_counter() - started
+        print(f"{trainer.iterations} iterations, {len(trainer)} info sets, {elapsed:.1f}s")
+
+    trainer = CFRTrainer()
+    trainer.train(args.iterations, workers=args.workers, batch_size=args.batch_size, seed=args.seed, on_batch=report)
+    trainer.save(args.out)
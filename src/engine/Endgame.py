@@ -0,0 +1,352 @@
+# endgame.py
+"""
+Exact endgame solver for rounds with only a few cards left in the draw pile.
+
+The solver plays the rest of the round with perfect information: every hand is
+known and the draw pile is known as a multiset, so each draw is a chance node
+over the remaining cards. Each seat maximizes its own chance of winning the round
+(expectimax over a vector of win probabilities, ties split evenly).
+
+Positions are identified by a Zobrist hash of the hands (as multisets), the draw
+pile multiset, the active and protected seats, the seat to move and the number of
+seats, and solved positions are kept in a bounded LRU transposition table. The
+same solver object can be reused across games, so positions that recur are looked
+up, not re-solved.
+"""
+
+import random
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from card.CardTable import (
+    ASSASSIN,
+    BARON,
+    CARD_VALUES,
+    COUNTESS,
+    GUARD,
+    HANDMAID,
+    KING,
+    NO_CARD,
+    PRINCE,
+    PRINCESS,
+    TARGETED_CARDS,
+)
+from engine.Engine import Engine, Policy
+from engine.RoundState import MAX_PLAYERS, RoundState
+
+DEFAULT_TABLE_SIZE = 200_000
+DEFAULT_DEPTH = 3
+
+_CARD_COUNT = len(CARD_VALUES)
+_MAX_COPIES = 16
+
+# Fixed seed: equal positions hash equally in every process
+_keys = random.Random(0x1E77E4)
+
+
+def _key() -> int:
+    return _keys.getrandbits(64)
+
+
+_HAND_KEYS = [[[_key() for _ in range(2)] for _ in range(_CARD_COUNT)] for _ in range(MAX_PLAYERS)]
+_DECK_KEYS = [[_key() for _ in range(_MAX_COPIES + 1)] for _ in range(_CARD_COUNT)]
+_ACTIVE_KEYS = [_key() for _ in range(MAX_PLAYERS)]
+_PROTECTED_KEYS = [_key() for _ in range(MAX_PLAYERS)]
+_CURRENT_KEYS = [_key() for _ in range(MAX_PLAYERS)]
+_PLAYERS_KEYS = [_key() for _ in range(MAX_PLAYERS + 1)]
+
+# (card code, target seat or -1, guess or -1)
+Move = Tuple[int, int, int]
+Values = Tuple[float, ...]
+
+
+class EndgameSolver:
+    """
+    Perfect-information expectimax solver with a Zobrist-keyed LRU transposition table.
+
+    Attributes:
+        max_entries (int): Capacity of the transposition table.
+        hits (int): Lookups answered by the table.
+        misses (int): Positions solved.
+    """
+
+    __slots__ = ("max_entries", "hits", "misses", "_table")
+
+    def __init__(self, max_entries: int = DEFAULT_TABLE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._table: "OrderedDict[int, Tuple[Values, Optional[Move]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def clear(self) -> None:
+        """Empties the transposition table."""
+        self._table.clear()
+
+    def solve(self, state: RoundState) -> Tuple[Values, Optional[Move]]:
+        """
+        Solves the rest of a round from the turn of `state.current`.
+
+        Args:
+            state (RoundState): A round in progress; the seat to move holds two cards.
+
+        Returns:
+            Tuple[Values, Optional[Move]]: Every seat's chance of winning the round
+                with best play, and the best move of the seat to move as
+                (card code, target seat or -1, guess or -1).
+        """
+        deck = [0] * _CARD_COUNT
+        deck_key = 0
+        for card in state.deck:
+            deck[card] += 1
+        for card, count in enumerate(deck):
+            deck_key ^= _DECK_KEYS[card][count]
+        return self._solve(
+            state.num_players, bytes(state.hands), deck, deck_key, state.active, state.protected, state.current
+        )
+
+    def best_move(self, state: RoundState) -> Tuple[int, int, int]:
+        """Returns the best move of the seat to move, as (card index, target, guess) for `Engine.play`."""
+        move = self.solve(state)[1]
+        seat = state.current
+        card, target, guess = move
+        return (0 if state.hands[2 * seat] == card else 1), target, guess
+
+    def _solve(
+        self,
+        n: int,
+        hands: bytes,
+        deck: List[int],
+        deck_key: int,
+        active: int,
+        protected: int,
+        current: int,
+    ) -> Tuple[Values, Optional[Move]]:
+        key = deck_key ^ _CURRENT_KEYS[current] ^ _PLAYERS_KEYS[n]
+        for seat in range(n):
+            if active >> seat & 1:
+                key ^= _ACTIVE_KEYS[seat]
+                if protected >> seat & 1:
+                    key ^= _PROTECTED_KEYS[seat]
+                first = hands[2 * seat]
+                second = hands[2 * seat + 1]
+                if first != NO_CARD:
+                    key ^= _HAND_KEYS[seat][first][0]
+                if second != NO_CARD:
+                    key ^= _HAND_KEYS[seat][second][1 if second == first else 0]
+        table = self._table
+        entry = table.get(key)
+        if entry is not None:
+            table.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+
+        best: Optional[Values] = None
+        best_move: Optional[Move] = None
+        for move in _moves(n, hands, active, protected, current):
+            values = [0.0] * n
+            for probability, after, after_deck, after_key, after_active, after_protected in _resolve(
+                n, hands, deck, deck_key, active, protected, current, move
+            ):
+                outcome = self._continue(n, after, after_deck, after_key, after_active, after_protected, current)
+                for seat in range(n):
+                    values[seat] += probability * outcome[seat]
+            if best is None or values[current] > best[current]:
+                best = tuple(values)
+                best_move = move
+
+        entry = (best, best_move)
+        table[key] = entry
+        if len(table) > self.max_entries:
+            table.popitem(last=False)
+        return entry
+
+    def _continue(
+        self,
+        n: int,
+        hands: bytearray,
+        deck: List[int],
+        deck_key: int,
+        active: int,
+        protected: int,
+        seat: int,
+    ) -> Values:
+        # After a move: score the round if it is over, else average over the next draw
+        remaining = sum(deck)
+        if not remaining or active & (active - 1) == 0:
+            return _score(n, hands, active)
+        seat = (seat + 1) % n
+        while not active >> seat & 1:
+            seat = (seat + 1) % n
+        protected &= ~(1 << seat)
+        values = [0.0] * n
+        for card, count in enumerate(deck):
+            if not count:
+                continue
+            drawn = bytearray(hands)
+            drawn[2 * seat + 1] = card
+            deck[card] = count - 1
+            outcome = self._solve(
+                n,
+                bytes(drawn),
+                deck,
+                deck_key ^ _DECK_KEYS[card][count] ^ _DECK_KEYS[card][count - 1],
+                active,
+                protected,
+                seat,
+            )[0]
+            deck[card] = count
+            probability = count / remaining
+            for other in range(n):
+                values[other] += probability * outcome[other]
+        return tuple(values)
+
+    def __call__(self, engine: Engine, seat: int) -> Tuple[int, int, int]:
+        return self.best_move(engine.state)
+
+
+def _score(n: int, hands: bytes, active: int) -> Values:
+    contenders = [seat for seat in range(n) if active >> seat & 1]
+    if len(contenders) > 1:
+        best = max(CARD_VALUES[hands[2 * seat]] for seat in contenders)
+        contenders = [seat for seat in contenders if CARD_VALUES[hands[2 * seat]] == best]
+    share = 1.0 / len(contenders)
+    values = [0.0] * n
+    for seat in contenders:
+        values[seat] = share
+    return tuple(values)
+
+
+def _moves(n: int, hands: bytes, active: int, protected: int, seat: int) -> List[Move]:
+    # Like ActionIndex.keyed_moves, but a Guard names the target's value and one wrong
+    # value only: every wrong guess has the same effect
+    first = hands[2 * seat]
+    second = hands[2 * seat + 1]
+    targets = active & ~protected & ~(1 << seat)
+    moves: List[Move] = []
+    for card, other in ((first, second), (second, first)):
+        if card == other and moves:
+            break
+        if other == COUNTESS and (card == KING or card == PRINCE):
+            continue
+        if card not in TARGETED_CARDS:
+            moves.append((card, -1, -1))
+            continue
+        mask = targets | 1 << seat if card == PRINCE else targets
+        seats = [target for target in range(n) if mask >> target & 1]
+        if not seats:
+            moves.append((card, -1, -1))
+        elif card == GUARD:
+            for target in seats:
+                value = CARD_VALUES[hands[2 * target]]
+                wrong = 2 if value != 2 else 3
+                moves.append((card, target, wrong))
+                if value != CARD_VALUES[GUARD]:
+                    moves.append((card, target, value))
+        else:
+            moves.extend((card, target, -1) for target in seats)
+    return moves
+
+
+def _resolve(
+    n: int,
+    hands: bytes,
+    deck: List[int],
+    deck_key: int,
+    active: int,
+    protected: int,
+    seat: int,
+    move: Move,
+) -> List[tuple]:
+    # The outcomes of a move, as (probability, hands, deck, deck key, active, protected);
+    # the same rules as Engine.play
+    card, target, guess = move
+    after = bytearray(hands)
+    mine = 2 * seat
+    kept = after[mine + 1] if after[mine] == card else after[mine]
+    after[mine] = kept
+    after[mine + 1] = NO_CARD
+
+    def eliminate(loser: int) -> None:
+        nonlocal active
+        active &= ~(1 << loser)
+        after[2 * loser] = NO_CARD
+
+    if card not in TARGETED_CARDS:
+        if card == HANDMAID:
+            protected |= 1 << seat
+        elif card == PRINCESS:
+            eliminate(seat)
+        return [(1.0, after, deck, deck_key, active, protected)]
+    if target < 0 or not active >> target & 1 or (target != seat and protected >> target & 1):
+        return [(1.0, after, deck, deck_key, active, protected)]
+
+    theirs = 2 * target
+    if card == GUARD:
+        if guess != GUARD:
+            if after[theirs] == ASSASSIN:
+                eliminate(seat)
+            elif CARD_VALUES[after[theirs]] == guess:
+                eliminate(target)
+    elif card == BARON:
+        mine_value = CARD_VALUES[kept]
+        theirs_value = CARD_VALUES[after[theirs]]
+        if mine_value > theirs_value:
+            eliminate(target)
+        elif mine_value < theirs_value:
+            eliminate(seat)
+    elif card == PRINCE:
+        remaining = sum(deck)
+        if remaining:
+            if after[theirs] == PRINCESS:
+                eliminate(target)
+            else:
+                outcomes = []
+                for drawn, count in enumerate(deck):
+                    if not count:
+                        continue
+                    redrawn = bytearray(after)
+                    redrawn[theirs] = drawn
+                    less = list(deck)
+                    less[drawn] = count - 1
+                    outcomes.append(
+                        (
+                            count / remaining,
+                            redrawn,
+                            less,
+                            deck_key ^ _DECK_KEYS[drawn][count] ^ _DECK_KEYS[drawn][count - 1],
+                            active,
+                            protected,
+                        )
+                    )
+                return outcomes
+    elif card == KING:
+        after[mine], after[theirs] = after[theirs], after[mine]
+    return [(1.0, after, deck, deck_key, active, protected)]
+
+
+class EndgamePolicy:
+    """
+    A policy that plays the solver's move once the draw pile is small enough, and
+    another policy before that. The solver sees every hand, so this is a model of
+    perfect endgame play for balance studies, not a fair opponent.
+
+    Attributes:
+        solver (EndgameSolver): The solver, shared by every game the policy plays.
+        depth (int): Largest draw pile size solved exactly.
+        fallback (Policy): The policy used earlier in the round.
+    """
+
+    __slots__ = ("solver", "depth", "fallback")
+
+    def __init__(self, fallback: Policy, depth: int = DEFAULT_DEPTH, solver: Optional[EndgameSolver] = None):
+        self.solver = solver if solver else EndgameSolver()
+        self.depth = depth
+        self.fallback = fallback
+
+    def __call__(self, engine: Engine, seat: int) -> Tuple[int, int, int]:
+        if len(engine.state.deck) <= self.depth:
+            return self.solver.best_move(engine.state)
+        return self.fallback(engine, seat)
@@ -0,0 +1,346 @@
+# engine.py
+
+import random
+from typing import Callable, List, Optional, Sequence, Tuple
+from card.CardTable import (
+    CLASSIC_DECK,
+    CARD_NAMES,
+    CARD_VALUES,
+    TARGETED_CARDS,
+    NO_CARD,
+    ASSASSIN,
+    GUARD,
+    BARON,
+    HANDMAID,
+    PRINCE,
+    KING,
+    COUNTESS,
+    PRINCESS,
+    PLAYED,
+    PROTECT,
+    PROTECTED,
+    TIE,
+    WON,
+    LOST,
+    ASSASSINATED,
+    GUESS_RIGHT,
+    GUESS_WRONG,
+    SWAPPED,
+    LOOKED,
+    DISCARDED,
+    DECK_EMPTY,
+    PRINCESS_DISCARDED,
+)
+from engine.RoundState import RoundState
+
+# Favor tokens needed to win the game, by number of players.
+TOKENS_TO_WIN = {2: 7, 3: 5, 4: 4}
+DEFAULT_TOKENS_TO_WIN = 3
+
+# policy(engine, seat) -> (played_card_index, target_seat, guessed_value)
+Policy = Callable[["Engine", int], Tuple[int, int, int]]
+
+
+class Engine:
+    """
+    Headless, synchronous Love Letter engine.
+
+    Runs the same card rules as `Game` and the `Card.play` implementations, but on
+    a compact `RoundState`, with no awaits and no messages. Every decision is
+    delegated to a policy callback, one per seat.
+
+    Attributes:
+        num_players (int): Number of seats at the table.
+        policies (Sequence[Policy]): The decision callback of each seat.
+        rng (random.Random): Random source used for shuffling (and by policies).
+        composition (bytes): Card codes of the full deck.
+        state (RoundState): State of the current round.
+        scores (List[int]): Favor tokens of each seat.
+        eliminations (List[int]): Eliminations caused by each card code, over the
+            lifetime of the engine.
+        recorder: Optional observer of every action and round, with the methods
+            of `engine.Archive.RoundRecorder`.
+    """
+
+    __slots__ = (
+        "num_players",
+        "policies",
+        "rng",
+        "composition",
+        "state",
+        "scores",
+        "eliminations",
+        "recorder",
+    )
+
+    def __init__(
+        self,
+        num_players: int,
+        policies: Sequence[Policy],
+        rng: Optional[random.Random] = None,
+        deck: bytes = CLASSIC_DECK,
+    ):
+        if not 2 <= num_players <= len(deck) - 2:
+            raise ValueError("Invalid number of players")
+        if len(policies) != num_players:
+            raise ValueError("Exactly one policy per player is required")
+        self.num_players = num_players
+        self.policies = list(policies)
+        self.rng = rng if rng else random.Random()
+        self.composition = bytes(deck)
+        self.state = RoundState(num_players)
+        self.scores = [0] * num_players
+        self.eliminations = [0] * len(CARD_NAMES)
+        self.recorder = None
+
+    def start_round(self, first_seat: int = 0) -> None:
+        """
+        Shuffles, burns and deals a new round, then starts the first seat's turn.
+
+        One card is burned face-down; with two players three more are burned face-up,
+        as described in the game rules.
+        """
+        n = self.num_players
+        deck = bytearray(self.composition)
+        self.rng.shuffle(deck)
+        burned = bytearray((deck.pop(),))
+        if n == 2:
+            burned += bytes((deck.pop(), deck.pop(), deck.pop()))
+        state = RoundState(n, burned=burned)
+        hands = state.hands
+        for seat in range(n):
+            hands[2 * seat] = deck.pop()
+        hands[2 * first_seat + 1] = deck.pop()
+        state.deck = deck
+        state.current = first_seat
+        self.state = state
+
+    def is_round_over(self) -> bool:
+        """Returns whether the round has ended."""
+        active = self.state.active
+        return not self.state.deck or active & (active - 1) == 0
+
+    def step(self) -> bool:
+        """
+        Plays the current seat's turn, as chosen by its policy, and hands the turn
+        to the next active seat.
+
+        Returns:
+            bool: True if the round continues, False if it has ended.
+        """
+        seat = self.state.current
+        card_index, target, guess = self.policies[seat](self, seat)
+        return self.take_turn(card_index, target, guess)
+
+    def take_turn(self, card_index: int, target: int = -1, guess: int = -1) -> bool:
+        """
+        Plays the current seat's turn with the given move and hands the turn to the
+        next active seat, who draws a card.
+
+        Returns:
+            bool: True if the round continues, False if it has ended.
+        """
+        state = self.state
+        seat = state.current
+        recorder = self.recorder
+        if recorder is None:
+            self.play(seat, card_index, target, guess)
+        else:
+            # What the seat and its target held before the card resolved
+            hands = state.hands
+            card = hands[2 * seat + card_index]
+            kept = hands[2 * seat + 1 - card_index]
+            if target == seat:
+                target_card = kept
+            elif 0 <= target < self.num_players:
+                target_card = hands[2 * target]
+            else:
+                target_card = NO_CARD
+            deck_count = len(state.deck)
+            outcome = self.play(seat, card_index, target, guess)
+            # Only a Guard played at someone names a value; policies may fill in any guess
+            recorded_guess = guess if card == GUARD and target >= 0 else -1
+            recorder.record_action(seat, card, kept, target, target_card, recorded_guess, outcome, deck_count)
+        state.turns += 1
+
+        active = state.active
+        if not state.deck or active & (active - 1) == 0:
+            return False
+
+        n = self.num_players
+        seat = (seat + 1) % n
+        while not active >> seat & 1:
+            seat = (seat + 1) % n
+        state.current = seat
+        state.protected &= ~(1 << seat)
+        state.hands[2 * seat + 1] = state.deck.pop()
+        return True
+
+    def play(self, seat: int, card_index: int, target: int = -1, guess: int = -1) -> int:
+        """
+        Plays a card from a seat's hand and resolves its effect.
+
+        An invalid or protected target makes the card resolve with no effect, the
+        same way `Card.play` returns early after reporting the problem.
+
+        Args:
+            seat (int): The seat playing the card.
+            card_index (int): Index of the played card in the seat's hand.
+            target (int): Target seat, for cards that need one.
+            guess (int): Guessed card value, for the Guard.
+
+        Returns:
+            int: What the card did, as a code from `card.CardTable.OUTCOMES`.
+
+        Raises:
+            ValueError: If the card index is invalid or the Countess rule is broken.
+        """
+        state = self.state
+        hands = state.hands
+        mine = 2 * seat
+        if card_index != 0 and card_index != 1 or hands[mine + 1] == NO_CARD:
+            raise ValueError("Invalid card index")
+        card = hands[mine + card_index]
+        kept = hands[mine + 1 - card_index]
+        if kept == COUNTESS and (card == KING or card == PRINCE):
+            raise ValueError("You must play the Countess when you have a King or Prince.")
+        hands[mine] = kept
+        hands[mine + 1] = NO_CARD
+        state.discard_pile.append(card)
+
+        if card not in TARGETED_CARDS:
+            if card == HANDMAID:
+                state.protected |= 1 << seat
+                return PROTECT
+            if card == PRINCESS:
+                self.eliminate(seat, card)
+                return PRINCESS_DISCARDED
+            return PLAYED
+
+        if not 0 <= target < self.num_players or not state.active >> target & 1:
+            return PLAYED
+        if target == seat:
+            if card != PRINCE:
+                return PLAYED
+        elif state.protected >> target & 1:
+            return PROTECTED
+
+        theirs = 2 * target
+        if card == GUARD:
+            if guess == GUARD:
+                return PLAYED
+            target_card = hands[theirs]
+            if target_card == ASSASSIN:
+                self.eliminate(seat, card)
+                return ASSASSINATED
+            if CARD_VALUES[target_card] == guess:
+                self.eliminate(target, card)
+                return GUESS_RIGHT
+            return GUESS_WRONG
+        if card == BARON:
+            mine_value = CARD_VALUES[kept]
+            theirs_value = CARD_VALUES[hands[theirs]]
+            if mine_value > theirs_value:
+                self.eliminate(target, card)
+                return WON
+            if mine_value < theirs_value:
+                self.eliminate(seat, card)
+                return LOST
+            return TIE
+        if card == PRINCE:
+            if not state.deck:
+                return DECK_EMPTY
+            if hands[theirs] == PRINCESS:
+                self.eliminate(target, card)
+                return PRINCESS_DISCARDED
+            state.discard_pile.append(hands[theirs])
+            hands[theirs] = state.deck.pop()
+            return DISCARDED
+        if card == KING:
+            hands[mine], hands[theirs] = hands[theirs], hands[mine]
+            return SWAPPED
+        # Priest only reveals information, which is already visible to a policy.
+        return LOOKED
+
+    def eliminate(self, seat: int, card: int) -> None:
+        """
+        Knocks a seat out of the round; its hand is discarded face-up.
+
+        Args:
+            seat (int): The eliminated seat.
+            card (int): The played card that caused the elimination.
+        """
+        self.eliminations[card] += 1
+        state = self.state
+        state.active &= ~(1 << seat)
+        hands = state.hands
+        discarded = hands[2 * seat]
+        if discarded != NO_CARD:
+            state.discard_pile.append(discarded)
+            hands[2 * seat] = NO_CARD
+
+    def winners(self) -> List[int]:
+        """
+        Returns the winning seats of a finished round.
+
+        The last active seat wins; otherwise every active seat holding the highest
+        card wins.
+        """
+        state = self.state
+        hands = state.hands
+        contenders = [seat for seat in range(self.num_players) if state.active >> seat & 1]
+        if len(contenders) == 1:
+            return contenders
+        best = max(CARD_VALUES[hands[2 * seat]] for seat in contenders)
+        return [seat for seat in contenders if CARD_VALUES[hands[2 * seat]] == best]
+
+    def play_round(self, first_seat: int = 0) -> List[int]:
+        """
+        Plays a full round and awards a favor token to each winner.
+
+        Returns:
+            List[int]: The winning seats.
+        """
+        self.start_round(first_seat)
+        step = self.step
+        while step():
+            pass
+        winners = self.winners()
+        for seat in winners:
+            self.scores[seat] += 1
+        if self.recorder is not None:
+            self.recorder.record_round(self, first_seat, winners)
+        return winners
+
+    def play_game(
+        self,
+        tokens: Optional[int] = None,
+        on_round_end: Optional[Callable[[List[int]], None]] = None,
+    ) -> int:
+        """
+        Plays rounds until a seat holds the given number of favor tokens.
+
+        The winner of a round takes the first turn of the next one.
+
+        Args:
+            tokens (Optional[int]): Favor tokens needed to win; defaults to the
+                standard count for the number of players.
+            on_round_end (Optional[Callable]): Called with the winning seats after
+                each round, while `state` still holds the finished round.
+
+        Returns:
+            int: The seat that won the game.
+        """
+        if tokens is None:
+            tokens = TOKENS_TO_WIN.get(self.num_players, DEFAULT_TOKENS_TO_WIN)
+        self.scores = [0] * self.num_players
+        first_seat = 0
+        while True:
+            winners = self.play_round(first_seat)
+            if on_round_end:
+                on_round_end(winners)
+            first_seat = winners[0]
+            scores = self.scores
+            best = max(scores)
+            if best >= tokens:
+                return scores.index(best)
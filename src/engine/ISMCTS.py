@@ -0,0 +1,279 @@
+# ismcts.py
+"""
+Information-set Monte Carlo tree search (single-observer ISMCTS) for one seat.
+
+Every iteration deals a determinization: the cards the seat cannot see (the
+opponents' hands, the draw pile and the face-down burned card) are dealt at random
+from the deck composition minus the cards it can see (its own hand, the discard
+pile and the face-up burned cards). The iteration then walks one shared tree of
+moves through that world with UCB, adds one node, and plays the rest of the round
+out with a fast policy on the synchronous `Engine`. With an `EndgameSolver`, the
+playout stops once the draw pile is small and the solved value of the position is
+backed up instead of a single result.
+
+Moves are keyed by (card code, target seat, guess) rather than by hand index, so
+the same node stands for the same move in every determinization.
+"""
+
+import math
+import random
+import time
+from typing import Dict, Optional, Tuple
+from card.CardTable import CLASSIC_DECK, NO_CARD
+from engine.Actions import action_index
+from engine.Endgame import DEFAULT_DEPTH, EndgameSolver
+from engine.Engine import Engine, Policy
+from engine.Knowledge import KnowledgeTracker
+from engine.RoundState import RoundState
+
+DEFAULT_ITERATIONS = 1000
+DEFAULT_EXPLORATION = 0.7
+
+def determinize(
+    state: RoundState,
+    seat: int,
+    composition: bytes,
+    rng: random.Random,
+    knowledge: Optional[KnowledgeTracker] = None,
+) -> RoundState:
+    """
+    Returns a copy of a state where the cards hidden from a seat are dealt at random.
+
+    Cards of the composition that are not visible to the seat are shuffled into the
+    hands of the other active seats, the draw pile and the face-down burned card.
+    Any cards left over belong to no slot; they are the hands of eliminated seats
+    that a live game did not discard.
+
+    With a KnowledgeTracker of the seat, its unseen counts replace the scan of the
+    visible cards, opponents it knows the card of get that card, and the other
+    opponents are dealt cards it has not ruled out for them whenever possible.
+
+    Raises:
+        ValueError: If the visible cards do not fit the composition.
+    """
+    if knowledge is not None:
+        return _determinize_with(knowledge, state, seat, rng)
+    counts = [0] * 256
+    for card in composition:
+        counts[card] += 1
+    for visible in (state.hand(seat), state.discard_pile, state.burned[1:]):
+        for card in visible:
+            counts[card] -= 1
+    pool = bytearray()
+    for card, count in enumerate(counts):
+        if count > 0:
+            pool += bytes((card,)) * count
+    rng.shuffle(pool)
+
+    world = state.clone()
+    hands = world.hands
+    slots = len(world.deck) + (1 if world.burned else 0)
+    for other in range(world.num_players):
+        if other != seat and world.active >> other & 1:
+            slots += 1
+    if len(pool) < slots:
+        raise ValueError("The visible cards do not fit the deck composition")
+    for other in range(world.num_players):
+        if other != seat and world.active >> other & 1:
+            hands[2 * other] = pool.pop()
+    deck = world.deck
+    for index in range(len(deck)):
+        deck[index] = pool.pop()
+    if world.burned:
+        world.burned[0] = pool.pop()
+    return world
+
+
+def _determinize_with(knowledge: KnowledgeTracker, state: RoundState, seat: int, rng: random.Random) -> RoundState:
+    pool = bytearray()
+    for card, count in enumerate(knowledge.unseen):
+        if count > 0:
+            pool += bytes((card,)) * count
+    rng.shuffle(pool)
+
+    world = state.clone()
+    hands = world.hands
+    known = knowledge.known
+    excluded = knowledge.excluded
+    hidden = [
+        other
+        for other in range(world.num_players)
+        if other != seat and world.active >> other & 1 and known[other] == NO_CARD
+    ]
+    if len(pool) < len(hidden) + len(world.deck) + (1 if world.burned else 0):
+        raise ValueError("The visible cards do not fit the deck composition")
+    for other in range(world.num_players):
+        if other != seat and world.active >> other & 1 and known[other] != NO_CARD:
+            hands[2 * other] = known[other]
+    for other in hidden:
+        ruled_out = excluded[other]
+        index = len(pool) - 1
+        while index > 0 and ruled_out >> pool[index] & 1:
+            index -= 1
+        hands[2 * other] = pool[index]
+        del pool[index]
+    deck = world.deck
+    for index in range(len(deck)):
+        deck[index] = pool.pop()
+    if world.burned:
+        world.burned[0] = pool.pop()
+    return world
+
+
+class _Node:
+    __slots__ = ("seat", "parent", "children", "visits", "reward", "available")
+
+    def __init__(self, seat: int, parent: Optional["_Node"]):
+        self.seat = seat  # The seat whose move led to this node
+        self.parent = parent
+        self.children: Dict[Tuple[int, int, int], _Node] = {}
+        self.visits = 0
+        self.reward = 0.0
+        self.available = 0
+
+
+class ISMCTSBot:
+    """
+    A policy that picks its moves with ISMCTS; use it wherever a `Policy` is expected.
+
+    Attributes:
+        iterations (int): Iterations per decision.
+        time_budget (Optional[float]): Seconds per decision; the search stops at
+            whichever of the two budgets runs out first.
+        exploration (float): UCB exploration constant.
+        endgame (Optional[EndgameSolver]): Solver that ends the playouts, if any.
+        endgame_depth (int): Largest draw pile size handed to the solver.
+    """
+
+    __slots__ = ("iterations", "time_budget", "exploration", "endgame", "endgame_depth", "_rollout_policy")
+
+    def __init__(
+        self,
+        iterations: int = DEFAULT_ITERATIONS,
+        time_budget: Optional[float] = None,
+        exploration: float = DEFAULT_EXPLORATION,
+        rollout_policy: Optional[Policy] = None,
+        endgame: Optional[EndgameSolver] = None,
+        endgame_depth: int = DEFAULT_DEPTH,
+    ):
+        if rollout_policy is None:
+            # engine.Policy imports this module, so it is imported here
+            from engine.Policy import random_policy
+
+            rollout_policy = random_policy
+        self.iterations = iterations
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.endgame = endgame
+        self.endgame_depth = endgame_depth
+        self._rollout_policy = rollout_policy
+
+    def __call__(self, engine: Engine, seat: int) -> Tuple[int, int, int]:
+        return self.choose(engine.state, seat, engine.composition, engine.rng)
+
+    def choose(
+        self,
+        state: RoundState,
+        seat: int,
+        composition: bytes = CLASSIC_DECK,
+        rng: Optional[random.Random] = None,
+        knowledge: Optional[KnowledgeTracker] = None,
+    ) -> Tuple[int, int, int]:
+        """
+        Searches for the best move of the seat whose turn it is.
+
+        Args:
+            state (RoundState): The round, as far as it is known; only what the
+                seat can see is used.
+            seat (int): The seat to move; it must hold two cards.
+            composition (bytes): Card codes of the full deck.
+            rng (Optional[random.Random]): Random source of the search.
+            knowledge (Optional[KnowledgeTracker]): What the seat learnt earlier in
+                the round, used to deal the determinizations.
+
+        Returns:
+            Tuple[int, int, int]: (played card index, target seat, guessed value),
+                with -1 for no target or guess.
+        """
+        rng = rng if rng else random.Random()
+        actions = action_index(state.num_players, composition)
+        moves = actions.keyed_moves(state, seat)
+        if len(moves) == 1:
+            return moves[0][1:]
+        if knowledge is not None:
+            knowledge.sync_hand(state.hand(seat))
+            hidden = len(state.deck) + (1 if state.burned else 0)
+            for other in range(state.num_players):
+                if other != seat and state.active >> other & 1 and knowledge.known[other] == NO_CARD:
+                    hidden += 1
+            if knowledge.unseen_total < hidden:
+                # The tracker missed an event; count the visible cards instead
+                knowledge = None
+
+        engine = Engine(state.num_players, [self._rollout_policy] * state.num_players, rng, composition)
+        root = _Node(seat, None)
+        exploration = self.exploration
+        uniform = rng.random
+        deadline = time.perf_counter() + self.time_budget if self.time_budget else None
+        endgame = self.endgame
+        endgame_depth = self.endgame_depth
+
+        for iteration in range(self.iterations):
+            if deadline and iteration & 15 == 0 and time.perf_counter() > deadline:
+                break
+            world = determinize(state, seat, composition, rng, knowledge)
+            engine.state = world
+            node = root
+            ongoing = True
+            # Selection, then expansion of one new node
+            while ongoing:
+                actor = world.current
+                legal = actions.keyed_moves(world, actor)
+                children = node.children
+                untried = [move for move in legal if (move[0], move[2], move[3]) not in children]
+                if untried:
+                    move = untried[int(uniform() * len(untried))]
+                    child = children[move[0], move[2], move[3]] = _Node(actor, node)
+                else:
+                    child = None
+                    best = -1.0
+                    for candidate in legal:
+                        option = children[candidate[0], candidate[2], candidate[3]]
+                        score = option.reward / option.visits + exploration * math.sqrt(
+                            math.log(option.available + 1) / option.visits
+                        )
+                        if score > best:
+                            best = score
+                            child = option
+                            move = candidate
+                for candidate in legal:
+                    option = children.get((candidate[0], candidate[2], candidate[3]))
+                    if option is not None:
+                        option.available += 1
+                node = child
+                ongoing = engine.take_turn(move[1], move[2], move[3])
+                if untried:
+                    break
+            # Playout, or the exact value once the solver can take over
+            values = None
+            while ongoing:
+                if endgame is not None and len(world.deck) <= endgame_depth:
+                    values = endgame.solve(world)[0]
+                    break
+                ongoing = engine.step()
+            if values is None:
+                winners = engine.winners()
+                share = 1.0 / len(winners)
+                values = [share if other in winners else 0.0 for other in range(world.num_players)]
+            # Backpropagation, each node scored for the seat that moved into it
+            while node is not root:
+                node.visits += 1
+                node.reward += values[node.seat]
+                node = node.parent
+
+        children = root.children
+        best_move = max(moves, key=lambda move: children.get((move[0], move[2], move[3]), _EMPTY).visits)
+        return best_move[1:]
+
+
+_EMPTY = _Node(-1, None)
@@ -0,0 +1,319 @@
+# knowledge.py
+"""
+Incremental card counting from the point of view of one seat.
+
+A KnowledgeTracker keeps how many copies of each card the observer has not seen
+yet, the card it knows each opponent holds (from a Priest, a King swap or a Baron
+tie), and the cards ruled out for each opponent (by a wrong Guard guess or a lost
+Baron duel). Every event is an O(1) update and every query is a pass over the
+card codes, independent of the length of the round.
+
+Unseen cards are spread uniformly over every hidden place: the opponents' hands,
+the draw pile and the face-down burned card. With two players the three face-up
+burned cards are seen from the start, as the README describes.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+from card.CardTable import (
+    BARON,
+    CARD_VALUES,
+    GUARD,
+    KING,
+    NO_CARD,
+    PRIEST,
+    PRINCE,
+    PRINCESS,
+    ASSASSINATED,
+    DISCARDED,
+    GUESS_RIGHT,
+    GUESS_WRONG,
+    LOOKED,
+    LOST,
+    PRINCESS_DISCARDED,
+    SWAPPED,
+    TIE,
+    WON,
+)
+
+_CODES = range(len(CARD_VALUES))
+
+
+def _mask(predicate) -> int:
+    mask = 0
+    for code in _CODES:
+        if predicate(CARD_VALUES[code]):
+            mask |= 1 << code
+    return mask
+
+
+class KnowledgeTracker:
+    """
+    What one seat knows about the cards of the current round.
+
+    Attributes:
+        seat (int): The observing seat.
+        num_players (int): Number of seats at the table.
+        unseen (List[int]): Copies of each card code the observer has not seen.
+        unseen_total (int): Sum of `unseen`.
+        hand (List[int]): Card codes in the observer's hand, as last observed.
+        known (List[int]): Card code known to be held by each seat, else NO_CARD.
+        excluded (List[int]): Bitmask of the card codes each seat cannot hold.
+        active (int): Bitmask of the seats still in the round.
+    """
+
+    __slots__ = ("seat", "num_players", "unseen", "unseen_total", "hand", "known", "excluded", "active")
+
+    def __init__(self, seat: int, num_players: int, composition: bytes, face_up: bytes = b""):
+        """
+        Args:
+            seat (int): The observing seat.
+            num_players (int): Number of seats at the table.
+            composition (bytes): Card codes of the full deck.
+            face_up (bytes): Cards burned face-up at the start of the round.
+        """
+        self.seat = seat
+        self.num_players = num_players
+        self.unseen = [0] * len(CARD_VALUES)
+        for card in composition:
+            self.unseen[card] += 1
+        self.unseen_total = len(composition)
+        self.hand: List[int] = []
+        self.known = [NO_CARD] * num_players
+        self.excluded = [0] * num_players
+        self.active = (1 << num_players) - 1
+        for card in face_up:
+            self._see(card)
+
+    def _see(self, card: int) -> None:
+        if self.unseen[card] > 0:
+            self.unseen[card] -= 1
+            self.unseen_total -= 1
+
+    def sync_hand(self, cards: Sequence[int]) -> None:
+        """Records the observer's current hand; cards not in the last observed hand are counted as seen."""
+        previous = list(self.hand)
+        for card in cards:
+            if card in previous:
+                previous.remove(card)
+            else:
+                self._see(card)
+        self.hand = [card for card in cards if card != NO_CARD]
+
+    def discard(self, seat: int, card: int) -> None:
+        """Records a card going face-up from a seat's hand."""
+        if seat == self.seat:
+            if card in self.hand:
+                self.hand.remove(card)
+            else:
+                self._see(card)
+            return
+        if self.known[seat] == card:
+            self.known[seat] = NO_CARD
+        else:
+            self._see(card)
+        # The seat may now hold a card drawn since the exclusions were learnt
+        self.excluded[seat] = 0
+
+    def peek(self, seat: int, card: int) -> None:
+        """Records that the observer saw a seat's card."""
+        if seat != self.seat and self.known[seat] != card:
+            if self.known[seat] == NO_CARD:
+                self._see(card)
+            self.known[seat] = card
+            self.excluded[seat] = 0
+
+    def swap(self, first: int, second: int, received: Optional[int] = None) -> None:
+        """
+        Records a King swapping the hands of two seats.
+
+        Args:
+            first (int): One of the seats.
+            second (int): The other seat.
+            received (Optional[int]): The card the observer got, if it was one of them.
+        """
+        if self.seat in (first, second):
+            other = second if first == self.seat else first
+            given = self.hand[0] if self.hand else NO_CARD
+            got = self.known[other]
+            self.known[other] = given
+            self.excluded[other] = 0
+            self.hand = [got] if got != NO_CARD else []
+            if received is not None:
+                self.sync_hand((received,))
+            return
+        known = self.known
+        excluded = self.excluded
+        known[first], known[second] = known[second], known[first]
+        excluded[first], excluded[second] = excluded[second], excluded[first]
+
+    def rule_out(self, seat: int, mask: int) -> None:
+        """Records that a seat holds none of the card codes in a bitmask."""
+        if seat != self.seat:
+            self.excluded[seat] |= mask
+
+    def eliminate(self, seat: int) -> None:
+        """Records a seat leaving the round; a hand it did not reveal stays unseen."""
+        self.active &= ~(1 << seat)
+        self.known[seat] = NO_CARD
+        self.excluded[seat] = 0
+
+    def observe_action(
+        self,
+        seat: int,
+        card: int,
+        kept: int,
+        target: int,
+        target_card: int,
+        guess: int,
+        outcome: int,
+        revealed: bool = True,
+    ) -> None:
+        """
+        Records a card played, as reported by `Engine.recorder`, seeing only what
+        the observer may see.
+
+        Args:
+            seat (int): The seat that played.
+            card (int): The card played.
+            kept (int): The other card in the player's hand.
+            target (int): The target seat, or -1.
+            target_card (int): The target's card before the effect.
+            guess (int): The Guard's guess, or -1.
+            outcome (int): Code from `card.CardTable.OUTCOMES`.
+            revealed (bool): Whether eliminated hands are discarded face-up, as in
+                the engine; the live game keeps them hidden.
+        """
+        observer = self.seat
+        # Cards of the observer's own that it has not been told about yet
+        if seat == observer:
+            self.sync_hand((card, kept))
+        elif target == observer and target_card != NO_CARD:
+            self.sync_hand((target_card,))
+        self.discard(seat, card)
+        if card == GUARD:
+            if outcome == GUESS_WRONG:
+                self.rule_out(target, _mask(lambda value: value == guess))
+            elif outcome == GUESS_RIGHT:
+                if revealed:
+                    self.discard(target, target_card)
+                self.eliminate(target)
+            elif outcome == ASSASSINATED:
+                if revealed:
+                    self.discard(seat, kept)
+                self.eliminate(seat)
+        elif card == PRIEST:
+            if outcome == LOOKED and seat == observer:
+                self.peek(target, target_card)
+        elif card == BARON:
+            involved = observer in (seat, target)
+            if outcome in (WON, LOST):
+                winner, loser = (seat, target) if outcome == WON else (target, seat)
+                lost_card = target_card if outcome == WON else kept
+                if revealed or involved:
+                    self.discard(loser, lost_card)
+                self.eliminate(loser)
+                lost_value = CARD_VALUES[lost_card]
+                if involved or revealed:
+                    self.rule_out(winner, _mask(lambda value: value <= lost_value))
+            elif outcome == TIE and involved:
+                mine = CARD_VALUES[kept if seat == observer else target_card]
+                self.rule_out(target if seat == observer else seat, _mask(lambda value: value != mine))
+        elif card == PRINCE:
+            if outcome == DISCARDED:
+                self.discard(target, target_card)
+            elif outcome == PRINCESS_DISCARDED:
+                self.discard(target, target_card)
+                self.eliminate(target)
+        elif card == KING:
+            if outcome == SWAPPED:
+                received = None
+                if seat == observer:
+                    received = target_card
+                elif target == observer:
+                    received = kept
+                self.swap(seat, target, received)
+        elif card == PRINCESS:
+            if revealed:
+                self.discard(seat, kept)
+            self.eliminate(seat)
+
+    def hand_distribution(self, seat: int) -> Dict[int, float]:
+        """
+        Returns the probability of each card code being in a seat's hand.
+
+        Returns:
+            Dict[int, float]: Card code to probability; empty for an eliminated seat.
+        """
+        if not self.active >> seat & 1:
+            return {}
+        if seat == self.seat:
+            return {self.hand[0]: 1.0} if self.hand else {}
+        if self.known[seat] != NO_CARD:
+            return {self.known[seat]: 1.0}
+        excluded = self.excluded[seat]
+        weights = {code: count for code, count in enumerate(self.unseen) if count and not excluded >> code & 1}
+        total = sum(weights.values())
+        if not total:
+            # Inconsistent exclusions (a card was redrawn unseen): fall back to counting
+            weights = {code: count for code, count in enumerate(self.unseen) if count}
+            total = self.unseen_total
+        return {code: count / total for code, count in weights.items()} if total else {}
+
+    def best_guard_guess(self, seat: int) -> Tuple[Optional[float], float]:
+        """
+        Returns the value a Guard should name against a seat and the chance it is right.
+
+        Returns:
+            Tuple[Optional[float], float]: The value, or None if there is nothing
+                to guess, and its probability.
+        """
+        by_value: Dict[float, float] = {}
+        guard_value = CARD_VALUES[GUARD]
+        for code, probability in self.hand_distribution(seat).items():
+            value = CARD_VALUES[code]
+            if value != guard_value:
+                by_value[value] = by_value.get(value, 0.0) + probability
+        if not by_value:
+            return None, 0.0
+        value = max(by_value, key=by_value.get)
+        return value, by_value[value]
+
+    def baron_odds(self, seat: int, card: int) -> Tuple[float, float, float]:
+        """
+        Returns the chances of beating, tying and losing to a seat with a Baron.
+
+        Args:
+            seat (int): The opponent.
+            card (int): The card the observer would keep.
+
+        Returns:
+            Tuple[float, float, float]: Probabilities of winning, tying and losing.
+        """
+        mine = CARD_VALUES[card]
+        win = tie = lose = 0.0
+        for code, probability in self.hand_distribution(seat).items():
+            theirs = CARD_VALUES[code]
+            if mine > theirs:
+                win += probability
+            elif mine == theirs:
+                tie += probability
+            else:
+                lose += probability
+        return win, tie, lose
+
+    def record_action(
+        self,
+        seat: int,
+        card: int,
+        kept: int,
+        target: int,
+        target_card: int,
+        guess: int,
+        outcome: int,
+        deck_count: int,
+    ) -> None:
+        """Lets the tracker be set as `Engine.recorder`."""
+        self.observe_action(seat, card, kept, target, target_card, guess, outcome)
+
+    def record_round(self, engine, first_seat: int, winners: Sequence[int]) -> None:
+        """Lets the tracker be set as `Engine.recorder`; trackers only cover one round."""
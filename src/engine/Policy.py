@@ -0,0 +1,41 @@
+# policy.py
+
+from typing import Dict, Tuple
+from card.CardTable import TARGETED_CARDS, GUARD, PRIEST, PRINCE, KING, COUNTESS, PRINCESS
+from engine.Actions import action_index
+from engine.Endgame import EndgamePolicy, EndgameSolver
+from engine.Engine import Engine, Policy
+from engine.ISMCTS import ISMCTSBot
+
+
+def random_policy(engine: Engine, seat: int) -> Tuple[int, int, int]:
+    """
+    Plays a uniformly random card that respects the Countess rule, at a random
+    valid target, guessing a random non-Guard value.
+    """
+    random = engine.rng.random
+    state = engine.state
+    hands = state.hands
+    first, second = hands[2 * seat], hands[2 * seat + 1]
+    if first == COUNTESS and (second == KING or second == PRINCE):
+        card_index = 0
+    elif second == COUNTESS and (first == KING or first == PRINCE):
+        card_index = 1
+    else:
+        card_index = 1 if random() < 0.5 else 0
+    card = hands[2 * seat + card_index]
+    if card not in TARGETED_CARDS:
+        return card_index, -1, -1
+
+    seats = action_index(engine.num_players, engine.composition).targets(state, seat, card)
+    # int(random() * k) is several times cheaper than randrange/choice.
+    target = seats[int(random() * len(seats))] if seats else -1
+    return card_index, target, PRIEST + int(random() * (PRINCESS - GUARD))
+
+
+POLICIES: Dict[str, Policy] = {
+    "random": random_policy,
+    "ismcts": ISMCTSBot(rollout_policy=random_policy),
+    "endgame": EndgamePolicy(random_policy),
+    "ismcts-endgame": ISMCTSBot(rollout_policy=random_policy, endgame=EndgameSolver()),
+}
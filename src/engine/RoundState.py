@@ -0,0 +1,137 @@
+# round_state.py
+
+import struct
+from card.CardTable import NO_CARD
+
+MAX_PLAYERS = 8
+
+# num_players, current, turns, active, protected, len(deck), len(discard_pile), len(burned)
+_HEADER = struct.Struct("<8B")
+
+
+class RoundState:
+    """
+    Compact, byte-backed state of one round.
+
+    Cards are integer codes from `card.CardTable`, and per-seat flags are bitmasks
+    with bit `seat` set for each seat the flag applies to.
+
+    Attributes:
+        num_players (int): Number of seats at the table.
+        hands (bytearray): Two slots per seat, the kept card then the drawn card;
+            empty slots hold NO_CARD.
+        deck (bytearray): The draw pile; the last byte is the top card.
+        discard_pile (bytearray): Cards played or discarded face-up this round.
+        burned (bytearray): Cards set aside at the start of the round, face-down first.
+        active (int): Bitmask of the seats still in the round.
+        protected (int): Bitmask of the seats protected by a Handmaid.
+        current (int): The seat whose turn it is.
+        turns (int): Number of turns played so far.
+    """
+
+    __slots__ = (
+        "num_players",
+        "hands",
+        "deck",
+        "discard_pile",
+        "burned",
+        "active",
+        "protected",
+        "current",
+        "turns",
+    )
+
+    def __init__(self, num_players: int, deck: bytes = b"", burned: bytes = b""):
+        if not 2 <= num_players <= MAX_PLAYERS:
+            raise ValueError("Invalid number of players")
+        self.num_players = num_players
+        self.hands = bytearray([NO_CARD]) * (2 * num_players)
+        self.deck = bytearray(deck)
+        self.discard_pile = bytearray()
+        self.burned = bytearray(burned)
+        self.active = (1 << num_players) - 1
+        self.protected = 0
+        self.current = 0
+        self.turns = 0
+
+    def hand(self, seat: int) -> bytes:
+        """Returns the cards in a seat's hand."""
+        return bytes(card for card in self.hands[2 * seat : 2 * seat + 2] if card != NO_CARD)
+
+    def is_active(self, seat: int) -> bool:
+        """Returns whether a seat is still in the round."""
+        return bool(self.active >> seat & 1)
+
+    def is_protected(self, seat: int) -> bool:
+        """Returns whether a seat is protected by a Handmaid."""
+        return bool(self.protected >> seat & 1)
+
+    def active_count(self) -> int:
+        """Returns the number of seats still in the round."""
+        return bin(self.active).count("1")
+
+    def clone(self) -> "RoundState":
+        """Returns an independent copy of this state."""
+        other = RoundState.__new__(RoundState)
+        other.num_players = self.num_players
+        other.hands = self.hands[:]
+        other.deck = self.deck[:]
+        other.discard_pile = self.discard_pile[:]
+        other.burned = self.burned[:]
+        other.active = self.active
+        other.protected = self.protected
+        other.current = self.current
+        other.turns = self.turns
+        return other
+
+    def snapshot(self) -> bytes:
+        """Serializes this state into an immutable byte string."""
+        return b"".join(
+            (
+                _HEADER.pack(
+                    self.num_players,
+                    self.current,
+                    self.turns,
+                    self.active,
+                    self.protected,
+                    len(self.deck),
+                    len(self.discard_pile),
+                    len(self.burned),
+                ),
+                self.hands,
+                self.deck,
+                self.discard_pile,
+                self.burned,
+            )
+        )
+
+    @classmethod
+    def from_snapshot(cls, data: bytes) -> "RoundState":
+        """Rebuilds a state from the output of `snapshot`."""
+        n, current, turns, active, protected, deck_len, discard_len, burned_len = (
+            _HEADER.unpack_from(data)
+        )
+        state = cls.__new__(cls)
+        state.num_players = n
+        state.current = current
+        state.turns = turns
+        state.active = active
+        state.protected = protected
+        offset = _HEADER.size
+        state.hands = bytearray(data[offset : offset + 2 * n])
+        offset += 2 * n
+        state.deck = bytearray(data[offset : offset + deck_len])
+        offset += deck_len
+        state.discard_pile = bytearray(data[offset : offset + discard_len])
+        offset += discard_len
+        state.burned = bytearray(data[offset : offset + burned_len])
+        return state
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RoundState):
+            return NotImplemented
+        return self.snapshot() == other.snapshot()
+
+    def __hash__(self) -> int:
+        # Hashes the current contents: do not mutate a state used as a dict key.
+        return hash(self.snapshot())
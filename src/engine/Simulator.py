@@ -0,0 +1,240 @@
+# simulator.py
+"""
+Batch simulation of many Love Letter games across processes.
+
+Work is cut into fixed-size chunks, and each chunk gets its own random stream
+derived from the master seed and the chunk number. The merged result therefore
+depends only on the arguments, never on the number of workers or on scheduling.
+
+Usage:
+    python -m engine.Simulator --games 100000 --players 4 --seed 42 [--archive DIR]
+"""
+
+import argparse
+import json
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from card.CardTable import CARD_NAMES, DECK_VARIANTS
+from engine.Archive import ArchiveWriter, RoundRecorder
+from engine.Engine import Engine
+from engine.Policy import POLICIES
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class SimulationResult:
+    """
+    Aggregated statistics of a batch of simulated games.
+
+    Attributes:
+        policies (Tuple[str, ...]): The policy name of each seat.
+        games (int): Number of games played.
+        rounds (int): Number of rounds played.
+        game_wins (List[int]): Games won by each seat.
+        round_wins (List[int]): Rounds won by each seat (ties count for every winner).
+        round_lengths (Counter): Number of rounds by turns played.
+        eliminations (List[int]): Eliminations caused by each card code.
+    """
+
+    __slots__ = (
+        "policies",
+        "games",
+        "rounds",
+        "game_wins",
+        "round_wins",
+        "round_lengths",
+        "eliminations",
+    )
+
+    def __init__(self, policies: Sequence[str]):
+        self.policies = tuple(policies)
+        self.games = 0
+        self.rounds = 0
+        self.game_wins = [0] * len(policies)
+        self.round_wins = [0] * len(policies)
+        self.round_lengths: Counter = Counter()
+        self.eliminations = [0] * len(CARD_NAMES)
+
+    def merge(self, other: "SimulationResult") -> None:
+        """Adds the statistics of another result for the same seats into this one."""
+        if other.policies != self.policies:
+            raise ValueError("Cannot merge results of different seatings")
+        self.games += other.games
+        self.rounds += other.rounds
+        self.game_wins = [a + b for a, b in zip(self.game_wins, other.game_wins)]
+        self.round_wins = [a + b for a, b in zip(self.round_wins, other.round_wins)]
+        self.round_lengths.update(other.round_lengths)
+        self.eliminations = [a + b for a, b in zip(self.eliminations, other.eliminations)]
+
+    def win_rates(self) -> List[float]:
+        """Returns the share of games won by each seat."""
+        return [wins / self.games if self.games else 0.0 for wins in self.game_wins]
+
+    def policy_win_rates(self) -> Dict[str, float]:
+        """Returns the share of seat-games won by each policy."""
+        wins: Counter = Counter()
+        seats: Counter = Counter()
+        for name, won in zip(self.policies, self.game_wins):
+            wins[name] += won
+            seats[name] += self.games
+        return {name: wins[name] / seats[name] if seats[name] else 0.0 for name in seats}
+
+    def mean_round_length(self) -> float:
+        """Returns the average number of turns per round."""
+        total = sum(turns * count for turns, count in self.round_lengths.items())
+        return total / self.rounds if self.rounds else 0.0
+
+    def to_dict(self) -> dict:
+        """Returns a JSON-serializable summary."""
+        return {
+            "policies": list(self.policies),
+            "games": self.games,
+            "rounds": self.rounds,
+            "win_rates": self.win_rates(),
+            "policy_win_rates": self.policy_win_rates(),
+            "round_wins": self.round_wins,
+            "mean_round_length": self.mean_round_length(),
+            "round_lengths": {str(turns): count for turns, count in sorted(self.round_lengths.items())},
+            "eliminations": {
+                CARD_NAMES[code]: count for code, count in enumerate(self.eliminations) if count
+            },
+        }
+
+
+def chunk_rng(seed: int, chunk: int) -> random.Random:
+    """Returns the random stream of one chunk; string seeds hash identically in every process."""
+    return random.Random(f"{seed}/{chunk}")
+
+
+def _run_chunk(
+    job: Tuple[int, int, int, str, Tuple[str, ...], int, Optional[int], bool]
+) -> Tuple[SimulationResult, Optional[list]]:
+    seed, chunk, games, variant, policies, num_players, tokens, record = job
+    engine = Engine(
+        num_players,
+        [POLICIES[name] for name in policies],
+        rng=chunk_rng(seed, chunk),
+        deck=DECK_VARIANTS[variant],
+    )
+    if record:
+        engine.recorder = RoundRecorder()
+    result = SimulationResult(policies)
+    round_wins = result.round_wins
+    round_lengths = result.round_lengths
+
+    def on_round_end(winners: List[int]) -> None:
+        round_lengths[engine.state.turns] += 1
+        for seat in winners:
+            round_wins[seat] += 1
+
+    for _ in range(games):
+        winner = engine.play_game(tokens, on_round_end)
+        result.game_wins[winner] += 1
+    result.games = games
+    result.rounds = sum(round_lengths.values())
+    result.eliminations = list(engine.eliminations)
+    return result, engine.recorder.take() if record else None
+
+
+def simulate(
+    games: int,
+    num_players: int,
+    variant: str = "classic",
+    policies: Union[str, Sequence[str]] = "random",
+    seed: int = 0,
+    workers: Optional[int] = None,
+    tokens: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    archive: Optional[str] = None,
+) -> SimulationResult:
+    """
+    Plays a batch of games and merges their statistics.
+
+    Args:
+        games (int): Number of games to play.
+        num_players (int): Number of seats at the table.
+        variant (str): Deck variant, "classic" or "extended".
+        policies (Union[str, Sequence[str]]): A policy name for every seat, or one
+            name shared by all seats; see `engine.Policy.POLICIES`.
+        seed (int): Master seed; equal arguments give bit-for-bit equal results.
+        workers (Optional[int]): Number of worker processes; defaults to the CPU count.
+            One worker runs in the calling process.
+        tokens (Optional[int]): Favor tokens needed to win a game.
+        chunk_size (int): Games per unit of work.
+        archive (Optional[str]): Directory of an `engine.Archive` to append every
+            round to; each chunk is archived as room "sim-<seed>-<chunk>".
+
+    Returns:
+        SimulationResult: The merged statistics.
+
+    Raises:
+        ValueError: If the variant or a policy name is unknown.
+    """
+    if variant not in DECK_VARIANTS:
+        raise ValueError(f"Unknown deck variant: {variant}")
+    if isinstance(policies, str):
+        policies = (policies,) * num_players
+    policies = tuple(policies)
+    if len(policies) != num_players:
+        raise ValueError("Exactly one policy per player is required")
+    for name in policies:
+        if name not in POLICIES:
+            raise ValueError(f"Unknown policy: {name}")
+
+    jobs = [
+        (seed, chunk, min(chunk_size, games - start), variant, policies, num_players, tokens, bool(archive))
+        for chunk, start in enumerate(range(0, games, chunk_size))
+    ]
+    workers = workers or os.cpu_count() or 1
+    result = SimulationResult(policies)
+    writer = ArchiveWriter(archive) if archive else None
+
+    def merge(chunk: int, chunk_result: SimulationResult, rounds: Optional[list]) -> None:
+        result.merge(chunk_result)
+        if writer:
+            room = f"sim-{seed}-{chunk}"
+            for round_record in rounds:
+                writer.append_round(room, policies, round_record)
+
+    try:
+        if workers == 1 or len(jobs) <= 1:
+            for chunk, job in enumerate(jobs):
+                merge(chunk, *_run_chunk(job))
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+                # map() yields in submission order, so merging is deterministic.
+                for chunk, (chunk_result, rounds) in enumerate(executor.map(_run_chunk, jobs)):
+                    merge(chunk, chunk_result, rounds)
+    finally:
+        if writer:
+            writer.close()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate Love Letter games in batch.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--variant", choices=sorted(DECK_VARIANTS), default="classic")
+    parser.add_argument("--policies", nargs="+", default=["random"], help="One name, or one per seat.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--tokens", type=int, default=None)
+    parser.add_argument("--archive", default=None, help="Directory to archive every round to.")
+    args = parser.parse_args()
+
+    policies = args.policies[0] if len(args.policies) == 1 else args.policies
+    result = simulate(
+        args.games,
+        args.players,
+        variant=args.variant,
+        policies=policies,
+        seed=args.seed,
+        workers=args.workers,
+        tokens=args.tokens,
+        archive=args.archive,
+    )
+    print(json.dumps(result.to_dict(), indent=2))
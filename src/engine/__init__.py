@@ -0,0 +1 @@
+from .Engine import Engine
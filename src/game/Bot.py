@@ -0,0 +1,50 @@
+# bot.py
+
+import random
+from typing import Optional, Tuple, Union
+from card.CardTable import CLASSIC_DECK
+from engine.CFR import CFRBot
+from engine.ISMCTS import ISMCTSBot
+from game.Game import Game
+from player.Player import Player
+
+
+class GameBot:
+    """
+    Plays a seat of a live `Game` with an ISMCTSBot, or a CFRBot in a two-player game.
+
+    Attributes:
+        bot (Union[ISMCTSBot, CFRBot]): The bot that picks the moves.
+        composition (bytes): Card codes of the deck the game uses.
+        rng (random.Random): Random source of the search.
+    """
+
+    __slots__ = ("bot", "composition", "rng")
+
+    def __init__(
+        self,
+        bot: Optional[Union[ISMCTSBot, CFRBot]] = None,
+        composition: bytes = CLASSIC_DECK,
+        rng: Optional[random.Random] = None,
+    ):
+        self.bot = bot if bot else ISMCTSBot()
+        self.composition = composition
+        self.rng = rng if rng else random.Random()
+
+    def choose(self, game: Game, player: Player) -> Tuple[int, dict]:
+        """
+        Picks the move of a player whose turn it is.
+
+        Returns:
+            Tuple[int, dict]: The index of the card to play and its target_info,
+                as expected by `Game.handle_player_action`.
+        """
+        seat = game.seats[player.user.user_id]
+        knowledge = game.knowledge[seat] if game.knowledge else None
+        card_index, target, guess = self.bot.choose(game.round_state(), seat, self.composition, self.rng, knowledge)
+        return card_index, game.target_info(target, guess)
+
+    async def play_turn(self, game: Game, player: Player) -> None:
+        """Plays the turn of a player whose turn it is."""
+        card_index, target_info = self.choose(game, player)
+        await game.handle_player_action(player.user.user_id, card_index, target_info)
@@ -0,0 +1,304 @@
+# event_log.py
+"""
+Append-only, length-prefixed binary event log of each room's games.
+
+Every record is framed as:
+    u32 payload length, u32 CRC-32 of the payload, payload
+and the payload starts with a one-byte record kind:
+    START   u64 seed, u16 room ID length, room ID, u8 player count,
+            then per player: u16 ID length, ID, u16 name length, name,
+            then per player: u16 seat secret length, seat secret
+    DEAL    u8 first seat, u8 deck length, deck card codes (top card last)
+    ACTION  u8 seat, u8 played card index, target_info as UTF-8 JSON
+    END     (empty)
+Strings are UTF-8 and integers little-endian. A torn or corrupt tail (after a
+crash) is detected by the length and CRC and ignored on read.
+
+Appends only touch memory. An EventLogStore writes the buffers of all its logs
+and fsyncs them in one batch every `flush_interval` seconds, on a worker thread,
+so durability costs one fsync per dirty file per batch rather than per event.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import struct
+import zlib
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+START, DEAL, ACTION, END = range(1, 5)
+
+_FRAME = struct.Struct("<II")
+_SEED = struct.Struct("<Q")
+_U16 = struct.Struct("<H")
+
+DEFAULT_FLUSH_INTERVAL = 0.05
+# Buffered bytes that trigger a flush before the interval ends
+DEFAULT_FLUSH_BYTES = 1 << 20
+
+
+def _string(value: str) -> bytes:
+    data = value.encode()
+    return _U16.pack(len(data)) + data
+
+
+def seat_secret(session_token: str) -> str:
+    """
+    Returns the secret logged for a seat: a hash of its user's session token. After
+    a restart the client claims the seat back with the token it was given, and the
+    log never holds a usable token.
+    """
+    return hashlib.sha256(session_token.encode()).hexdigest()
+
+
+def encode_start(seed: int, room_id: str, players: Sequence[Tuple[str, str, str]]) -> bytes:
+    """Encodes a START payload from the game seed, room ID and (ID, name, seat secret) of each player."""
+    parts = [bytes((START,)), _SEED.pack(seed), _string(room_id), bytes((len(players),))]
+    for player_id, name, _ in players:
+        parts.append(_string(player_id))
+        parts.append(_string(name))
+    # After the players, so logs written before seats had secrets still decode
+    for _, _, secret in players:
+        parts.append(_string(secret))
+    return b"".join(parts)
+
+
+def encode_deal(first_seat: int, deck: bytes) -> bytes:
+    """Encodes a DEAL payload from the first seat and the shuffled deck."""
+    return bytes((DEAL, first_seat, len(deck))) + bytes(deck)
+
+
+def encode_action(seat: int, card_index: int, target_info: dict) -> bytes:
+    """Encodes an ACTION payload."""
+    return bytes((ACTION, seat, card_index)) + json.dumps(target_info, separators=(",", ":")).encode()
+
+
+def decode_start(payload: bytes) -> Tuple[int, str, List[Tuple[str, str, str]]]:
+    """
+    Decodes a START payload into (seed, room ID, [(player ID, name, seat secret), ...]);
+    the secrets are empty in logs written before seats had them.
+    """
+    offset = 1
+    (seed,) = _SEED.unpack_from(payload, offset)
+    offset += _SEED.size
+
+    def string() -> str:
+        nonlocal offset
+        (length,) = _U16.unpack_from(payload, offset)
+        offset += _U16.size
+        value = bytes(payload[offset : offset + length]).decode()
+        offset += length
+        return value
+
+    room_id = string()
+    count = payload[offset]
+    offset += 1
+    seats = []
+    for _ in range(count):
+        player_id = string()
+        seats.append((player_id, string()))
+    secrets = [string() for _ in range(count)] if offset < len(payload) else [""] * count
+    return seed, room_id, [(player_id, name, secret) for (player_id, name), secret in zip(seats, secrets)]
+
+
+def decode_deal(payload: bytes) -> Tuple[int, bytes]:
+    """Decodes a DEAL payload into (first seat, deck)."""
+    return payload[1], bytes(payload[3 : 3 + payload[2]])
+
+
+def decode_action(payload: bytes) -> Tuple[int, int, dict]:
+    """Decodes an ACTION payload into (seat, card index, target_info)."""
+    return payload[1], payload[2], json.loads(bytes(payload[3:]).decode())
+
+
+def _scan(data: bytes) -> Iterator[Tuple[memoryview, int]]:
+    # Yields each intact record with the offset just past it
+    view = memoryview(data)
+    offset = 0
+    end = len(data)
+    while offset + _FRAME.size <= end:
+        length, checksum = _FRAME.unpack_from(view, offset)
+        start = offset + _FRAME.size
+        payload = view[start : start + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum or not length:
+            return
+        offset = start + length
+        yield payload, offset
+
+
+def read_records(data: bytes) -> Iterator[memoryview]:
+    """
+    Yields the payloads of the records in a log, in order.
+
+    Stops at the first truncated or corrupt record, which can only be the tail
+    left by a crash during a write.
+    """
+    for payload, _ in _scan(data):
+        yield payload
+
+
+def _truncate_torn_tail(path: str) -> None:
+    # Appends after a torn record would never be read back
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return
+    valid = 0
+    for _, valid in _scan(data):
+        pass
+    if valid < len(data):
+        with open(path, "r+b") as file:
+            file.truncate(valid)
+
+
+class EventLog:
+    """
+    The event log of one room.
+
+    Attributes:
+        room_id (str): ID of the room.
+        path (str): Path of the log file.
+        closed (bool): Whether the log was closed.
+    """
+
+    __slots__ = ("room_id", "path", "closed", "_store", "_file", "_pending")
+
+    def __init__(self, store: "EventLogStore", room_id: str, path: str):
+        self.room_id = room_id
+        self.path = path
+        self.closed = False
+        self._store = store
+        self._file = open(path, "ab")
+        self._pending = bytearray()
+
+    def append(self, payload: bytes) -> None:
+        """Buffers a record; it becomes durable with the store's next group commit."""
+        if self.closed:
+            raise ValueError("Event log is closed")
+        self._pending += _FRAME.pack(len(payload), zlib.crc32(payload))
+        self._pending += payload
+        self._store._mark_dirty(self, len(self._pending))
+
+    def close(self) -> None:
+        """Appends an END record; the file is closed after the next group commit."""
+        if not self.closed:
+            self.append(bytes((END,)))
+            self.closed = True
+
+    def _take_pending(self) -> bytes:
+        pending = bytes(self._pending)
+        self._pending.clear()
+        return pending
+
+    def _write(self, data: bytes) -> None:
+        # Runs on the store's worker thread
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+class EventLogStore:
+    """
+    Owns the event logs of a directory and group-commits them.
+
+    Attributes:
+        directory (str): Directory holding one `<room_id>.log` file per room.
+        flush_interval (float): Seconds between group commits.
+        flush_bytes (int): Buffered bytes in one log that trigger an early commit.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_bytes: int = DEFAULT_FLUSH_BYTES,
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self._logs: Dict[str, EventLog] = {}
+        self._dirty: Dict[str, EventLog] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    def path_for(self, room_id: str) -> str:
+        """Returns the log file path of a room."""
+        return os.path.join(self.directory, f"{room_id}.log")
+
+    def open(self, room_id: str) -> EventLog:
+        """
+        Returns the log of a room, opening it for appending if needed.
+
+        A torn record left at the end of the file by a crash is cut off first.
+        """
+        log = self._logs.get(room_id)
+        if log is None or log.closed:
+            path = self.path_for(room_id)
+            _truncate_torn_tail(path)
+            log = self._logs[room_id] = EventLog(self, room_id, path)
+        return log
+
+    def log_paths(self) -> List[str]:
+        """Returns the paths of all log files in the directory."""
+        return sorted(
+            os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".log")
+        )
+
+    def start(self) -> None:
+        """Starts the group-commit task."""
+        if self._flusher is None:
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.get_running_loop().create_task(self._run())
+
+    def _mark_dirty(self, log: EventLog, pending_bytes: int) -> None:
+        self._dirty[log.room_id] = log
+        if pending_bytes >= self.flush_bytes and self._wakeup:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except OSError as e:
+                print(f"Event log flush failed: {e}")
+
+    async def flush(self) -> None:
+        """Writes and fsyncs every buffered record now."""
+        if not self._dirty:
+            return
+        batch = [(log, log._take_pending()) for log in self._dirty.values()]
+        self._dirty = {}
+        await asyncio.get_running_loop().run_in_executor(None, _commit, batch)
+        for log, _ in batch:
+            if log.closed and self._logs.get(log.room_id) is log:
+                del self._logs[log.room_id]
+
+    async def close(self) -> None:
+        """Commits everything buffered and stops the group-commit task."""
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        for log in self._logs.values():
+            log._file.close()
+        self._logs = {}
+
+
+def _commit(batch: List[Tuple[EventLog, bytes]]) -> None:
+    for log, data in batch:
+        if data:
+            log._write(data)
+        if log.closed:
+            log._file.close()
@@ -1,18 +1,60 @@
 # game.py
-from typing import List, Optional
+import random
+import time
+from typing import List, Optional, Tuple
 from player.Player import Player
 from deck.Deck import Deck
+from user.Broadcast import BroadcastResult, fan_out, SEND_TIMEOUT
+from game.StateSync import StateSync, player_view
+from game.EventLog import EventLog, encode_action, encode_deal
+from game.SeatRing import SeatRing
+from card.CardTable import CARD_NAMES, CLASSIC_DECK, COUNTESS, GUARD, KING, NO_CARD, OUTCOMES, PLAYED, PRINCE, TARGETED_CARDS
+from engine.Actions import action_index
+from engine.Knowledge import KnowledgeTracker
+from engine.RoundState import RoundState
+from monitoring.Metrics import ACTION_SECONDS, FAN_OUT_SECONDS, ROUNDS_FINISHED, ROUNDS_STARTED
+from monitoring.Tracing import span, traced
+
+# Action latency histogram of each card code
+_ACTION_SECONDS = [ACTION_SECONDS.labels(name) for name in CARD_NAMES]
 
 class Game:
     """
     Manages the Love Letter game logic.
     """
 
-    def __init__(self, players: List[Player]):
+    def __init__(
+        self,
+        players: List[Player],
+        rng: Optional[random.Random] = None,
+        event_log: Optional[EventLog] = None,
+    ):
         self.players = players
+        # Seat index of each player, used by the binary protocol
+        self.seats = {player.user.user_id: seat for seat, player in enumerate(players)}
+        # Seat index of each player name
+        self.name_seats = {player.user.name: seat for seat, player in enumerate(players)}
+        # Seats still in the round; change it through eliminate()
+        self.ring = SeatRing(len(players))
+        # (ID, player) pairs to broadcast to, built once
+        self.recipients = [(player.user.user_id, player) for player in players]
         self.ongoing = False
         self.current_player_index = 0
-        self.deck: Deck = Deck()
+        self.deck: Deck = Deck(rng=rng)
+        # View versions of each player who opted in to delta state sync
+        self.syncs = {player.user.user_id: StateSync() for player in players}
+        # Records every deal and action, see game.EventLog
+        self.event_log = event_log
+        # What each seat knows about the cards of the current round
+        self.knowledge: List[KnowledgeTracker] = []
+        # Outcome code of the card being resolved, taken from the messages it sends
+        self.last_outcome = PLAYED
+        # Turns started so far; a turn deadline is for one turn
+        self.turn = 0
+        # Rounds dealt so far
+        self.round = 0
+        # Legal moves and move numbers, shared with the bots and the engine
+        self.actions = action_index(len(players), CLASSIC_DECK)
         # TODO: Other initialization...
     
     def get_player(self, player_id: str) -> Optional[Player]:
@@ -25,10 +67,8 @@ class Game:
         Returns:
             Optional[Player]: The player if found, else None.
         """
-        for player in self.players:
-            if player.user.user_id == player_id:
-                return player
-        return None
+        seat = self.seats.get(player_id)
+        return None if seat is None else self.players[seat]
     
     def get_player_id_by_name(self, name: str) -> Optional[str]:
         """
@@ -40,16 +80,16 @@ class Game:
         Returns:
             Optional[str]: The player's ID if found, else None.
         """
-        for player in self.players:
-            if player.user.name == name:
-                return player.user.user_id
-        return None
+        seat = self.name_seats.get(name)
+        return None if seat is None else self.players[seat].user.user_id
 
     async def next_turn(self, player_for_turn: Optional[Player] = None):
         """
         Advances the game to the next player's turn, skipping inactive players.
         """
-        await self.check_end_conditions()
+        if await self.check_end_conditions():
+            # The next round has been dealt and its first player drew already
+            return
         next_player = player_for_turn if player_for_turn else self.find_next_player(self.player_in_turn())
         if next_player.is_active:
             # It's the next player's turn
@@ -60,13 +100,17 @@ class Game:
             })
             # Deactivate protection
             next_player.is_protected = False
+            self.turn += 1
             # Draw a card if the deck is not empty
             if self.deck.cards:
                 card = self.deck.draw()
                 next_player.hand.append(card)
+                if self.knowledge:
+                    self.knowledge[self.seats[next_player.user.user_id]].sync_hand([c.code for c in next_player.hand])
                 await next_player.send_message({
                     "type": "draw_card",
-                    "card_name": card.name
+                    "card_name": card.name,
+                    "legal_actions": self.legal_actions(next_player),
                 })
             else:
                 # No cards left to draw
@@ -91,16 +135,21 @@ class Game:
         Returns:
             Optional[Player]: The next active player, or None if no active players are left.
         """
-        index = self.players.index(player)
-        num_players = len(self.players)
-        for _ in range(num_players):
-            index = (index + 1) % num_players
-            next_player = self.players[index]
-            if next_player.is_active:
-                self.current_player_index = index
-                return next_player
-        return None  # No active players left
+        index = self.ring.next(self.seats[player.user.user_id])
+        if index < 0:
+            return None  # No active players left
+        self.current_player_index = index
+        return self.players[index]
 
+    def eliminate(self, player: Player) -> None:
+        """
+        Takes a player out of the round.
+
+        Args:
+            player (Player): The player to eliminate.
+        """
+        player.is_active = False
+        self.ring.remove(self.seats[player.user.user_id])
 
     def initialize_deck(self):
         """
@@ -112,19 +161,26 @@ class Game:
         """Initializes the game."""
         # Initialize deck
         self.initialize_deck()
+        self.round += 1
+        ROUNDS_STARTED.inc()
+        first_seat = self.seats[last_winners[0].user.user_id] if last_winners else 0
+        if self.event_log:
+            # The whole shuffled deck, so a replay can check that it deals the same cards
+            self.event_log.append(encode_deal(first_seat, self.deck.cards))
+        # The deck is always the classic one, with no cards burned
+        self.knowledge = [KnowledgeTracker(seat, len(self.players), CLASSIC_DECK) for seat in range(len(self.players))]
         # Initialize player states
+        self.ring.reset()
         for player in self.players:
             player.reset()
             await player.send_message({'type': 'game_start', 'message': 'The game has started!'})
         # Deal cards to players
         await self.deal_cards()
         # Determine who plays first
-        if last_winners:
-            self.current_player_index = self.players.index(last_winners[0])
-        else:
-            self.current_player_index = 0
+        self.current_player_index = first_seat
         await self.next_turn(player_for_turn=self.player_in_turn())
         self.ongoing = True
+        await self.sync_views()
 
 
     async def deal_cards(self) -> None:
@@ -132,6 +188,7 @@ class Game:
         for player in self.players:
             card = self.deck.draw()
             player.hand.append(card)
+            self.knowledge[self.seats[player.user.user_id]].sync_hand((card.code,))
             await player.send_message(
                 {
                     "type": "deal_card",
@@ -139,20 +196,44 @@ class Game:
                 }
             )
 
+    @traced("Game.handle_player_action")
     async def handle_player_action(self, player_id, played_card_index, target_info):
         """Handles a player's action in the game."""
+        started = time.perf_counter()
         player: Player = self.get_player(player_id)
         if not player:
             return
         if player != self.player_in_turn():
             await player.send_message({'type': 'error', 'message': 'It is not your turn.'})
             return
-        not_played_card_index = 1 - played_card_index
-        # print(f"Player {player.user.name} played card {player.hand[played_card_index].name}")
-        not_played_card = player.hand[not_played_card_index]
-        if not_played_card.name == "Countess" and (player.hand[played_card_index].name in ["King", "Prince"]):
-            await player.send_message({'type': 'error', 'message': 'You must play the Countess when you have a King or Prince.'})
+        seat = self.current_player_index
+        move = self.parse_action(player, played_card_index, target_info)
+        if move is None:
+            await player.send_message({
+                'type': 'error',
+                'message': self.illegal_reason(player, played_card_index),
+                'legal_actions': self.legal_actions(player),
+            })
             return
+        _, target, guess = move
+        target_info = self.target_info(target, guess)
+        # print(f"Player {player.user.name} played card {player.hand[played_card_index].name}")
+        not_played_card = player.hand[1 - played_card_index]
+
+        if self.event_log:
+            self.event_log.append(encode_action(seat, played_card_index, target_info))
+        # What the player and the target held, for the knowledge trackers
+        kept = not_played_card.code
+        if target == seat:
+            target_card = kept
+        elif target >= 0 and self.players[target].hand:
+            target_card = self.players[target].hand[0].code
+        else:
+            target_card = NO_CARD
+        self.last_outcome = PLAYED
+        # The card may end the round and deal the next one, with new trackers
+        trackers = self.knowledge
+        round_number = self.round
 
         played_card = player.play_card(played_card_index)
         self.deck.discard(played_card)
@@ -167,27 +248,182 @@ class Game:
         #     }
         # )
 
-        # Execute the card's effect
-        await played_card.play(self, player, target_info)
+        # Execute the card's effect; with no valid target it has none
+        if played_card.code in TARGETED_CARDS and target < 0:
+            await self.notify_players(
+                {
+                    "type": "play_card",
+                    "card": played_card.label,
+                    "actor_id": player.user.user_id,
+                    "outcome": "played",
+                    "message": f"{player.user.name} played {played_card.label}, but there was no one to target.",
+                }
+            )
+        else:
+            with span("Card.play", played_card.name):
+                await played_card.play(self, player, target_info)
+        for tracker in trackers:
+            # Eliminated hands are not shown in the live game
+            tracker.observe_action(seat, played_card.code, kept, target, target_card, guess, self.last_outcome, False)
+
+        # Proceed to the next turn, unless the card ended the round and the next one has begun
+        if self.round == round_number:
+            await self.next_turn()
+        await self.sync_views()
+        _ACTION_SECONDS[played_card.code].observe(time.perf_counter() - started)
+
+    def round_state(self) -> RoundState:
+        """
+        Returns the engine state of the current round.
+
+        Hidden cards are copied as they are; a bot only looks at what its seat can see.
+        """
+        state = RoundState(len(self.players))
+        hands = state.hands
+        for seat, player in enumerate(self.players):
+            if not player.is_active:
+                state.active &= ~(1 << seat)
+                continue
+            for slot, card in enumerate(player.hand[:2]):
+                hands[2 * seat + slot] = card.code
+            if player.is_protected:
+                state.protected |= 1 << seat
+        state.deck = bytearray(self.deck.cards)
+        state.discard_pile = bytearray(self.deck.discard_pile)
+        state.current = self.current_player_index
+        return state
 
-        # Proceed to the next turn
-        await self.next_turn()
+    def parse_action(self, player: Player, card_index, target_info: dict) -> Optional[Tuple[int, int, int]]:
+        """
+        Checks a player's action against the legal moves of their seat.
+
+        Args:
+            player (Player): The player in turn.
+            card_index: Index of the card to play, as received.
+            target_info (dict): 'target_player_id' and 'guessed_value', as received.
+
+        Returns:
+            Optional[Tuple[int, int, int]]: The move as (card index, target seat,
+                guess), with -1 for no target or guess, or None if it is not legal.
+        """
+        seat = self.seats[player.user.user_id]
+        if card_index not in (0, 1) or len(player.hand) < 2:
+            return None
+        target_id = target_info.get("target_player_id")
+        target = self.seats.get(target_id, -2) if target_id is not None else -1
+        guess = -1
+        if player.hand[card_index].code == GUARD and target >= 0:
+            try:
+                guess = int(target_info.get("guessed_value"))
+            except (TypeError, ValueError):
+                return None
+        if not self.actions.is_legal(self.round_state(), seat, card_index, target, guess):
+            return None
+        return card_index, target, guess
+
+    def illegal_reason(self, player: Player, card_index) -> str:
+        """Returns the error message for an action `parse_action` rejected."""
+        if card_index in (0, 1) and len(player.hand) >= 2:
+            played, kept = player.hand[card_index].code, player.hand[1 - card_index].code
+            if kept == COUNTESS and played in (KING, PRINCE):
+                return 'You must play the Countess when you have a King or Prince.'
+        return 'Illegal move.'
+
+    def target_info(self, target: int, guess: int) -> dict:
+        """Returns the target_info of a move, as `Card.play` expects it."""
+        target_info = {}
+        if target >= 0:
+            target_info["target_player_id"] = self.players[target].user.user_id
+        if guess >= 0:
+            target_info["guessed_value"] = guess
+        return target_info
+
+    def legal_actions(self, player: Player) -> List[dict]:
+        """
+        Returns the moves a player in turn may make.
+
+        Returns:
+            List[dict]: One {"card_index", ...target_info} entry per legal move.
+        """
+        if len(player.hand) < 2:
+            return []
+        seat = self.seats[player.user.user_id]
+        return [
+            {"card_index": card_index, **self.target_info(target, guess)}
+            for _, card_index, target, guess in self.actions.keyed_moves(self.round_state(), seat)
+        ]
+
+    async def sync_views(self) -> None:
+        """Sends every player who opted in to state sync the changes to their view."""
+        for player in self.players:
+            if getattr(player.user, "state_sync", False):
+                message = self.syncs[player.user.user_id].update(player_view(self, player))
+                if message:
+                    await player.send_message(message)
+
+    async def send_snapshot(self, player_id: str) -> None:
+        """Sends a player the full current view of the game."""
+        player = self.get_player(player_id)
+        if not player:
+            return
+        sync = self.syncs[player_id]
+        sync.update(player_view(self, player))
+        await player.send_message(sync.snapshot())
+
+    def hint(self, player_id: str) -> dict:
+        """
+        Returns what a player can expect from a Guard or a Baron against each opponent.
+
+        Returns:
+            dict: A "hint" message with, per active opponent, the best Guard guess
+                and its chance, and the chances of a Baron duel with each card in hand.
+        """
+        seat = self.seats[player_id]
+        tracker = self.knowledge[seat]
+        player = self.players[seat]
+        opponents = []
+        for other, opponent in enumerate(self.players):
+            if other == seat or not opponent.is_active:
+                continue
+            guess, chance = tracker.best_guard_guess(other)
+            opponents.append(
+                {
+                    "player_id": opponent.user.user_id,
+                    "guard_guess": guess,
+                    "guard_chance": chance,
+                    "baron_win": {card.name: tracker.baron_odds(other, card.code)[0] for card in player.hand},
+                }
+            )
+        return {"type": "hint", "opponents": opponents}
 
     async def notify_players(
-        self, message: dict, exclude_player_ids: Optional[set] = None
-    ):
+        self,
+        message: dict,
+        exclude_player_ids: Optional[set] = None,
+        timeout: float = SEND_TIMEOUT,
+    ) -> BroadcastResult:
         """
-        Sends a message to all players in the game.
+        Sends a message to all players in the game, concurrently.
 
         Args:
             message (dict): The message to send.
             exclude_player_ids (Optional[set]): Player IDs to exclude from receiving the message.
+            timeout (float): Seconds allowed for each player's send.
+
+        Returns:
+            BroadcastResult: Which players were slow or failed to receive the message.
         """
-        if exclude_player_ids is None:
-            exclude_player_ids = set()
-        for player in self.players:
-            if player.user.user_id not in exclude_player_ids:
-                await player.send_message(message)
+        outcome = message.get("outcome")
+        if outcome in OUTCOMES:
+            self.last_outcome = OUTCOMES.index(outcome)
+        recipients = self.recipients
+        if exclude_player_ids:
+            recipients = (recipient for recipient in recipients if recipient[0] not in exclude_player_ids)
+        started = time.perf_counter()
+        with span("Game.notify_players", message.get("type")):
+            result = await fan_out(recipients, message, timeout)
+        FAN_OUT_SECONDS.observe(time.perf_counter() - started)
+        return result
     
     async def prepare_next_round(self, winners: List[Player]):
         """
@@ -195,29 +431,34 @@ class Game:
         """
         await self.initialize(winners)
 
-    async def check_end_conditions(self):
+    async def check_end_conditions(self) -> bool:
         """
         Checks if the round has ended and handles the outcome.
+
+        Returns:
+            bool: Whether the round ended; the next one is then dealt already.
         """
-        active_players = [p for p in self.players if p.is_active]
-        if len(active_players) <= 1 or not self.deck.cards:
+        if len(self.ring) <= 1 or not self.deck.cards:
             # Round ends
-            winners = self.determine_winner()
+            ROUNDS_FINISHED.inc()
+            winners = await self.determine_winner()
             await self.notify_players(
                 {
                     "type": "round_end",
                     "message": "The round has ended.",
                     "winners": [p.user.name for p in winners],
+                    "winner_ids": [p.user.user_id for p in winners],
                 }
             )
             # Prepare for next round or end game
             await self.prepare_next_round(winners)
-            self.ongoing = False
+            return True
         self.ongoing = True
+        return False
 
     async def determine_winner(self) -> List[Player]:
         """Logic to determine the winner"""
-        active_players = [p for p in self.players if p.is_active]
+        active_players = [self.players[seat] for seat in self.ring]
         # Situation 1: Only 1 player left
         if len(active_players) == 1:
             return active_players
@@ -1,28 +1,298 @@
 # game_room.py
 
-from typing import List, Optional
+import asyncio
+import random
+from typing import Callable, Dict, Optional, Tuple
 from user.User import User
+from user.Broadcast import BroadcastResult, fan_out, SEND_TIMEOUT
 from game.Game import Game
+from game.EventLog import EventLog, EventLogStore, encode_start, seat_secret
+from game.TimerWheel import Timer, TimerWheel, timers
+from monitoring.Metrics import ERRORS
+from monitoring.Profiler import RoomProfiler
+from monitoring.Tracing import Trace, continue_trace, current_trace, tracer
 from player.Player import Player
 
+# Seconds a player has to make a move before a default one is played for them
+TURN_TIMEOUT = 60.0
+# Seconds a disconnected player keeps their seat before leaving the room
+DISCONNECT_GRACE = 30.0
+# Seconds an empty room is kept before it is closed
+EMPTY_ROOM_TTL = 30.0
+
 class GameRoom:
     """
     Represents a game room where users can join to play.
 
     Attributes:
         room_id (str): Unique identifier for the game room.
-        users (List[User]): List of users in the room.
+        users (Dict[str, User]): Users in the room by user ID, in joining order.
         game_instance (Optional[Game]): The game instance if the game has started.
+        inbox (asyncio.Queue): Client commands waiting for the room's actor task.
+        event_store (Optional[EventLogStore]): Where games are logged, if anywhere.
+        event_log (Optional[EventLog]): Log of the current game.
+        turn_timeout (float): Seconds before a default move is played for the player in turn.
+        disconnect_grace (float): Seconds a disconnected player keeps their seat.
+        empty_room_ttl (float): Seconds an empty room is kept before it is closed.
+        on_close (Optional[Callable[[GameRoom], None]]): Called when the room is closed.
+        closed (bool): Whether the room was closed; it then handles no more commands.
+        profiler (Optional[RoomProfiler]): The sampling profiler, while the room is profiled;
+            every command of a profiled room is traced.
     """
 
-    def __init__(self, room_id: str):
+    def __init__(
+        self,
+        room_id: str,
+        event_store: Optional[EventLogStore] = None,
+        timer_wheel: TimerWheel = timers,
+        turn_timeout: float = TURN_TIMEOUT,
+        disconnect_grace: float = DISCONNECT_GRACE,
+        empty_room_ttl: float = EMPTY_ROOM_TTL,
+        on_close: Optional[Callable[["GameRoom"], None]] = None,
+    ):
         self.room_id = room_id
-        self.users: List[User] = []
+        self.users: Dict[str, User] = {}
         self.game_instance: Optional[Game] = None
+        self.event_store = event_store
+        self.event_log: Optional[EventLog] = None
+        # (user, command, trace the command belongs to)
+        self.inbox: "asyncio.Queue[Tuple[Optional[User], dict, Optional[Trace]]]" = asyncio.Queue()
+        self._actor: Optional[asyncio.Task] = None
+        self.timer_wheel = timer_wheel
+        self.turn_timeout = turn_timeout
+        self.disconnect_grace = disconnect_grace
+        self.empty_room_ttl = empty_room_ttl
+        self.on_close = on_close
+        self.closed = False
+        # The turn the deadline is for, and its timer
+        self._timed_turn = 0
+        self._turn_timer: Optional[Timer] = None
+        # Grace timers of the disconnected users, by user ID
+        self._grace_timers: Dict[str, Timer] = {}
+        self._evict_timer: Optional[Timer] = None
+        self.profiler: Optional[RoomProfiler] = None
+        self._profile_timer: Optional[Timer] = None
+        self._profile_path: Optional[str] = None
+
+    def submit(self, user: Optional[User], command: dict) -> None:
+        """
+        Queues a client command for the room.
+
+        All room and game state is changed by a single actor task that handles
+        commands strictly in arrival order, so commands from different users never
+        interleave. The actor starts with the first command. Commands of the room's
+        own timers have no user. A closed room ignores commands. A command sent
+        during a sampled trace is handled as part of that trace.
+        """
+        if self.closed:
+            return
+        trace = current_trace()
+        self.inbox.put_nowait((user, command, trace.hand_off() if trace else None))
+        if self._actor is None:
+            self._actor = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        inbox = self.inbox
+        while True:
+            # Take everything queued so far and handle it as one batch
+            batch = [await inbox.get()]
+            while not inbox.empty():
+                batch.append(inbox.get_nowait())
+            for user, command, trace in batch:
+                command_type = command.get('type')
+                if trace is None and self.profiler:
+                    root = tracer.trace("GameRoom.handle_command", command_type, force=True)
+                else:
+                    root = continue_trace(trace, "GameRoom.handle_command", command_type)
+                profiler = self.profiler
+                if profiler:
+                    profiler.active = True
+                with root:
+                    try:
+                        await self.handle_command(user, command)
+                    except Exception as e:
+                        sender = user.user_id if user else "a timer"
+                        print(f"Error in room {self.room_id} handling {command_type} from {sender}: {e}")
+                        ERRORS.labels("room", type(e).__name__).inc()
+                if profiler:
+                    profiler.active = False
+                if self.closed:
+                    self._actor = None
+                    return
+            self._arm_turn_timer()
+
+    async def stop(self) -> None:
+        """Stops the actor task; commands still queued are dropped."""
+        actor = self._actor
+        if actor and not actor.done():
+            actor.cancel()
+            try:
+                await actor
+            except asyncio.CancelledError:
+                pass
+        self._actor = None
+
+    async def handle_command(self, user: Optional[User], command: dict) -> None:
+        """
+        Handles one client command; called only by the actor task.
+
+        Args:
+            user (Optional[User]): The user who sent the command, None for the room's timers.
+            command (dict): The command.
+        """
+        command_type = command.get('type')
+        if user is None:
+            await self.handle_timer(command)
+        elif command_type == 'join_room':
+            if user.user_id not in self.users:
+                await self.add_user(user)
+            await user.send_message({
+                'type': 'room_joined',
+                'room_id': self.room_id
+            })
+        elif command_type == 'leave_room':
+            if user.user_id in self.users:
+                await self.remove_user(user)
+                await user.send_message({
+                    'type': 'room_left',
+                    'room_id': self.room_id
+                })
+        elif command_type == 'disconnect':
+            if user.user_id in self.users:
+                game = self.game_instance
+                if game and game.ongoing and user.user_id in game.seats and self.disconnect_grace > 0:
+                    # Keep the seat for a while; turn deadlines play for the player meanwhile
+                    self._grace_timers[user.user_id] = self.timer_wheel.schedule(
+                        self.disconnect_grace, self.submit, user, {'type': 'grace_expired'}
+                    )
+                else:
+                    await self.remove_user(user)
+        elif command_type == 'reconnect':
+            # The user resumed their session: same User, so the seat is still theirs
+            grace_timer = self._grace_timers.pop(user.user_id, None)
+            if grace_timer:
+                grace_timer.cancel()
+            game = self.game_instance
+            if game and user.user_id in game.seats and user.user_id not in self.users:
+                # A seat of a recovered game, claimed back from a new connection
+                game.get_player(user.user_id).user = user
+                await self.add_user(user)
+            if command.get('snapshot') and game and user.user_id in game.seats:
+                await game.send_snapshot(user.user_id)
+        elif command_type == 'grace_expired':
+            if self._grace_timers.pop(user.user_id, None) and user.user_id in self.users:
+                await self.remove_user(user)
+        elif command_type == 'start_game':
+            await self.start_game()
+        elif command_type == 'play_card':
+            if self.game_instance:
+                target_info = {
+                    key: command[key] for key in ('target_player_id', 'guessed_value') if key in command
+                }
+                await self.game_instance.handle_player_action(
+                    user.user_id, int(command.get('card_index', 0)), target_info
+                )
+        elif command_type == 'ack':
+            game = self.game_instance
+            if game and user.user_id in game.syncs:
+                game.syncs[user.user_id].acknowledge(int(command.get('version', 0)))
+        elif command_type == 'sync_request':
+            if self.game_instance:
+                await self.game_instance.send_snapshot(user.user_id)
+        elif command_type == 'hint':
+            game = self.game_instance
+            if game and user.user_id in game.seats and game.knowledge:
+                await user.send_message(game.hint(user.user_id))
+
+    async def handle_timer(self, command: dict) -> None:
+        """Handles a command of one of the room's timers."""
+        command_type = command.get('type')
+        if command_type == 'turn_timeout':
+            game = self.game_instance
+            if game and game.turn == command.get('turn'):
+                await self.play_default_move(game)
+        elif command_type == 'evict':
+            self._evict_timer = None
+            if not self.users:
+                self.close()
+
+    async def play_default_move(self, game: Game) -> None:
+        """Plays the first legal move of the player in turn, who ran out of time."""
+        player = game.player_in_turn()
+        legal_actions = game.legal_actions(player)
+        if not legal_actions:
+            return
+        action = dict(legal_actions[0])
+        card_index = action.pop('card_index')
+        await self.broadcast({
+            'type': 'turn_timeout',
+            'player_id': player.user.user_id,
+            'message': f"{player.user.name} ran out of time; a move was played for them."
+        })
+        await game.handle_player_action(player.user.user_id, card_index, action)
+
+    def _arm_turn_timer(self) -> None:
+        """Starts the deadline of a new turn, replacing the previous turn's."""
+        game = self.game_instance
+        if self.closed or not game or game.turn == self._timed_turn or self.turn_timeout <= 0:
+            return
+        if self._turn_timer:
+            self._turn_timer.cancel()
+        self._timed_turn = game.turn
+        self._turn_timer = self.timer_wheel.schedule(
+            self.turn_timeout, self.submit, None, {'type': 'turn_timeout', 'turn': game.turn}
+        )
+
+    def start_profiling(self, seconds: float, path: str) -> None:
+        """
+        Samples the room's work with a RoomProfiler and traces all its commands
+        for some seconds, then writes the profile to a speedscope file.
+        """
+        if self.profiler:
+            return
+        self.profiler = RoomProfiler()
+        self.profiler.start()
+        self._profile_path = path
+        self._profile_timer = self.timer_wheel.schedule(seconds, self.stop_profiling)
+
+    def stop_profiling(self) -> Optional[str]:
+        """Stops the profiler early or on time; returns the file the profile was written to."""
+        profiler = self.profiler
+        if not profiler:
+            return None
+        self.profiler = None
+        if self._profile_timer:
+            self._profile_timer.cancel()
+            self._profile_timer = None
+        profiler.stop()
+        path = profiler.export(self._profile_path, f"room {self.room_id}")
+        print(f"Profile of room {self.room_id} written to {path}")
+        return path
+
+    def close(self) -> None:
+        """
+        Closes the room: its timers are cancelled, its game log is closed and the
+        actor stops after the current command.
+        """
+        self.closed = True
+        self.stop_profiling()
+        for timer in (self._turn_timer, self._evict_timer, *self._grace_timers.values()):
+            if timer:
+                timer.cancel()
+        self._grace_timers.clear()
+        self.game_instance = None
+        if self.event_log:
+            self.event_log.close()
+            self.event_log = None
+        if self.on_close:
+            self.on_close(self)
 
     async def add_user(self, user: User) -> None:
         """Adds a user to the room."""
-        self.users.append(user)
+        if self._evict_timer:
+            self._evict_timer.cancel()
+            self._evict_timer = None
+        self.users[user.user_id] = user
         user.current_room = self
         # Notify other users
         await self.broadcast({
@@ -33,8 +303,12 @@ class GameRoom:
 
     async def remove_user(self, user: User) -> None:
         """Removes a user from the room."""
-        self.users.remove(user)
-        user.current_room = None
+        del self.users[user.user_id]
+        grace_timer = self._grace_timers.pop(user.user_id, None)
+        if grace_timer:
+            grace_timer.cancel()
+        if user.current_room is self:
+            user.current_room = None
         # Notify other users
         await self.broadcast({
             'type': 'user_left',
@@ -42,20 +316,50 @@ class GameRoom:
         })
 
         if not self.users:
-            # Optionally, delete the room or handle cleanup
-            pass
+            if self.event_log:
+                # Nobody is left to play: the game does not need recovering
+                self.event_log.close()
+                self.event_log = None
+            if self._turn_timer:
+                self._turn_timer.cancel()
+                self._turn_timer = None
+            self.schedule_eviction()
+
+    def schedule_eviction(self) -> None:
+        """Closes the room after `empty_room_ttl` seconds, unless somebody joins it meanwhile."""
+        if not self._evict_timer:
+            self._evict_timer = self.timer_wheel.schedule(
+                self.empty_room_ttl, self.submit, None, {'type': 'evict'}
+            )
 
-    async def broadcast(self, message: dict, exclude_user_ids: Optional[set] = None) -> None:
-        """Sends a message to all users in the room."""
-        if exclude_user_ids is None:
-            exclude_user_ids = set()
-        for user in self.users:
-            if user.user_id not in exclude_user_ids:
-                await user.send_message(message)
+    async def broadcast(
+        self,
+        message: dict,
+        exclude_user_ids: Optional[set] = None,
+        timeout: float = SEND_TIMEOUT,
+    ) -> BroadcastResult:
+        """Sends a message to all users in the room concurrently, reporting slow or failed sends."""
+        recipients = self.users.items()
+        if exclude_user_ids:
+            recipients = (recipient for recipient in recipients if recipient[0] not in exclude_user_ids)
+        return await fan_out(recipients, message, timeout)
 
     async def start_game(self) -> None:
         """Starts a new game with the users in the room."""
         # Convert users to players
-        players = [Player(user) for user in self.users]
-        self.game_instance = Game(players)
-        await self.game_instance.start()
+        players = [Player(user) for user in self.users.values()]
+        rng = None
+        if self.event_store:
+            # A logged seed lets a replay reproduce every shuffle
+            seed = random.getrandbits(64)
+            rng = random.Random(seed)
+            self.event_log = self.event_store.open(self.room_id)
+            self.event_log.append(
+                encode_start(
+                    seed,
+                    self.room_id,
+                    [(user.user_id, user.name, seat_secret(user.session_token)) for user in self.users.values()],
+                )
+            )
+        self.game_instance = Game(players, rng, event_log=self.event_log)
+        await self.game_instance.initialize()
@@ -0,0 +1,146 @@
+# replay.py
+"""
+Rebuilds games from their event logs.
+
+The START record holds the seed of the game's random source, so replaying the
+logged actions through the normal game logic reproduces every shuffle; the
+logged DEAL records are only used to check that the replay did not diverge.
+Nothing is sent to anyone and nothing waits on a clock, so a replay runs as fast
+as the game logic itself.
+"""
+
+import random
+from typing import List, Optional
+from game.EventLog import (
+    ACTION,
+    DEAL,
+    END,
+    START,
+    decode_action,
+    decode_start,
+    read_records,
+)
+from game.Game import Game
+from player.Player import Player
+
+
+class ReplayError(Exception):
+    """Raised when a replay deals different cards than the logged game."""
+
+
+class ReplayUser:
+    """
+    Stands in for the user of a replayed seat until its client claims it back;
+    every message is discarded.
+
+    Attributes:
+        user_id (str): ID of the original user.
+        name (str): Name of the original user.
+        secret (str): Seat secret of the original user, see `EventLog.seat_secret`;
+            empty if the log has none.
+        current_room: Always None.
+    """
+
+    __slots__ = ("user_id", "name", "secret", "current_room")
+
+    def __init__(self, user_id: str, name: str, secret: str = ""):
+        self.user_id = user_id
+        self.name = name
+        self.secret = secret
+        self.current_room = None
+
+    async def send_message(self, message: dict) -> None:
+        pass
+
+    async def send_frame(self, frame) -> None:
+        pass
+
+
+class _DealRecorder:
+    """Event log stand-in that keeps the DEAL records a replayed game produces."""
+
+    __slots__ = ("deals",)
+
+    def __init__(self):
+        self.deals: List[bytes] = []
+
+    def append(self, payload: bytes) -> None:
+        if payload[0] == DEAL:
+            self.deals.append(payload)
+
+
+class ReplayResult:
+    """
+    A game rebuilt from an event log.
+
+    Attributes:
+        room_id (str): ID of the room.
+        seed (int): Seed of the game's random source.
+        game (Game): The game, in the state after the last logged action.
+        actions (int): Number of actions replayed.
+        finished (bool): Whether the log was closed, i.e. the room ended cleanly.
+    """
+
+    __slots__ = ("room_id", "seed", "game", "actions", "finished")
+
+    def __init__(self, room_id: str, seed: int, game: Game, actions: int, finished: bool):
+        self.room_id = room_id
+        self.seed = seed
+        self.game = game
+        self.actions = actions
+        self.finished = finished
+
+
+async def replay(data: bytes) -> Optional[ReplayResult]:
+    """
+    Replays the last game of an event log.
+
+    Args:
+        data (bytes): Contents of the log file; a torn tail is ignored.
+
+    Returns:
+        Optional[ReplayResult]: The rebuilt game, or None if no game was logged.
+
+    Raises:
+        ReplayError: If the replay dealt different cards than the logged game.
+    """
+    records = list(read_records(data))
+    # Only the last game of the room matters
+    start = None
+    for index, payload in enumerate(records):
+        if payload[0] == START:
+            start = index
+    if start is None:
+        return None
+    seed, room_id, seats = decode_start(records[start])
+    recorder = _DealRecorder()
+    players = [Player(ReplayUser(user_id, name, secret)) for user_id, name, secret in seats]
+    game = Game(players, rng=random.Random(seed), event_log=recorder)
+    await game.initialize()
+    logged_deals = []
+    actions = 0
+    finished = False
+    for payload in records[start + 1 :]:
+        kind = payload[0]
+        if kind == DEAL:
+            logged_deals.append(bytes(payload))
+        elif kind == ACTION:
+            seat, card_index, target_info = decode_action(payload)
+            try:
+                await game.handle_player_action(players[seat].user.user_id, card_index, target_info)
+            except Exception as e:
+                # The live game hit the same error and carried on, see GameRoom._run
+                print(f"Error replaying action {actions} of room {room_id}: {e}")
+            actions += 1
+        elif kind == END:
+            finished = True
+    if recorder.deals[: len(logged_deals)] != logged_deals:
+        raise ReplayError(f"Replay of room {room_id} diverged from its log")
+    game.event_log = None
+    return ReplayResult(room_id, seed, game, actions, finished)
+
+
+async def replay_file(path: str) -> Optional[ReplayResult]:
+    """Replays the last game of an event log file, see `replay`."""
+    with open(path, "rb") as file:
+        return await replay(file.read())
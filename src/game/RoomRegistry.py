@@ -0,0 +1,138 @@
+# room_registry.py
+"""
+Room placement for sharded deployments.
+
+Every room belongs to one worker process (shard), chosen from its ID by
+`shard_for_room`. A RoomRegistry records which rooms exist and on which shard,
+so any worker can tell a client where a room lives. Use InProcessRoomRegistry
+for a single process and SqliteRoomRegistry to share the registry between the
+workers of one box.
+"""
+
+import sqlite3
+import time
+import zlib
+from typing import Dict, List, Optional
+
+
+def shard_for_room(room_id: str, shard_count: int) -> int:
+    """
+    Returns the shard that owns a room.
+
+    Uses CRC-32 rather than hash(), which is salted differently in every process.
+    """
+    return zlib.crc32(room_id.encode()) % shard_count
+
+
+class RoomRegistry:
+    """
+    Interface of a registry of rooms and the shards hosting them.
+
+    Attributes:
+        shared (bool): Whether every shard sees the same registry, so that a
+            missing room is known to be missing everywhere.
+    """
+
+    shared = False
+
+    def register(self, room_id: str, shard: int) -> None:
+        """Records that a room exists on a shard."""
+        raise NotImplementedError
+
+    def unregister(self, room_id: str) -> None:
+        """Forgets a room."""
+        raise NotImplementedError
+
+    def lookup(self, room_id: str) -> Optional[int]:
+        """Returns the shard hosting a room, or None if the room does not exist."""
+        raise NotImplementedError
+
+    def rooms(self, shard: Optional[int] = None) -> List[str]:
+        """Returns the IDs of all rooms, or of the rooms on one shard."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Releases any resources held by the registry."""
+
+
+class InProcessRoomRegistry(RoomRegistry):
+    """A registry kept in a dict; only visible to the current process."""
+
+    shared = False
+
+    def __init__(self):
+        self._shards: Dict[str, int] = {}
+
+    def register(self, room_id: str, shard: int) -> None:
+        self._shards[room_id] = shard
+
+    def unregister(self, room_id: str) -> None:
+        self._shards.pop(room_id, None)
+
+    def lookup(self, room_id: str) -> Optional[int]:
+        return self._shards.get(room_id)
+
+    def rooms(self, shard: Optional[int] = None) -> List[str]:
+        if shard is None:
+            return list(self._shards)
+        return [room_id for room_id, owner in self._shards.items() if owner == shard]
+
+
+class SqliteRoomRegistry(RoomRegistry):
+    """
+    A registry stored in an SQLite database file shared by the workers of one box.
+
+    WAL mode lets every worker read while one writes; each call is one short
+    autocommitted statement.
+    """
+
+    shared = True
+
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS rooms ("
+            "room_id TEXT PRIMARY KEY, shard INTEGER NOT NULL, created REAL NOT NULL)"
+        )
+
+    def register(self, room_id: str, shard: int) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO rooms (room_id, shard, created) VALUES (?, ?, ?)",
+            (room_id, shard, time.time()),
+        )
+
+    def unregister(self, room_id: str) -> None:
+        self._connection.execute("DELETE FROM rooms WHERE room_id = ?", (room_id,))
+
+    def lookup(self, room_id: str) -> Optional[int]:
+        row = self._connection.execute("SELECT shard FROM rooms WHERE room_id = ?", (room_id,)).fetchone()
+        return row[0] if row else None
+
+    def rooms(self, shard: Optional[int] = None) -> List[str]:
+        if shard is None:
+            rows = self._connection.execute("SELECT room_id FROM rooms")
+        else:
+            rows = self._connection.execute("SELECT room_id FROM rooms WHERE shard = ?", (shard,))
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def create_registry(spec: str) -> RoomRegistry:
+    """
+    Creates a registry from a configuration string.
+
+    Args:
+        spec (str): "memory" for an in-process registry, or "sqlite:<path>".
+
+    Raises:
+        ValueError: If the specification is not recognized.
+    """
+    if spec == "memory":
+        return InProcessRoomRegistry()
+    if spec.startswith("sqlite:"):
+        return SqliteRoomRegistry(spec[len("sqlite:") :])
+    raise ValueError(f"Unknown room registry: {spec}")
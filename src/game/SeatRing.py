@@ -0,0 +1,65 @@
+# seat_ring.py
+
+from typing import Iterator, List
+
+
+class SeatRing:
+    """
+    The active seats of a round as a circular doubly linked list.
+
+    Removing a seat unlinks it in O(1). A removed seat keeps its links, so the next
+    active seat after it is still found by following them, which skips each removed
+    seat at most once per removal.
+
+    Attributes:
+        size (int): Number of seats at the table.
+        count (int): Number of active seats.
+        active (List[bool]): Whether each seat is active.
+    """
+
+    __slots__ = ("size", "count", "active", "_next", "_prev")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.reset()
+
+    def reset(self) -> None:
+        """Makes every seat active again."""
+        size = self.size
+        self.count = size
+        self.active: List[bool] = [True] * size
+        self._next = [(seat + 1) % size for seat in range(size)]
+        self._prev = [(seat - 1) % size for seat in range(size)]
+
+    def remove(self, seat: int) -> bool:
+        """Unlinks a seat; returns False if it was not active."""
+        if not self.active[seat]:
+            return False
+        following, preceding = self._next[seat], self._prev[seat]
+        self._next[preceding] = following
+        self._prev[following] = preceding
+        self.active[seat] = False
+        self.count -= 1
+        return True
+
+    def next(self, seat: int) -> int:
+        """
+        Returns the first active seat after a seat, the seat itself if it is the only
+        active one, or -1 if no seat is active.
+        """
+        if not self.count:
+            return -1
+        following = self._next[seat]
+        while not self.active[following]:
+            following = self._next[following]
+        return following
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, seat: int) -> bool:
+        return self.active[seat]
+
+    def __iter__(self) -> Iterator[int]:
+        """Yields the active seats in seat order."""
+        return (seat for seat in range(self.size) if self.active[seat])
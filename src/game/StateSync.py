@@ -0,0 +1,141 @@
+# state_sync.py
+"""
+Versioned per-player views of a game, synchronized with deltas.
+
+After every state change the server computes each player's view and sends a
+`state_delta` against the last version that player acknowledged, so a lost or
+late acknowledgement only makes the next delta a little larger. Clients ack with
+{"type": "ack", "version": n} and may ask for a full `state_snapshot` at any time
+with {"type": "sync_request"}.
+
+Delta message:
+    {"type": "state_delta", "base": 3, "version": 5,
+     "set": {"turn": "...", "deck_count": 9}, "append": {"discard_pile": ["Guard"]}}
+A client applies `set` and `append` to its copy of version `base` to get `version`.
+"""
+
+from typing import Dict, Optional, TYPE_CHECKING
+from card.CardTable import CARD_NAMES
+
+if TYPE_CHECKING:
+    from game.Game import Game
+    from player.Player import Player
+
+# Versions kept while waiting for an ack; a client lagging further behind gets a snapshot.
+MAX_PENDING_VERSIONS = 32
+
+
+def player_view(game: "Game", player: "Player") -> dict:
+    """
+    Returns what a player can see of the game.
+
+    Args:
+        game (Game): The game.
+        player (Player): The player whose view is built.
+
+    Returns:
+        dict: The player's hand, the discard pile, the deck count, whose turn it is,
+            the player's legal moves if it is theirs, and the active flag,
+            protection flag and score of every seat.
+    """
+    players = game.players
+    in_turn = game.player_in_turn() if players else None
+    return {
+        "hand": [card.name for card in player.hand],
+        "discard_pile": [CARD_NAMES[code] for code in game.deck.discard_pile],
+        "deck_count": len(game.deck.cards),
+        "turn": in_turn.user.user_id if in_turn else None,
+        "legal_actions": game.legal_actions(player) if in_turn is player else [],
+        "active": [p.is_active for p in players],
+        "protected": [p.is_protected for p in players],
+        "scores": [p.score for p in players],
+    }
+
+
+def diff_views(base: dict, view: dict) -> dict:
+    """
+    Returns the changes that turn `base` into `view`.
+
+    Lists that only grew are sent as their new tail under "append"; every other
+    changed key is sent whole under "set".
+    """
+    changed: Dict[str, object] = {}
+    appended: Dict[str, list] = {}
+    for key, value in view.items():
+        old = base.get(key)
+        if old == value:
+            continue
+        if isinstance(value, list) and isinstance(old, list) and old and value[: len(old)] == old:
+            appended[key] = value[len(old) :]
+        else:
+            changed[key] = value
+    delta: Dict[str, object] = {}
+    if changed:
+        delta["set"] = changed
+    if appended:
+        delta["append"] = appended
+    return delta
+
+
+class StateSync:
+    """
+    Tracks the view versions sent to one player and the last one they acknowledged.
+
+    Attributes:
+        version (int): Latest version of the player's view.
+        acked_version (int): Latest version the player acknowledged, 0 for none.
+    """
+
+    __slots__ = ("version", "acked_version", "_acked_view", "_latest_view", "_pending")
+
+    def __init__(self):
+        self.version = 0
+        self.acked_version = 0
+        self._acked_view: dict = {}
+        self._latest_view: Optional[dict] = None
+        self._pending: Dict[int, dict] = {}
+
+    def update(self, view: dict) -> Optional[dict]:
+        """
+        Records a new view of the game.
+
+        Returns:
+            Optional[dict]: The message to send: a delta against the acknowledged
+                version, a snapshot if the player lags too far behind, or None if
+                nothing changed.
+        """
+        if view == self._latest_view:
+            return None
+        self.version += 1
+        self._latest_view = view
+        self._pending[self.version] = view
+        if len(self._pending) > MAX_PENDING_VERSIONS:
+            return self.snapshot()
+        return {
+            "type": "state_delta",
+            "base": self.acked_version,
+            "version": self.version,
+            **diff_views(self._acked_view, view),
+        }
+
+    def acknowledge(self, version: int) -> None:
+        """Marks a version as received; older pending versions are dropped."""
+        view = self._pending.get(version)
+        if view is None or version <= self.acked_version:
+            return
+        self.acked_version = version
+        self._acked_view = view
+        self._pending = {v: pending for v, pending in self._pending.items() if v > version}
+
+    def snapshot(self) -> dict:
+        """
+        Returns the full latest view; the player's base becomes that version.
+
+        Pending versions are dropped: later deltas are computed against the snapshot.
+        """
+        view = self._latest_view if self._latest_view is not None else {}
+        self.acked_version = self.version
+        self._acked_view = view
+        self._pending = {}
+        return {"type": "state_snapshot", "version": self.version, "state": view}
+
@@ -0,0 +1,169 @@
+# timer_wheel.py
+"""
+A hierarchical timer wheel shared by every room of the process.
+
+Turn deadlines, disconnect grace periods and empty-room eviction are all timers
+on the same wheel. Time advances in ticks; the wheel has LEVELS levels of SLOTS
+slots each, a slot of level L spanning SLOTS**L ticks. A timer is put in the
+lowest level whose range reaches its deadline, and when the lower levels wrap
+around, the current slot of the level above is cascaded down. Scheduling and
+cancelling are O(1), and each timer is moved at most once per level, so hundreds
+of thousands of timers cost one set entry each and a single driver task, rather
+than a task or a `call_later` handle apiece.
+
+The driver task only runs while timers are pending. Callbacks are plain functions
+called from it; work that needs a room's state should be submitted to the room.
+"""
+
+import asyncio
+import math
+from typing import Callable, List, Optional, Set
+from monitoring.Metrics import ERRORS
+
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS
+SLOT_MASK = SLOTS - 1
+LEVELS = 4
+# Seconds per tick
+DEFAULT_TICK = 0.1
+
+
+class Timer:
+    """
+    A scheduled callback; cancel it with `cancel`.
+
+    Attributes:
+        expires (int): Tick at which the callback runs.
+        callback (Callable): What to call.
+        args (tuple): Arguments of the callback.
+    """
+
+    __slots__ = ("wheel", "expires", "callback", "args", "bucket")
+
+    def __init__(self, wheel: "TimerWheel", expires: int, callback: Callable, args: tuple):
+        self.wheel = wheel
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+        # The slot holding the timer, None once it ran or was cancelled
+        self.bucket: Optional[Set["Timer"]] = None
+
+    @property
+    def pending(self) -> bool:
+        return self.bucket is not None
+
+    def cancel(self) -> bool:
+        """Cancels the timer; returns False if it already ran or was cancelled."""
+        bucket = self.bucket
+        if bucket is None:
+            return False
+        bucket.discard(self)
+        self.bucket = None
+        self.wheel.count -= 1
+        return True
+
+
+class TimerWheel:
+    """
+    Timers in a hierarchy of slot rings, advanced by one asyncio task.
+
+    Attributes:
+        tick (float): Seconds per tick.
+        ticks (int): Ticks elapsed.
+        count (int): Pending timers.
+    """
+
+    __slots__ = ("tick", "ticks", "count", "_levels", "_origin", "_task")
+
+    def __init__(self, tick: float = DEFAULT_TICK):
+        self.tick = tick
+        self.ticks = 0
+        self.count = 0
+        self._levels: List[List[Set[Timer]]] = [[set() for _ in range(SLOTS)] for _ in range(LEVELS)]
+        # Loop time of tick 0, moved forward whenever the driver restarts after idling
+        self._origin = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def schedule(self, delay: float, callback: Callable, *args) -> Timer:
+        """
+        Calls `callback(*args)` after a delay, rounded up to whole ticks.
+
+        Starts the driver task if it is not running; when called outside an event
+        loop, the wheel must be driven with `advance`.
+        """
+        timer = Timer(self, self.ticks + max(1, math.ceil(delay / self.tick)), callback, args)
+        self._place(timer)
+        self.count += 1
+        if self._task is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return timer
+            self._origin = loop.time() - self.ticks * self.tick
+            self._task = loop.create_task(self._run())
+        return timer
+
+    def _place(self, timer: Timer) -> None:
+        expires = timer.expires
+        ticks = self.ticks
+        for level in range(LEVELS):
+            shift = level * SLOT_BITS
+            if (expires >> shift) - (ticks >> shift) < SLOTS:
+                break
+        else:
+            # Further out than the wheel reaches: park in the last slot, cascaded in time
+            shift = (LEVELS - 1) * SLOT_BITS
+            expires = ((ticks >> shift) + SLOT_MASK) << shift
+        bucket = self._levels[level][(expires >> shift) & SLOT_MASK]
+        bucket.add(timer)
+        timer.bucket = bucket
+
+    def advance(self, ticks: int = 1) -> int:
+        """Moves time forward, running the timers that fall due; returns how many ran."""
+        fired = 0
+        levels = self._levels
+        for _ in range(ticks):
+            self.ticks += 1
+            now = self.ticks
+            # Cascade from the highest level that wraps around now, down to level 1
+            level = 0
+            while level < LEVELS - 1 and (now >> (level * SLOT_BITS)) & SLOT_MASK == 0:
+                level += 1
+            for upper in range(level, 0, -1):
+                index = (now >> (upper * SLOT_BITS)) & SLOT_MASK
+                due = levels[upper][index]
+                levels[upper][index] = set()
+                for timer in due:
+                    self._place(timer)
+            index = now & SLOT_MASK
+            due = levels[0][index]
+            levels[0][index] = set()
+            while due:
+                timer = due.pop()
+                timer.bucket = None
+                self.count -= 1
+                fired += 1
+                try:
+                    timer.callback(*timer.args)
+                except Exception as e:
+                    print(f"Error in timer callback {timer.callback}: {e}")
+                    ERRORS.labels("timer", type(e).__name__).inc()
+        return fired
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while self.count:
+                await asyncio.sleep(self._origin + (self.ticks + 1) * self.tick - loop.time())
+                due = int((loop.time() - self._origin) / self.tick)
+                if due > self.ticks:
+                    self.advance(due - self.ticks)
+        finally:
+            self._task = None
+
+
+# The wheel shared by the rooms of this process
+timers = TimerWheel()
@@ -0,0 +1,353 @@
+# loadtest.py
+"""
+Load test of one server worker with simulated websocket clients.
+
+Every simulated room connects its players, creates and joins the room over the
+JSON protocol, starts the game and plays a number of rounds: a client whose turn
+it is (it received a draw_card message) answers with one of the legal actions the
+message lists, chosen at random. The server is started on localhost in a
+subprocess, run in this process, or reached at a given URL.
+
+Reported: websocket connection setup time, request latency histograms per
+command, rounds and messages per second, error messages by text, rooms that
+stalled, and the server's peak resident set size. The run fails, with exit status
+1, if the server sent any error or a room stalled or failed, so the harness can
+gate releases.
+
+Usage:
+    python loadtest.py --rooms 250 --players 4 --rounds 3 [--in-process | --url ws://host:port/ws]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+import websockets
+
+# The message types that answer each command; latency is measured up to the first one
+RESPONSES: Dict[str, frozenset] = {
+    "create_room": frozenset({"room_created"}),
+    "join_room": frozenset({"room_joined"}),
+    "start_game": frozenset({"game_start"}),
+    "play_card": frozenset({"play_card", "player_eliminated", "next_turn", "round_end", "error"}),
+    "leave_room": frozenset({"room_left"}),
+}
+
+# Histogram buckets per doubling of latency
+BUCKETS_PER_OCTAVE = 4
+
+
+class Histogram:
+    """
+    Log-scale latency histogram; each bucket spans a quarter of a doubling.
+
+    Attributes:
+        buckets (Dict[int, int]): Sample count by bucket number.
+        count (int): Number of samples.
+        total (float): Sum of the samples, in seconds.
+        max (float): Largest sample, in seconds.
+    """
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Records a sample."""
+        bucket = math.floor(math.log2(max(seconds, 1e-6)) * BUCKETS_PER_OCTAVE)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """Returns the upper bound of the bucket holding a percentile, in seconds."""
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        """Returns a summary in milliseconds, with the bucket counts keyed by their upper bound."""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": round(1000 * self.total / self.count, 3),
+            "p50_ms": round(1000 * self.percentile(0.5), 3),
+            "p90_ms": round(1000 * self.percentile(0.9), 3),
+            "p99_ms": round(1000 * self.percentile(0.99), 3),
+            "max_ms": round(1000 * self.max, 3),
+            "buckets": {
+                f"<{1000 * 2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE):.3g}ms": count
+                for bucket, count in sorted(self.buckets.items())
+            },
+        }
+
+
+class Stats:
+    """What every simulated client observed."""
+
+    __slots__ = ("connect", "latency", "rounds", "messages", "errors", "stalled", "failed")
+
+    def __init__(self):
+        self.connect = Histogram()
+        self.latency: Dict[str, Histogram] = {command: Histogram() for command in RESPONSES}
+        self.rounds = 0
+        self.messages = 0
+        self.errors: Dict[str, int] = {}
+        self.stalled = 0
+        self.failed = 0
+
+
+class Client:
+    """
+    One simulated player: a websocket connection and a task reading from it.
+
+    Attributes:
+        stats (Stats): Where observations are recorded.
+        rng (random.Random): Random source of the bot's choices.
+        room_id (Optional[str]): The room, once created or joined.
+        rounds (int): round_end messages received.
+        progress (float): Time of the last message received.
+    """
+
+    __slots__ = ("stats", "rng", "room_id", "rounds", "progress", "_websocket", "_pending", "_events", "_reader")
+
+    def __init__(self, stats: Stats, rng: random.Random):
+        self.stats = stats
+        self.rng = rng
+        self.room_id: Optional[str] = None
+        self.rounds = 0
+        self.progress = time.perf_counter()
+        self._websocket = None
+        # Command sent and not answered yet, with its send time
+        self._pending: Optional[tuple] = None
+        self._events: Dict[str, asyncio.Event] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    async def connect(self, url: str) -> None:
+        started = time.perf_counter()
+        self._websocket = await websockets.connect(url, max_queue=None)
+        self.stats.connect.add(time.perf_counter() - started)
+        self._reader = asyncio.get_running_loop().create_task(self._read())
+
+    async def send(self, command: dict) -> None:
+        self._pending = (command["type"], time.perf_counter())
+        await self._websocket.send(json.dumps(command))
+
+    def event(self, message_type: str) -> asyncio.Event:
+        """Returns an event set when a message of a type arrives."""
+        return self._events.setdefault(message_type, asyncio.Event())
+
+    async def _read(self) -> None:
+        stats = self.stats
+        try:
+            async for text in self._websocket:
+                now = self.progress = time.perf_counter()
+                message = json.loads(text)
+                message_type = message.get("type")
+                stats.messages += 1
+                pending = self._pending
+                if pending and message_type in RESPONSES[pending[0]]:
+                    stats.latency[pending[0]].add(now - pending[1])
+                    self._pending = None
+                if message_type == "room_created":
+                    self.room_id = message["room_id"]
+                elif message_type == "round_end":
+                    self.rounds += 1
+                elif message_type == "error":
+                    error = message.get("message", "")
+                    stats.errors[error] = stats.errors.get(error, 0) + 1
+                    if message.get("legal_actions"):
+                        await self._play(message["legal_actions"])
+                elif message_type == "draw_card" and message.get("legal_actions"):
+                    await self._play(message["legal_actions"])
+                self.event(message_type).set()
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _play(self, legal_actions: List[dict]) -> None:
+        action = self.rng.choice(legal_actions)
+        await self.send({"type": "play_card", **action})
+
+    async def close(self) -> None:
+        if self._websocket is not None:
+            await self._websocket.close()
+        if self._reader is not None:
+            await self._reader
+
+
+async def play_room(index: int, url: str, args, stats: Stats) -> None:
+    """Plays one room from connection to the last round."""
+    rng = random.Random(f"{args.seed}/{index}")
+    clients = [Client(stats, rng) for _ in range(args.players)]
+    try:
+        for client in clients:
+            await client.connect(url)
+        host = clients[0]
+        await host.send({"type": "create_room"})
+        await asyncio.wait_for(host.event("room_created").wait(), args.stall_timeout)
+        for client in clients[1:]:
+            await client.send({"type": "join_room", "room_id": host.room_id})
+            await asyncio.wait_for(client.event("room_joined").wait(), args.stall_timeout)
+        await host.send({"type": "start_game"})
+        while host.rounds < args.rounds:
+            await asyncio.sleep(0.05)
+            if time.perf_counter() - max(client.progress for client in clients) > args.stall_timeout:
+                stats.stalled += 1
+                break
+        stats.rounds += host.rounds
+        for client in clients:
+            await client.send({"type": "leave_room"})
+        for client in clients:
+            await asyncio.wait_for(client.event("room_left").wait(), args.stall_timeout)
+    except (OSError, asyncio.TimeoutError, websockets.WebSocketException):
+        stats.failed += 1
+    finally:
+        for client in clients:
+            await client.close()
+
+
+def rss_bytes(pid: int) -> int:
+    """Returns the resident set size of a process, from /proc; 0 where that is unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+async def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run(args) -> dict:
+    """Runs the load test and returns its report."""
+    stats = Stats()
+    server_process = None
+    server_task = None
+    pid = None
+    url = args.url
+    if not url:
+        port = free_port()
+        url = f"ws://127.0.0.1:{port}/ws"
+        if args.in_process:
+            import uvicorn
+            from server import app
+
+            server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+            server_task = asyncio.get_running_loop().create_task(server.serve())
+            pid = os.getpid()
+        else:
+            server_process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stdout=subprocess.DEVNULL,
+            )
+            pid = server_process.pid
+        await wait_for_port(port)
+    elif args.server_pid:
+        pid = args.server_pid
+
+    peak_rss = rss_bytes(pid) if pid else 0
+    started = time.perf_counter()
+    try:
+        rooms = []
+        for index in range(args.rooms):
+            rooms.append(asyncio.get_running_loop().create_task(play_room(index, url, args, stats)))
+            if args.ramp:
+                await asyncio.sleep(args.ramp / args.rooms)
+        pending = set(rooms)
+        while pending:
+            _, pending = await asyncio.wait(pending, timeout=0.5)
+            if pid:
+                peak_rss = max(peak_rss, rss_bytes(pid))
+    finally:
+        elapsed = time.perf_counter() - started
+        if server_task:
+            server.should_exit = True
+            await server_task
+        if server_process:
+            server_process.terminate()
+            server_process.wait()
+
+    return {
+        "url": url,
+        "rooms": args.rooms,
+        "players": args.players,
+        "seconds": round(elapsed, 3),
+        "rounds": stats.rounds,
+        "rounds_per_second": round(stats.rounds / elapsed, 2),
+        "messages_per_second": round(stats.messages / elapsed, 1),
+        "errors": stats.errors,
+        "stalled_rooms": stats.stalled,
+        "failed_rooms": stats.failed,
+        "server_peak_rss_mb": round(peak_rss / 2**20, 1) if pid else None,
+        "passed": not stats.errors and not stats.stalled and not stats.failed,
+        "connect": stats.connect.to_dict(),
+        "latency": {command: histogram.to_dict() for command, histogram in stats.latency.items()},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test a server worker with simulated clients.")
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds each room plays.")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Seconds over which rooms are started.")
+    parser.add_argument("--stall-timeout", type=float, default=10.0, help="Seconds without messages before a room is given up.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", default=None, help="Server to test; a local one is started if unset.")
+    parser.add_argument("--server-pid", type=int, default=None, help="Process of the --url server, for its RSS.")
+    parser.add_argument("--in-process", action="store_true", help="Run the local server in this process.")
+    args = parser.parse_args()
+
+    if args.in_process:
+        # The server logs every connection; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = asyncio.run(run(args))
+    else:
+        report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    if not report["passed"]:
+        print(
+            f"Load test failed: {sum(report['errors'].values())} errors, "
+            f"{report['stalled_rooms']} stalled rooms, {report['failed_rooms']} failed rooms",
+            file=sys.stderr,
+        )
+        sys.exit(1)
@@ -0,0 +1,232 @@
+# metrics.py
+"""
+Counters, gauges and histograms, rendered in the Prometheus text format.
+
+Recording is meant to stay on in production: the server runs on one event loop,
+so a metric is updated with plain attribute arithmetic, without locks. A labelled
+metric hands out one child per label value, created on first use and cached, so
+hot paths look their child up once (or keep it) and recording allocates nothing.
+Gauges of sizes the server already tracks, such as the number of rooms, take a
+function that is only called when the metrics are scraped.
+
+The server's metrics are defined at the bottom of this module and exposed at
+GET /metrics.
+"""
+
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds, in seconds, of the default latency buckets
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    """
+    A metric family: the metric itself if it has no labels, else its children.
+
+    Attributes:
+        name (str): Metric name.
+        help (str): One-line description.
+        label_names (Tuple[str, ...]): Names of the labels, in order.
+    """
+
+    kind = "untyped"
+
+    __slots__ = ("name", "help", "label_names", "label_values", "_children")
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = (), label_values: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.label_values = label_values
+        self._children: Dict[Tuple[str, ...], "Metric"] = {}
+
+    def labels(self, *values) -> "Metric":
+        """Returns the child of some label values, in `label_names` order."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.label_names):
+                raise ValueError(f"{self.name} takes labels {self.label_names}")
+            child = self._children[key] = self._child(key)
+        return child
+
+    def _child(self, values: Tuple[str, ...]) -> "Metric":
+        return type(self)(self.name, self.help, self.label_names, values)
+
+    def _series(self) -> List["Metric"]:
+        return list(self._children.values()) if self.label_names else [self]
+
+    def render(self) -> List[str]:
+        """Returns the lines of the metric in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for series in self._series():
+            lines.extend(series._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """A count that only goes up."""
+
+    kind = "counter"
+
+    __slots__ = ("value",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def _samples(self) -> List[str]:
+        labels = _format_labels(self.label_names, self.label_values)
+        return [f"{self.name}{labels} {_format_value(self.value)}"]
+
+
+class Gauge(Metric):
+    """A value that goes up and down, or is read from a function when scraped."""
+
+    kind = "gauge"
+
+    __slots__ = ("value", "function")
+
+    def __init__(self, *args, function: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.value = 0.0
+        self.function = function
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def _samples(self) -> List[str]:
+        value = self.function() if self.function else self.value
+        return [f"{self.name}{_format_labels(self.label_names, self.label_values)} {_format_value(value)}"]
+
+
+class Histogram(Metric):
+    """
+    Observations counted in buckets of fixed upper bounds.
+
+    Attributes:
+        bounds (Tuple[float, ...]): Upper bounds of the buckets, ascending.
+        counts (List[int]): Observations per bucket, the last one for above every bound.
+        sum (float): Sum of the observations.
+    """
+
+    kind = "histogram"
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def _child(self, values: Tuple[str, ...]) -> "Histogram":
+        return Histogram(self.name, self.help, self.label_names, values, buckets=self.bounds)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def _samples(self) -> List[str]:
+        names, values = self.label_names, self.label_values
+        lines = []
+        total = 0
+        for bound, count in zip((*self.bounds, math.inf), self.counts):
+            total += count
+            labels = _format_labels(names, values, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {total}")
+        labels = _format_labels(names, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(self.sum)}")
+        lines.append(f"{self.name}_count{labels} {total}")
+        return lines
+
+
+class Registry:
+    """The metrics of a process, by name."""
+
+    __slots__ = ("metrics",)
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Adds a metric; a metric of the same name is replaced."""
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(
+        self, name: str, help: str, labels: Sequence[str] = (), function: Optional[Callable[[], float]] = None
+    ) -> Gauge:
+        return self.register(Gauge(name, help, labels, function=function))
+
+    def histogram(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets=buckets))
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# The server's metrics; the gauges of users and rooms get their functions from the server
+ACTIVE_USERS = registry.gauge("love_letter_active_users", "Connected users.")
+ROOMS = registry.gauge("love_letter_rooms", "Rooms hosted by this worker.")
+ROUNDS_STARTED = registry.counter("love_letter_rounds_started_total", "Rounds dealt.")
+ROUNDS_FINISHED = registry.counter("love_letter_rounds_finished_total", "Rounds that ended.")
+ACTION_SECONDS = registry.histogram(
+    "love_letter_action_seconds", "Time to handle a played card, by card.", ("card",)
+)
+FAN_OUT_SECONDS = registry.histogram("love_letter_fan_out_seconds", "Time to send a game event to every player.")
+OUTBOUND_MESSAGES = registry.counter(
+    "love_letter_outbound_messages_total", "Messages written to websockets, by protocol.", ("protocol",)
+)
+OUTBOUND_BYTES = registry.counter(
+    "love_letter_outbound_bytes_total", "Bytes written to websockets (characters for JSON), by protocol.", ("protocol",)
+)
+ERRORS = registry.counter("love_letter_errors_total", "Errors caught, by where and exception type.", ("source", "type"))
@@ -0,0 +1,128 @@
+# profiler.py
+"""
+A sampling profiler for the work of one room.
+
+A background thread wakes up every `interval` seconds and, while the room is
+handling a command (`active`), records the Python stack of the event loop's
+thread. The samples cover the whole time the command takes, not only the room's
+own code: the fan-out tasks it waits for, the socket writes, and the loop
+waiting in `select` all show up, as does work of other rooms that runs while the
+command awaits. The samples are written as a speedscope sampled profile, which
+also shows them as a flame graph.
+
+The sampling thread needs the GIL to look at the loop's thread, and a busy loop
+thread only hands it over every `sys.getswitchinterval()` seconds (5 ms by
+default), or when it goes idle in `select`. While profiling, the switch interval
+is therefore lowered to a fraction of the sample interval, so samples land inside
+the work and not just at its idle points.
+
+Nothing runs while no room is profiled.
+"""
+
+import json
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Seconds between samples
+DEFAULT_INTERVAL = 0.001
+
+# (function, file, first line) of each frame, outermost first
+Stack = Tuple[Tuple[str, str, int], ...]
+
+
+class RoomProfiler:
+    """
+    Samples the event loop thread while it is switched on with `active`.
+
+    Attributes:
+        interval (float): Seconds between samples.
+        active (bool): Whether the profiled work is in progress; set by the room.
+        samples (Dict[Stack, int]): Sample count of each stack.
+        taken (int): Samples recorded.
+    """
+
+    __slots__ = ("interval", "active", "samples", "taken", "_thread_id", "_stop", "_thread", "_switch_interval")
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.active = False
+        self.samples: Dict[Stack, int] = {}
+        self.taken = 0
+        self._thread_id = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._switch_interval = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Starts sampling the calling thread, which runs the event loop."""
+        self._thread_id = threading.get_ident()
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 5))
+        self._thread = threading.Thread(target=self._sample, name="room-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread = self._thread
+        if thread:
+            self._stop.set()
+            thread.join()
+            self._thread = None
+            sys.setswitchinterval(self._switch_interval)
+
+    def _sample(self) -> None:
+        thread_id = self._thread_id
+        samples = self.samples
+        while not self._stop.wait(self.interval):
+            if not self.active:
+                continue
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            key = tuple(reversed(stack))
+            samples[key] = samples.get(key, 0) + 1
+            self.taken += 1
+
+    def export(self, path: str, name: str = "room") -> str:
+        """Writes the samples as a speedscope sampled profile; returns the path."""
+        frames: List[dict] = []
+        frame_indexes: Dict[Tuple[str, str, int], int] = {}
+        stacks = []
+        weights = []
+        for stack, count in self.samples.items():
+            indexes = []
+            for function, filename, line in stack:
+                key = (function, filename, line)
+                index = frame_indexes.get(key)
+                if index is None:
+                    index = frame_indexes[key] = len(frames)
+                    frames.append({"name": function, "file": filename, "line": line})
+                indexes.append(index)
+            stacks.append(indexes)
+            weights.append(count * self.interval)
+        document = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": stacks,
+                    "weights": weights,
+                }
+            ],
+            "exporter": "love-letter profiler",
+        }
+        with open(path, "w") as file:
+            json.dump(document, file)
+        return path
@@ -0,0 +1,289 @@
+# tracing.py
+"""
+Sampled tracing of client commands, exported as a Chrome trace or for speedscope.
+
+A trace follows one client command: the root span wraps `handle_client_message`,
+and the room's actor continues the same trace when it handles the command, so
+`GameRoom.handle_command`, `Game.handle_player_action`, the card's `play`,
+`notify_players` and every `send_frame` appear nested under it, timed with the
+monotonic `time.perf_counter`. Each message it sends is written by its user's
+writer task later on; that task continues the trace too, so the encoding and the
+socket write of every message show up as "User.write_frame" spans.
+
+Whether a command is traced is decided once, at its root, with probability
+`Tracer.sample_rate`. The trace being recorded lives in a context variable that
+asyncio copies into the tasks a command starts; outside a sampled trace, `span()`
+reads that variable and returns a shared no-op span, so with sampling off
+instrumented code pays one variable lookup per span.
+
+Finished traces are kept in a bounded buffer and written with `Tracer.export`:
+a file ending in ".speedscope.json" gets the speedscope evented format, any other
+the Chrome trace event format (chrome://tracing, Perfetto).
+"""
+
+import functools
+import itertools
+import json
+import os
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Finished traces kept for export
+DEFAULT_MAX_TRACES = 10_000
+
+# (name, detail, start, end), times in perf_counter seconds
+SpanRecord = Tuple[str, Optional[str], float, float]
+
+
+class Trace:
+    """
+    The spans of one sampled command.
+
+    A trace is finished once its root span has closed and every hand-off (a
+    command queued for a room) has been picked up and handled.
+
+    Attributes:
+        trace_id (int): Number of the trace in this process.
+        spans (List[SpanRecord]): Closed spans, in closing order.
+        finished (bool): Whether the trace is complete; later spans are ignored.
+    """
+
+    __slots__ = ("tracer", "trace_id", "spans", "finished", "_open")
+
+    def __init__(self, tracer: "Tracer", trace_id: int):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.spans: List[SpanRecord] = []
+        self.finished = False
+        # Root span plus hand-offs not yet handled
+        self._open = 1
+
+    def hand_off(self) -> "Trace":
+        """Marks the trace as continued elsewhere; `release` once that part is done."""
+        self._open += 1
+        return self
+
+    def release(self) -> None:
+        self._open -= 1
+        if self._open == 0 and not self.finished:
+            self.finished = True
+            self.tracer.finished.append(self)
+
+
+class Span:
+    """A timed section of a trace; use it as a context manager."""
+
+    __slots__ = ("trace", "name", "detail", "start", "_token", "_root")
+
+    def __init__(self, trace: Trace, name: str, detail: Optional[str] = None, root: bool = False):
+        self.trace = trace
+        self.name = name
+        self.detail = detail
+        self._root = root
+        self._token = None
+
+    def __enter__(self) -> "Span":
+        if self._root:
+            self._token = _current.set(self.trace)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        end = time.perf_counter()
+        trace = self.trace
+        if not trace.finished:
+            trace.spans.append((self.name, self.detail, self.start, end))
+        if self._root:
+            _current.reset(self._token)
+            trace.release()
+
+
+class _NullSpan:
+    """The span of code that is not being traced."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+_current: ContextVar[Optional[Trace]] = ContextVar("love_letter_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """Returns the trace being recorded in this context, if any."""
+    trace = _current.get()
+    return None if trace is None or trace.finished else trace
+
+
+def span(name: str, detail: Optional[str] = None):
+    """Returns a span of the current trace, or a no-op span when nothing is traced."""
+    trace = _current.get()
+    if trace is None or trace.finished:
+        return NULL_SPAN
+    return Span(trace, name, detail)
+
+
+def traced(name: str):
+    """Decorates a coroutine function so that each call is a span of the current trace."""
+
+    def decorate(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None or trace.finished:
+                return await function(*args, **kwargs)
+            with Span(trace, name):
+                return await function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def continue_trace(trace: Optional[Trace], name: str, detail: Optional[str] = None):
+    """
+    Returns a root span that records into a trace handed off with `Trace.hand_off`,
+    or a no-op span for no trace. Closing it releases the hand-off.
+    """
+    if trace is None:
+        return NULL_SPAN
+    return Span(trace, name, detail, root=True)
+
+
+class Tracer:
+    """
+    Starts sampled traces and keeps the finished ones.
+
+    Attributes:
+        sample_rate (float): Fraction of commands traced, 0 to turn tracing off.
+        path (Optional[str]): File the traces are exported to by `export`.
+        finished (Deque[Trace]): Finished traces, the oldest dropped first.
+    """
+
+    __slots__ = ("sample_rate", "path", "finished", "epoch", "_ids", "_random")
+
+    def __init__(self, sample_rate: float = 0.0, path: Optional[str] = None, max_traces: int = DEFAULT_MAX_TRACES):
+        self.sample_rate = sample_rate
+        self.path = path
+        self.finished: Deque[Trace] = deque(maxlen=max_traces)
+        self.epoch = time.perf_counter()
+        self._ids = itertools.count(1)
+        self._random = random.Random()
+
+    def trace(self, name: str, detail: Optional[str] = None, force: bool = False):
+        """
+        Returns the root span of a new trace if this command is sampled (or
+        `force`d), else a no-op span.
+        """
+        if not force and (self.sample_rate <= 0 or self._random.random() >= self.sample_rate):
+            return NULL_SPAN
+        return Span(Trace(self, next(self._ids)), name, detail, root=True)
+
+    def export(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Writes the finished traces to a file, by default `path`.
+
+        Returns:
+            Optional[str]: The file written, or None without a path.
+        """
+        path = path or self.path
+        if not path:
+            return None
+        traces = list(self.finished)
+        if path.endswith(".speedscope.json"):
+            document = speedscope(traces, self.epoch)
+        else:
+            document = chrome_trace(traces, self.epoch)
+        with open(path, "w") as file:
+            json.dump(document, file)
+        return path
+
+
+def _label(name: str, detail: Optional[str]) -> str:
+    return f"{name} {detail}" if detail else name
+
+
+def chrome_trace(traces: List[Trace], epoch: float) -> dict:
+    """Returns traces in the Chrome trace event format, one thread row per trace."""
+    pid = os.getpid()
+    events = []
+    for trace in traces:
+        for name, detail, start, end in trace.spans:
+            events.append(
+                {
+                    "name": _label(name, detail),
+                    "cat": name,
+                    "ph": "X",
+                    "ts": round((start - epoch) * 1e6, 3),
+                    "dur": round((end - start) * 1e6, 3),
+                    "pid": pid,
+                    "tid": trace.trace_id,
+                }
+            )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def speedscope(traces: List[Trace], epoch: float) -> dict:
+    """
+    Returns traces in the speedscope file format, one evented profile per trace.
+
+    Speedscope needs strictly nested events, so a span that outlives the span it
+    started in (concurrent sends) is cut off where its parent ends.
+    """
+    frames: List[dict] = []
+    frame_indexes: Dict[str, int] = {}
+    profiles = []
+    for trace in traces:
+        if not trace.spans:
+            continue
+        events = []
+        stack: List[Tuple[int, float]] = []
+        spans = sorted(trace.spans, key=lambda record: (record[2], -record[3]))
+        for name, detail, start, end in spans:
+            label = _label(name, detail)
+            frame = frame_indexes.get(label)
+            if frame is None:
+                frame = frame_indexes[label] = len(frames)
+                frames.append({"name": label})
+            while stack and stack[-1][1] <= start:
+                _close(events, stack.pop(), epoch)
+            if stack:
+                end = min(end, stack[-1][1])
+            stack.append((frame, end))
+            events.append({"type": "O", "frame": frame, "at": round((start - epoch) * 1e6, 3)})
+        while stack:
+            _close(events, stack.pop(), epoch)
+        profiles.append(
+            {
+                "type": "evented",
+                "name": f"trace {trace.trace_id}: {_label(spans[0][0], spans[0][1])}",
+                "unit": "microseconds",
+                "startValue": events[0]["at"],
+                "endValue": events[-1]["at"],
+                "events": events,
+            }
+        )
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": profiles,
+        "exporter": "love-letter tracing",
+    }
+
+
+def _close(events: List[dict], opened: Tuple[int, float], epoch: float) -> None:
+    frame, end = opened
+    events.append({"type": "C", "frame": frame, "at": round((end - epoch) * 1e6, 3)})
+
+
+# The tracer of this process; the server configures it from its environment
+tracer = Tracer()
@@ -2,6 +2,7 @@
 
 from user.User import User
 from card.Card import Card
+from user.Frame import Frame
 class Player:
     """
     Represents a player in the Love Letter game.
@@ -17,6 +18,17 @@ class Player:
         score (int): The player's score.
     """
 
+    __slots__ = (
+        "user",
+        "hand",
+        "is_protected",
+        "is_active",
+        "has_played_constable",
+        "jester_object",
+        "comet_played",
+        "score",
+    )
+
     def __init__(self, user: User):
         self.user = user
         self.hand = []
@@ -88,5 +100,14 @@ class Player:
     async def send_message(self, message: dict) -> None:
         """Sends a message to the player via their User instance."""
         await self.user.send_message(message)
+
+    async def send_frame(self, frame: Frame) -> None:
+        """Sends an already wrapped message to the player via their User instance."""
+        send_frame = getattr(self.user, "send_frame", None)
+        if send_frame:
+            await send_frame(frame)
+        else:
+            # Stand-in users, such as test doubles, may only take plain messages
+            await self.user.send_message(frame.message)
     
     
@@ -0,0 +1,195 @@
+# binary_codec.py
+"""
+Compact binary encoding of server-to-client game events.
+
+A client opts in by sending {"type": "hello", "protocol": "binary"}; from then on
+every frame it receives is a websocket binary frame whose first byte is an opcode.
+Game events use fixed layouts of single bytes: player seat indexes, and card codes
+and outcome codes (indexes into OUTCOMES) from `card.CardTable`. The client renders
+the human-readable text itself. Every other message is sent as an OP_JSON frame
+carrying its UTF-8 JSON encoding, and so is a draw_card that lists the player's
+legal moves: their targets and guesses do not fit the fixed layouts.
+
+Layouts (all fields are unsigned bytes, NONE when absent):
+    OP_JSON:              op, json...
+    OP_GAME_START:        op
+    OP_DEAL_CARD:         op, count, card...
+    OP_NEXT_TURN:         op, player
+    OP_DRAW_CARD:         op, card
+    OP_PLAY_CARD:         op, actor, target, card, outcome, guess, discarded
+    OP_PLAYER_ELIMINATED: op, actor, player, card, outcome, guess
+    OP_PRIVATE_INFO:      op, outcome, target, card, discarded
+    OP_ROUND_END:         op, winner seat bitmask
+"""
+
+import json
+import struct
+from typing import Dict, Sequence
+from card.CardTable import CARD_CODES, CARD_LABELS, CARD_NAMES, OUTCOMES
+
+PROTOCOLS = ("json", "binary")
+
+(
+    OP_JSON,
+    OP_GAME_START,
+    OP_DEAL_CARD,
+    OP_NEXT_TURN,
+    OP_DRAW_CARD,
+    OP_PLAY_CARD,
+    OP_PLAYER_ELIMINATED,
+    OP_PRIVATE_INFO,
+    OP_ROUND_END,
+) = range(9)
+
+NONE = 0xFF
+
+_OUTCOME_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+_LABEL_CODES = {label: code for code, label in enumerate(CARD_LABELS)}
+
+_PLAY_CARD = struct.Struct("<7B")
+_PLAYER_ELIMINATED = struct.Struct("<6B")
+_PRIVATE_INFO = struct.Struct("<5B")
+_TWO_BYTES = struct.Struct("<2B")
+
+_GAME_START_FRAME = bytes((OP_GAME_START,))
+
+
+def _guess(value) -> int:
+    try:
+        guess = int(value)
+    except (TypeError, ValueError):
+        return NONE
+    return guess if 0 <= guess < NONE else NONE
+
+
+def encode(message: dict, seats: Dict[str, int]) -> bytes:
+    """
+    Encodes a server message into a binary frame.
+
+    Args:
+        message (dict): The message, as it would be sent in JSON.
+        seats (Dict[str, int]): Seat index of each player ID in the recipient's game.
+
+    Returns:
+        bytes: The binary frame.
+    """
+    get = message.get
+    message_type = get("type")
+    if message_type == "play_card":
+        return _PLAY_CARD.pack(
+            OP_PLAY_CARD,
+            seats.get(get("actor_id"), NONE),
+            seats.get(get("target"), NONE),
+            _LABEL_CODES.get(get("card"), NONE),
+            _OUTCOME_CODES.get(get("outcome"), NONE),
+            _guess(get("guess")),
+            _LABEL_CODES.get(get("discarded"), NONE),
+        )
+    if message_type == "player_eliminated":
+        return _PLAYER_ELIMINATED.pack(
+            OP_PLAYER_ELIMINATED,
+            seats.get(get("actor_id"), NONE),
+            seats.get(get("player_id"), NONE),
+            _LABEL_CODES.get(get("card"), NONE),
+            _OUTCOME_CODES.get(get("outcome"), NONE),
+            _guess(get("guess")),
+        )
+    if message_type == "next_turn":
+        return _TWO_BYTES.pack(OP_NEXT_TURN, seats.get(get("player_id"), NONE))
+    if message_type == "draw_card" and "legal_actions" not in message:
+        return _TWO_BYTES.pack(OP_DRAW_CARD, CARD_CODES.get(get("card_name"), NONE))
+    if message_type == "private_info" and "outcome" in message:
+        return _PRIVATE_INFO.pack(
+            OP_PRIVATE_INFO,
+            _OUTCOME_CODES.get(get("outcome"), NONE),
+            seats.get(get("target"), NONE),
+            _LABEL_CODES.get(get("card"), NONE),
+            _LABEL_CODES.get(get("discarded"), NONE),
+        )
+    if message_type == "deal_card":
+        hand = [CARD_CODES.get(name, NONE) for name in get("your_hand", ())]
+        return bytes((OP_DEAL_CARD, len(hand), *hand))
+    if message_type == "round_end" and "winner_ids" in message:
+        mask = 0
+        for player_id in message["winner_ids"]:
+            if player_id in seats:
+                mask |= 1 << seats[player_id]
+        return _TWO_BYTES.pack(OP_ROUND_END, mask)
+    if message_type == "game_start":
+        return _GAME_START_FRAME
+    return bytes((OP_JSON,)) + json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def decode(frame: bytes, player_ids: Sequence[str]) -> dict:
+    """
+    Decodes a binary frame back into a message, without the human-readable text.
+
+    Args:
+        frame (bytes): The binary frame.
+        player_ids (Sequence[str]): Player ID of each seat in the recipient's game.
+
+    Returns:
+        dict: The message fields that the frame carries.
+    """
+
+    def player(seat: int):
+        return player_ids[seat] if seat != NONE else None
+
+    def card(code: int):
+        return CARD_LABELS[code] if code != NONE else None
+
+    def outcome(code: int):
+        return OUTCOMES[code] if code != NONE else None
+
+    def guess(value: int):
+        return value if value != NONE else None
+
+    op = frame[0]
+    if op == OP_JSON:
+        return json.loads(frame[1:].decode())
+    if op == OP_PLAY_CARD:
+        _, actor, target, card_code, outcome_code, guessed, discarded = _PLAY_CARD.unpack(frame)
+        return {
+            "type": "play_card",
+            "actor_id": player(actor),
+            "target": player(target),
+            "card": card(card_code),
+            "outcome": outcome(outcome_code),
+            "guess": guess(guessed),
+            "discarded": card(discarded),
+        }
+    if op == OP_PLAYER_ELIMINATED:
+        _, actor, eliminated, card_code, outcome_code, guessed = _PLAYER_ELIMINATED.unpack(frame)
+        return {
+            "type": "player_eliminated",
+            "actor_id": player(actor),
+            "player_id": player(eliminated),
+            "card": card(card_code),
+            "outcome": outcome(outcome_code),
+            "guess": guess(guessed),
+        }
+    if op == OP_NEXT_TURN:
+        return {"type": "next_turn", "player_id": player(frame[1])}
+    if op == OP_DRAW_CARD:
+        return {"type": "draw_card", "card_name": CARD_NAMES[frame[1]] if frame[1] != NONE else None}
+    if op == OP_PRIVATE_INFO:
+        _, outcome_code, target, card_code, discarded = _PRIVATE_INFO.unpack(frame)
+        return {
+            "type": "private_info",
+            "outcome": outcome(outcome_code),
+            "target": player(target),
+            "card": card(card_code),
+            "discarded": card(discarded),
+        }
+    if op == OP_DEAL_CARD:
+        count = frame[1]
+        return {"type": "deal_card", "your_hand": [CARD_NAMES[code] for code in frame[2 : 2 + count]]}
+    if op == OP_ROUND_END:
+        mask = frame[1]
+        return {
+            "type": "round_end",
+            "winner_ids": [player_ids[seat] for seat in range(len(player_ids)) if mask >> seat & 1],
+        }
+    if op == OP_GAME_START:
+        return {"type": "game_start"}
+    raise ValueError(f"Unknown opcode: {op}")
@@ -1,33 +1,154 @@
 # server.py
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
 from user.ConnectionManager import ConnectionManager
 from user.User import User
-from game.GameRoom import GameRoom
+from game.GameRoom import DISCONNECT_GRACE, EMPTY_ROOM_TTL, TURN_TIMEOUT, GameRoom
 from game.Game import Game
 from player.Player import Player
+from protocol.BinaryCodec import PROTOCOLS
+from game.RoomRegistry import create_registry, shard_for_room
+from game.EventLog import EventLogStore
+from game.Replay import ReplayError, replay_file
+from monitoring.Metrics import ACTIVE_USERS, ERRORS, ROOMS, registry as metrics
+from monitoring.Tracing import tracer
+import os
 import uuid
 from typing import Dict
 
+# Sharded deployment: every worker runs this app with its own LOVE_LETTER_SHARD,
+# and rooms are placed on workers by shard_for_room (see cluster.py).
+SHARD = int(os.environ.get("LOVE_LETTER_SHARD", "0"))
+SHARD_COUNT = int(os.environ.get("LOVE_LETTER_SHARDS", "1"))
+SHARD_URLS = [url for url in os.environ.get("LOVE_LETTER_SHARD_URLS", "").split(",") if url]
+# Directory of the per-room event logs; games are not logged if unset
+EVENT_LOG_DIR = os.environ.get("LOVE_LETTER_EVENT_LOG")
+# Room timeouts in seconds, see GameRoom; a turn timeout or grace period of 0 disables it
+ROOM_TIMEOUTS = {
+    "turn_timeout": float(os.environ.get("LOVE_LETTER_TURN_TIMEOUT", TURN_TIMEOUT)),
+    "disconnect_grace": float(os.environ.get("LOVE_LETTER_DISCONNECT_GRACE", DISCONNECT_GRACE)),
+    "empty_room_ttl": float(os.environ.get("LOVE_LETTER_EMPTY_ROOM_TTL", EMPTY_ROOM_TTL)),
+}
+# Fraction of client messages traced, and the file traces are written to on shutdown,
+# if any; a name ending in .speedscope.json selects the speedscope format, else Chrome's
+tracer.sample_rate = float(os.environ.get("LOVE_LETTER_TRACE_RATE", "0"))
+tracer.path = os.environ.get("LOVE_LETTER_TRACE_FILE")
+# Enables the /debug endpoints: on-demand trace export and per-room profiling
+DEBUG = os.environ.get("LOVE_LETTER_DEBUG") == "1"
+
 app = FastAPI()
-manager = ConnectionManager()
-game_rooms: Dict[str, GameRoom] = {}
+# Sessions stay resumable as long as their seats are kept
+manager = ConnectionManager(session_ttl=ROOM_TIMEOUTS["disconnect_grace"])
+registry = create_registry(os.environ.get("LOVE_LETTER_REGISTRY", "memory"))
+game_rooms: Dict[str, GameRoom] = {}  # Rooms hosted by this shard
+event_store = EventLogStore(EVENT_LOG_DIR) if EVENT_LOG_DIR else None
+ACTIVE_USERS.function = lambda: len(manager.active_users)
+ROOMS.function = lambda: len(game_rooms)
+
+def close_room(game_room: GameRoom) -> None:
+    """Forgets a room that was closed, so it no longer takes memory or a registry entry."""
+    if game_rooms.get(game_room.room_id) is game_room:
+        del game_rooms[game_room.room_id]
+        registry.unregister(game_room.room_id)
+
+def new_game_room(room_id: str) -> GameRoom:
+    """Creates a room of this shard, which removes itself from game_rooms when closed."""
+    return GameRoom(room_id, event_store, on_close=close_room, **ROOM_TIMEOUTS)
+
+# Commands handled by the sender's room, see GameRoom.handle_command
+ROOM_COMMANDS = frozenset({'leave_room', 'start_game', 'play_card', 'ack', 'sync_request', 'hint'})
+
+@app.on_event("startup")
+async def start_event_log():
+    """Starts group-committing the event logs and recovers the games of unclosed ones."""
+    if not event_store:
+        return
+    event_store.start()
+    for path in event_store.log_paths():
+        try:
+            result = await replay_file(path)
+        except (OSError, ReplayError) as e:
+            print(f"Could not recover {path}: {e}")
+            continue
+        if not result or result.finished or shard_for_room(result.room_id, SHARD_COUNT) != SHARD:
+            continue
+        game_room = new_game_room(result.room_id)
+        game_room.game_instance = result.game
+        game_room.event_log = event_store.open(result.room_id)
+        result.game.event_log = game_room.event_log
+        game_rooms[result.room_id] = game_room
+        registry.register(result.room_id, SHARD)
+        for player in result.game.players:
+            if player.user.secret:
+                manager.add_seat(player.user.secret, player.user.user_id, player.user.name, game_room)
+        # Closed like any empty room if nobody comes back to it
+        game_room.schedule_eviction()
+        print(f"Recovered room {result.room_id} after {result.actions} actions")
+
+@app.on_event("shutdown")
+async def close_event_log():
+    """Commits whatever the event logs still buffer, and writes the traces."""
+    if event_store:
+        await event_store.close()
+    if tracer.finished:
+        tracer.export()
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Serves the metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+if DEBUG:
+    @app.post("/debug/trace")
+    async def export_traces():
+        """Writes the traces recorded so far to the trace file, or trace.json if none is set."""
+        return {"path": tracer.export(tracer.path or "trace.json"), "traces": len(tracer.finished)}
+
+    @app.post("/debug/rooms/{room_id}/profile")
+    async def profile_room(room_id: str, seconds: float = 10.0):
+        """Profiles a room and traces all its commands for some seconds."""
+        game_room = game_rooms.get(room_id)
+        if not game_room:
+            return {"error": "Room not found."}
+        path = f"profile-{room_id}.speedscope.json"
+        game_room.start_profiling(seconds, path)
+        return {"path": path, "seconds": seconds}
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint for user connections.
+
+    A "resume" message switches the connection to the user of an earlier session,
+    see ConnectionManager.
     """
     user = await manager.connect(websocket)
     try:
         while True:
             data = await websocket.receive_json()
-            await handle_client_message(user, data)
+            if data.get('type') == 'resume':
+                received = data.get('received', 0)
+                if type(received) is not int or received < 0:
+                    await user.send_message({'type': 'error', 'message': 'Invalid received count.'})
+                    continue
+                user = await manager.resume(user, data.get('token'), received)
+                continue
+            with tracer.trace("handle_client_message", data.get('type')):
+                await handle_client_message(user, data)
     except WebSocketDisconnect:
-        await manager.disconnect(user.user_id)
+        await manager.disconnect(user.user_id, websocket)
     except Exception as e:
         print(f"Error with user {user.user_id}: {e}")
-        await manager.disconnect(user.user_id)
+        ERRORS.labels("websocket", type(e).__name__).inc()
+        await manager.disconnect(user.user_id, websocket)
+
+def new_room_id() -> str:
+    """Returns an unused room ID owned by this shard."""
+    while True:
+        room_id = str(uuid.uuid4())[:8]
+        if shard_for_room(room_id, SHARD_COUNT) == SHARD and room_id not in game_rooms:
+            return room_id
 
 async def handle_client_message(user: User, data: dict):
     """
@@ -38,10 +159,20 @@ async def handle_client_message(user: User, data: dict):
         data (dict): The message data.
     """
     message_type = data.get('type')
-    if message_type == 'create_room':
-        room_id = str(uuid.uuid4())[:8]
-        game_room = GameRoom(room_id)
+    if message_type == 'hello':
+        # Protocol negotiation; the answer already uses the negotiated protocol
+        protocol = data.get('protocol', 'json')
+        user.protocol = protocol if protocol in PROTOCOLS else 'json'
+        user.state_sync = bool(data.get('state_sync', False))
+        await user.send_message({
+            'type': 'protocol',
+            'protocol': user.protocol
+        })
+    elif message_type == 'create_room':
+        room_id = new_room_id()
+        game_room = new_game_room(room_id)
         game_rooms[room_id] = game_room
+        registry.register(room_id, SHARD)
         await game_room.add_user(user)
         await user.send_message({
             'type': 'room_created',
@@ -49,34 +180,51 @@ async def handle_client_message(user: User, data: dict):
         })
     elif message_type == 'join_room':
         room_id = data.get('room_id')
-        game_room = game_rooms.get(room_id)
-        if game_room:
-            await game_room.add_user(user)
+        owner = shard_for_room(room_id, SHARD_COUNT) if room_id else SHARD
+        if owner != SHARD and not (registry.shared and registry.lookup(room_id) is None):
+            # The room lives on another worker: send the client there
             await user.send_message({
-                'type': 'room_joined',
-                'room_id': room_id
+                'type': 'redirect',
+                'room_id': room_id,
+                'shard': owner,
+                'url': SHARD_URLS[owner] if owner < len(SHARD_URLS) else None
             })
+            return
+        game_room = game_rooms.get(room_id)
+        if game_room:
+            if user.current_room and user.current_room is not game_room:
+                user.current_room.submit(user, {'type': 'leave_room'})
+            # Commands sent right after the join go to the same inbox, behind it
+            user.current_room = game_room
+            game_room.submit(user, data)
         else:
             await user.send_message({
                 'type': 'error',
                 'message': 'Room not found.'
             })
-    elif message_type == 'leave_room':
+    elif message_type in ROOM_COMMANDS:
+        # Everything that touches a room or its game runs on the room's actor task
         if user.current_room:
-            await user.current_room.remove_user(user)
-            await user.send_message({
-                'type': 'room_left',
-                'room_id': user.current_room.room_id
-            })
-    elif message_type == 'start_game':
-        if user.current_room:
-            await user.current_room.start_game()
+            user.current_room.submit(user, data)
     # Handle other message types...
 
 
 if __name__ == "__main__":
     # simulate the frontend connection and message sending
+    # Seats are played by ISMCTS bots (or a CFR bot with --strategy) unless named with --humans
+    import argparse
     import asyncio
+    from game.Bot import GameBot
+    from engine.CFR import CFRBot
+    from engine.ISMCTS import ISMCTSBot
+
+    parser = argparse.ArgumentParser(description="Play a local game against bots.")
+    parser.add_argument("--humans", nargs="*", default=[], help="Names of the seats played from the keyboard.")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--iterations", type=int, default=1000, help="Bot search iterations per move.")
+    parser.add_argument("--time-budget", type=float, default=None, help="Bot search seconds per move.")
+    parser.add_argument("--strategy", default=None, help="CFR strategy file; plays a two-player game with it.")
+    args = parser.parse_args()
 
     id_to_name = {
         "1": "orange",
@@ -101,7 +249,7 @@ if __name__ == "__main__":
                     player_name = id_to_name[message.get('player_id')]
                     print(f"{player_name}寄了: {message.get('message')}")
                 elif message.get('type') == 'play_card':
-                    player_name = id_to_name[message.get('target')]
+                    player_name = id_to_name.get(message.get('target'))
                     print(f"打了一张{message.get('card')}给{player_name}")
                     print(f"消息: {message.get('message')}")
                 else:
@@ -120,7 +268,15 @@ if __name__ == "__main__":
     player3 = Player(user=user3)
 
     # Create a game with the players
-    game = Game(players=[player1, player2, player3])
+    if args.strategy:
+        game = Game(players=[player1, player2])
+        bot = GameBot(CFRBot.load(args.strategy))
+    else:
+        game = Game(players=[player1, player2, player3])
+        bot = GameBot(ISMCTSBot(iterations=args.iterations, time_budget=args.time_budget))
+
+    def rounds_played():
+        return sum(1 for message in user1.messages if message.get('type') == 'round_end')
 
     async def main():
         # Initialize the game
@@ -129,10 +285,14 @@ if __name__ == "__main__":
 
         # Simulate the game loop
         game.ongoing = True
-        while game.ongoing:
+        while game.ongoing and rounds_played() < args.rounds:
             current_player = game.player_in_turn()
             print(f"\n当前玩家: {current_player.user.name}")
             print(f"嫩的手牌: {[card.__repr__() for card in current_player.hand]}")
+
+            if current_player.user.name not in args.humans:
+                await bot.play_turn(game, current_player)
+                continue
             
             # Get player input for the card to play
             played_card_index = int(input("打第几张牌[输入0或1]: "))
@@ -156,13 +316,8 @@ if __name__ == "__main__":
                 target_info=target_info
             )
             
-            # Check if the game has ended
-            if not game.ongoing:
-                winners = game.determine_winner()
-                print(f"Game ended. Winner(s): {[p.user.name for p in winners]}")
-                break
         # After the game ends, you can inspect scores or start a new round
+        print(f"Rounds played: {rounds_played()}")
 
     # Run the async main function
     asyncio.run(main())
-
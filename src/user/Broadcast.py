@@ -0,0 +1,87 @@
+# broadcast.py
+
+import asyncio
+from typing import Dict, Iterable, List, Tuple
+from user.Frame import Frame
+
+# Seconds a single recipient may take before its send is abandoned.
+SEND_TIMEOUT = 5.0
+
+
+class BroadcastResult:
+    """
+    Outcome of sending one message to several recipients.
+
+    Attributes:
+        delivered (List[str]): IDs of the recipients the message was sent to.
+        slow (List[str]): IDs of the recipients whose send timed out, or who were
+            given the message while their outbound queue is lagging.
+        failed (Dict[str, BaseException]): IDs of the recipients whose send raised,
+            with the error.
+    """
+
+    __slots__ = ("delivered", "slow", "failed")
+
+    def __init__(self):
+        self.delivered: List[str] = []
+        self.slow: List[str] = []
+        self.failed: Dict[str, BaseException] = {}
+
+    def __repr__(self):
+        return (
+            f"BroadcastResult(delivered={len(self.delivered)}, "
+            f"slow={self.slow}, failed={list(self.failed)})"
+        )
+
+
+async def fan_out(
+    recipients: Iterable[Tuple[str, object]],
+    message: dict,
+    timeout: float = SEND_TIMEOUT,
+) -> BroadcastResult:
+    """
+    Sends a message to every recipient concurrently.
+
+    The message is wrapped in a single Frame, so it is encoded at most once for all
+    recipients. Each send gets its own timeout, and an error or timeout on one
+    recipient does not affect the others. Sending to a connected user only queues
+    the message, so a user whose outbound queue is lagging (see
+    `OutboundQueue.lagging`) is reported as slow instead.
+
+    Args:
+        recipients (Iterable[Tuple[str, object]]): (ID, recipient) pairs; each
+            recipient must have an async `send_frame(frame)` or
+            `send_message(message)` method.
+        message (dict): The message to send.
+        timeout (float): Seconds allowed for each individual send.
+
+    Returns:
+        BroadcastResult: Who received the message, who was slow and who failed.
+    """
+    frame = Frame(message)
+    ids = []
+    queues = []
+    sends = []
+    for recipient_id, recipient in recipients:
+        ids.append(recipient_id)
+        # Players send through their user
+        queues.append(getattr(getattr(recipient, "user", recipient), "outbound", None))
+        send_frame = getattr(recipient, "send_frame", None)
+        send = send_frame(frame) if send_frame else recipient.send_message(message)
+        sends.append(asyncio.wait_for(send, timeout))
+
+    result = BroadcastResult()
+    if not sends:
+        return result
+    outcomes = await asyncio.gather(*sends, return_exceptions=True)
+    for recipient_id, outbound, outcome in zip(ids, queues, outcomes):
+        if not isinstance(outcome, BaseException):
+            if outbound is not None and outbound.lagging:
+                result.slow.append(recipient_id)
+            else:
+                result.delivered.append(recipient_id)
+        elif isinstance(outcome, asyncio.TimeoutError):
+            result.slow.append(recipient_id)
+        else:
+            result.failed[recipient_id] = outcome
+    return result
@@ -1,17 +1,49 @@
 # connection_manager.py
 
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from fastapi import WebSocket
 from user.User import User
+from user.Broadcast import BroadcastResult, fan_out, SEND_TIMEOUT
+from game.EventLog import seat_secret
+from game.TimerWheel import Timer, TimerWheel, timers
 import uuid
 
+# Seconds a disconnected user's session can be resumed
+SESSION_TTL = 30.0
+
 class ConnectionManager:
     """
     Manages User connections for the Love Letter game.
+
+    Every connection starts a session: the client gets a {"type": "session"} message
+    with its user ID and a secret token. After losing the connection, a client
+    resumes the session from a new one by sending {"type": "resume", "token": ...,
+    "received": n}, n being the number of messages it received in the session. The
+    new connection then takes over the same User, and with it the seat in any
+    game; the messages the client missed are replayed from the user's replay
+    buffer, followed by a {"type": "resumed"} message.
+
+    Sessions do not outlive the process, but the seats of games recovered from
+    their event logs do: resuming with the token of a session that held such a
+    seat makes the new connection that seat's user, under the same user ID, and
+    the room sends it a snapshot of the game.
+
+    Attributes:
+        active_users (Dict[str, User]): Connected users by user ID.
+        sessions (Dict[str, User]): Users whose session can be resumed, by session token.
+        session_ttl (float): Seconds a disconnected user's session can be resumed.
+        seats (Dict[str, Tuple[str, str, GameRoom]]): Seats of recovered games not
+            claimed yet, as (user ID, name, room) by seat secret.
     """
 
-    def __init__(self):
+    def __init__(self, session_ttl: float = SESSION_TTL, timer_wheel: TimerWheel = timers):
         self.active_users: Dict[str, User] = {}
+        self.sessions: Dict[str, User] = {}
+        self.session_ttl = session_ttl
+        self.timer_wheel = timer_wheel
+        self.seats: Dict[str, Tuple[str, str, "GameRoom"]] = {}
+        # Expiry timers of the sessions of disconnected users, by user ID
+        self._expiry: Dict[str, Timer] = {}
 
     async def connect(self, websocket: WebSocket) -> User:
         """
@@ -27,24 +59,123 @@ class ConnectionManager:
         user_id = str(uuid.uuid4())
         user = User(user_id=user_id, websocket=websocket)
         self.active_users[user_id] = user
+        self.sessions[user.session_token] = user
         print(f"User {user_id} connected.")
+        await user.send_message({
+            "type": "session",
+            "user_id": user_id,
+            "token": user.session_token,
+        })
         return user
 
-    # connection_manager.py (updated disconnect method)
-
-    async def disconnect(self, user_id: str) -> None:
+    async def disconnect(self, user_id: str, websocket: Optional[WebSocket] = None) -> None:
         """
         Removes a User from active connections and handles cleanup.
 
+        The user's session stays resumable for `session_ttl` seconds.
+
         Args:
             user_id (str): The unique identifier of the user.
+            websocket (Optional[WebSocket]): The connection that was lost; nothing is
+                done if the user has already moved to another one.
         """
-        user = self.active_users.pop(user_id, None)
-        if user:
-            if user.current_room:
-                await user.current_room.remove_user(user)
-            await user.disconnect()
-            print(f"User {user_id} disconnected.")
+        user = self.active_users.get(user_id)
+        if not user or websocket is not None and user.websocket is not websocket:
+            return
+        del self.active_users[user_id]
+        if user.current_room:
+            user.current_room.submit(user, {"type": "disconnect"})
+        await user.disconnect()
+        if user_id in self.active_users:
+            return  # Resumed meanwhile
+        if self.session_ttl > 0:
+            self._expiry[user_id] = self.timer_wheel.schedule(self.session_ttl, self._expire, user)
+        else:
+            self._expire(user)
+        print(f"User {user_id} disconnected.")
+
+    def add_seat(self, secret: str, user_id: str, name: str, room: "GameRoom") -> None:
+        """Lets the client of a recovered seat claim it back by resuming, see `resume`."""
+        self.seats[secret] = (user_id, name, room)
+
+    def _expire(self, user: User) -> None:
+        self._expiry.pop(user.user_id, None)
+        if self.sessions.get(user.session_token) is user:
+            del self.sessions[user.session_token]
+
+    async def resume(self, user: User, token: Optional[str], received: int) -> User:
+        """
+        Resumes a session on the connection of a new user.
+
+        Args:
+            user (User): The user created for the new connection.
+            token (Optional[str]): The session token the client was given.
+            received (int): Messages the client received in that session.
+
+        Returns:
+            User: The resumed user, who the connection now belongs to, or `user` if
+                the session cannot be resumed.
+        """
+        resumed = self.sessions.get(token) if token else None
+        if resumed is None and token:
+            return await self._claim_seat(user, token)
+        if resumed is None or resumed is user:
+            await user.send_message({"type": "error", "message": "Session expired."})
+            return user
+        if resumed.user_id in self.active_users:
+            # The old connection has not noticed it is gone yet
+            await resumed.disconnect()
+        expiry = self._expiry.pop(resumed.user_id, None)
+        if expiry:
+            expiry.cancel()
+        self.active_users.pop(user.user_id, None)
+        self._expire(user)
+        await user.outbound.close()
+        resumed.attach(user.websocket)
+        self.active_users[resumed.user_id] = resumed
+        missed = resumed.replay.since(received)
+        for frame in missed or ():
+            resumed.outbound.put(frame)
+        room = resumed.current_room
+        await resumed.send_message({
+            "type": "resumed",
+            "user_id": resumed.user_id,
+            "room_id": room.room_id if room else None,
+            "replayed": len(missed) if missed is not None else None,
+        })
+        if room:
+            # Takes the seat back; a client too far behind gets a snapshot of the game
+            room.submit(resumed, {"type": "reconnect", "snapshot": missed is None})
+        print(f"User {resumed.user_id} resumed their session.")
+        return resumed
+
+    async def _claim_seat(self, user: User, token: str) -> User:
+        """Gives the user of a new connection the seat its token held in a recovered game."""
+        secret = seat_secret(token)
+        seat = self.seats.get(secret)
+        if seat is None or seat[2].closed:
+            self.seats.pop(secret, None)
+            await user.send_message({"type": "error", "message": "Session expired."})
+            return user
+        del self.seats[secret]
+        user_id, name, room = seat
+        self.active_users.pop(user.user_id, None)
+        self._expire(user)
+        # The client keeps its user ID and token across the restart
+        user.user_id = user_id
+        user.name = name
+        user.session_token = token
+        self.active_users[user_id] = user
+        self.sessions[token] = user
+        await user.send_message({
+            "type": "resumed",
+            "user_id": user_id,
+            "room_id": room.room_id,
+            "replayed": None,
+        })
+        room.submit(user, {"type": "reconnect", "snapshot": True})
+        print(f"User {user_id} claimed their seat in recovered room {room.room_id}.")
+        return user
 
 
     async def send_personal_message(self, message: dict, user_id: str) -> None:
@@ -61,16 +192,36 @@ class ConnectionManager:
         else:
             print(f"Cannot send message to user {user_id}: User not found.")
 
-    async def broadcast(self, message: dict, exclude_user_ids: Optional[set] = None) -> None:
+    async def broadcast(
+        self,
+        message: dict,
+        exclude_user_ids: Optional[set] = None,
+        timeout: float = SEND_TIMEOUT,
+    ) -> BroadcastResult:
         """
-        Broadcasts a message to all connected users, optionally excluding some.
+        Broadcasts a message to all connected users concurrently, optionally excluding some.
 
         Args:
             message (dict): The message to broadcast.
             exclude_user_ids (Optional[set]): A set of user IDs to exclude.
+            timeout (float): Seconds allowed for each user's send.
+
+        Returns:
+            BroadcastResult: Which users were slow or failed to receive the message.
         """
         if exclude_user_ids is None:
             exclude_user_ids = set()
-        for user_id, user in self.active_users.items():
-            if user_id not in exclude_user_ids:
-                await user.send_message(message)
+        result = await fan_out(
+            (
+                (user_id, user)
+                for user_id, user in list(self.active_users.items())
+                if user_id not in exclude_user_ids
+            ),
+            message,
+            timeout,
+        )
+        for user_id in result.slow:
+            print(f"Broadcast to user {user_id} timed out.")
+        for user_id, error in result.failed.items():
+            print(f"Broadcast to user {user_id} failed: {error}")
+        return result
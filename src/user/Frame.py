@@ -0,0 +1,50 @@
+# frame.py
+
+import json
+from typing import Dict, Optional
+from protocol import BinaryCodec
+
+
+class Frame:
+    """
+    A message paired with its wire encoding, computed at most once.
+
+    A broadcast wraps its message in a single Frame and hands the same object to
+    every recipient, so the JSON text (or binary frame) is built once and the same
+    object is passed to every websocket instead of being re-encoded per recipient.
+
+    Attributes:
+        message (dict): The message.
+        type (Optional[str]): The message type, used by outbound queues.
+    """
+
+    __slots__ = ("message", "type", "_text", "_binary", "_binary_seats")
+
+    def __init__(self, message: dict):
+        self.message = message
+        self.type: Optional[str] = message.get("type")
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+        self._binary_seats: Optional[Dict[str, int]] = None
+
+    @property
+    def text(self) -> str:
+        """The JSON encoding of the message."""
+        text = self._text
+        if text is None:
+            # Compact separators: clients parse the JSON, whitespace is wasted bytes
+            text = self._text = json.dumps(self.message, separators=(",", ":"), ensure_ascii=False)
+        return text
+
+    def binary(self, seats: Dict[str, int]) -> bytes:
+        """
+        The binary protocol encoding of the message.
+
+        Args:
+            seats (Dict[str, int]): Seat index of each player ID in the recipient's game;
+                recipients of a broadcast share one mapping, and so one encoding.
+        """
+        if self._binary is None or self._binary_seats is not seats:
+            self._binary = BinaryCodec.encode(self.message, seats)
+            self._binary_seats = seats
+        return self._binary
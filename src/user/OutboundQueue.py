@@ -0,0 +1,217 @@
+# outbound_queue.py
+
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, Tuple
+from user.Frame import Frame
+from monitoring.Metrics import ERRORS
+from monitoring.Tracing import Trace, continue_trace, current_trace
+
+# Messages a client cannot miss without its view of the game going wrong.
+CRITICAL_MESSAGE_TYPES = frozenset(
+    {
+        "game_start",
+        "deal_card",
+        "draw_card",
+        "next_turn",
+        "private_info",
+        "player_eliminated",
+        "round_end",
+        "room_created",
+        "room_joined",
+        "room_left",
+        "error",
+        "state_snapshot",
+        "session",
+        "resumed",
+    }
+)
+
+DEFAULT_MAX_SIZE = 256
+# Share of max_size queued from which a client counts as falling behind
+LAGGING_FRACTION = 0.5
+
+
+class OverflowPolicy:
+    """What to do with a message that arrives while the queue is full."""
+
+    DROP_OLDEST = "drop_oldest"  # discard the oldest non-critical queued message
+    DROP_NEWEST = "drop_newest"  # discard the incoming message
+    DISCONNECT = "disconnect"  # give up on the client
+
+
+class OutboundQueue:
+    """
+    Bounded queue of outgoing messages for one connection, drained by its own writer task.
+
+    `put` never waits on the network: game logic enqueues and moves on, and the
+    writer task sends messages in order at whatever speed the client manages. A
+    message queued during a sampled trace is sent in a "User.write_frame" span of
+    that trace, which covers its encoding and the socket write.
+
+    Attributes:
+        max_size (int): Maximum number of queued messages.
+        overflow_policy (str): OverflowPolicy for non-critical messages.
+        critical_overflow_policy (str): OverflowPolicy for critical messages.
+        critical_types (frozenset): Message types treated as critical.
+        closed (bool): Whether the queue has stopped accepting messages.
+        dropped (int): Number of messages discarded because of overflow.
+        max_depth (int): Highest number of messages queued at once.
+    """
+
+    __slots__ = (
+        "max_size",
+        "overflow_policy",
+        "critical_overflow_policy",
+        "critical_types",
+        "closed",
+        "dropped",
+        "max_depth",
+        "_send",
+        "_on_evict",
+        "_on_drop",
+        "_queue",
+        "_ready",
+        "_writer",
+    )
+
+    def __init__(
+        self,
+        send: Callable[[Frame], Awaitable[None]],
+        max_size: int = DEFAULT_MAX_SIZE,
+        overflow_policy: str = OverflowPolicy.DROP_OLDEST,
+        critical_overflow_policy: str = OverflowPolicy.DISCONNECT,
+        critical_types: frozenset = CRITICAL_MESSAGE_TYPES,
+        on_evict: Optional[Callable[[], None]] = None,
+        on_drop: Optional[Callable[[Frame], None]] = None,
+    ):
+        """
+        Args:
+            send (Callable[[Frame], Awaitable[None]]): Sends one frame on the connection.
+            max_size (int): Maximum number of queued messages.
+            overflow_policy (str): OverflowPolicy for non-critical messages.
+            critical_overflow_policy (str): OverflowPolicy for critical messages.
+            critical_types (frozenset): Message types treated as critical.
+            on_evict (Optional[Callable[[], None]]): Called once when the queue gives
+                up on the client, either by the DISCONNECT policy or a failed send.
+            on_drop (Optional[Callable[[Frame], None]]): Called with each queued
+                message the DROP_OLDEST policy discards.
+        """
+        self.max_size = max_size
+        self.overflow_policy = overflow_policy
+        self.critical_overflow_policy = critical_overflow_policy
+        self.critical_types = critical_types
+        self.closed = False
+        self.dropped = 0
+        self.max_depth = 0
+        self._send = send
+        self._on_evict = on_evict
+        self._on_drop = on_drop
+        # (frame, trace it was queued in)
+        self._queue: Deque[Tuple[Frame, Optional[Trace]]] = deque()
+        self._ready: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        """Number of messages waiting to be sent."""
+        return len(self._queue)
+
+    @property
+    def lagging(self) -> bool:
+        """Whether the client is falling behind: its queue is filling up, or it was given up on."""
+        return self.closed or len(self._queue) >= self.max_size * LAGGING_FRACTION
+
+    def put(self, frame: Frame) -> bool:
+        """
+        Queues a message without waiting.
+
+        Args:
+            frame (Frame): The message to send.
+
+        Returns:
+            bool: True if the message was queued, False if it was discarded.
+        """
+        if self.closed:
+            return False
+        queue = self._queue
+        if len(queue) >= self.max_size:
+            critical = frame.type in self.critical_types
+            policy = self.critical_overflow_policy if critical else self.overflow_policy
+            if policy == OverflowPolicy.DISCONNECT:
+                self.dropped += 1
+                self._evict()
+                return False
+            if policy == OverflowPolicy.DROP_NEWEST or not self._drop_oldest():
+                self.dropped += 1
+                return False
+        trace = current_trace()
+        queue.append((frame, trace.hand_off() if trace else None))
+        if len(queue) > self.max_depth:
+            self.max_depth = len(queue)
+        if self._writer is None:
+            self._ready = asyncio.Event()
+            self._writer = asyncio.get_running_loop().create_task(self._run())
+        self._ready.set()
+        return True
+
+    def _drop_oldest(self) -> bool:
+        """Discards the oldest non-critical queued message; False if every one is critical."""
+        queue = self._queue
+        critical_types = self.critical_types
+        for index, (queued, trace) in enumerate(queue):
+            if queued.type not in critical_types:
+                del queue[index]
+                self.dropped += 1
+                if trace:
+                    trace.release()
+                if self._on_drop:
+                    self._on_drop(queued)
+                return True
+        return False
+
+    async def _run(self) -> None:
+        queue = self._queue
+        ready = self._ready
+        try:
+            while True:
+                if not queue:
+                    ready.clear()
+                    await ready.wait()
+                    continue
+                frame, trace = queue.popleft()
+                with continue_trace(trace, "User.write_frame", frame.type):
+                    await self._send(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Outbound send failed: {e}")
+            ERRORS.labels("outbound", type(e).__name__).inc()
+            self._evict()
+
+    def _clear(self) -> None:
+        # Traces of messages that will never be sent are complete without them
+        for _, trace in self._queue:
+            if trace:
+                trace.release()
+        self._queue.clear()
+
+    def _evict(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._clear()
+        if self._on_evict:
+            self._on_evict()
+
+    async def close(self) -> None:
+        """Stops accepting messages and stops the writer task; queued messages are dropped."""
+        self.closed = True
+        self._clear()
+        writer = self._writer
+        if writer and not writer.done() and writer is not asyncio.current_task():
+            writer.cancel()
+            try:
+                await writer
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,52 @@
+# replay_buffer.py
+
+from collections import deque
+from typing import Deque, List, Optional
+from user.Frame import Frame
+
+# Messages kept per user for a client that reconnects
+DEFAULT_REPLAY_SIZE = 64
+
+
+class ReplayBuffer:
+    """
+    The last messages sent to one user, numbered from the start of their session.
+
+    A client counts the messages it receives; when it resumes its session with
+    that count, the messages it missed are the ones numbered from the count on.
+    The frames are the ones already built for the original send, so a replay
+    encodes nothing again.
+
+    Attributes:
+        sent (int): Messages recorded since the session started.
+    """
+
+    __slots__ = ("sent", "_frames")
+
+    def __init__(self, max_size: int = DEFAULT_REPLAY_SIZE):
+        self.sent = 0
+        self._frames: Deque[Frame] = deque(maxlen=max_size)
+
+    def record(self, frame: Frame) -> None:
+        """Records a message sent to the user."""
+        self._frames.append(frame)
+        self.sent += 1
+
+    def forget(self, frame: Frame) -> None:
+        """Unrecords a message that was dropped unsent, which the client will never count."""
+        self.sent -= 1
+        frames = self._frames
+        for index in range(len(frames) - 1, -1, -1):
+            if frames[index] is frame:
+                del frames[index]
+                return
+
+    def since(self, received: int) -> Optional[List[Frame]]:
+        """
+        Returns the messages after the first `received` ones, or None if some of
+        them are no longer kept.
+        """
+        missed = self.sent - received
+        if missed < 0 or missed > len(self._frames):
+            return None
+        return list(self._frames)[len(self._frames) - missed :]
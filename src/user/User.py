@@ -1,9 +1,26 @@
 # user.py
 
-from typing import Optional
+import asyncio
+import secrets
+from typing import Dict, Optional
 from fastapi import WebSocket
+from user.OutboundQueue import OutboundQueue
+from user.Frame import Frame
+from user.ReplayBuffer import ReplayBuffer
+from monitoring.Metrics import OUTBOUND_BYTES, OUTBOUND_MESSAGES
+from monitoring.Tracing import span
 import uuid
 
+_NO_SEATS: Dict[str, int] = {}
+
+# Events whose content, legal moves included, a client with state sync already gets from its view deltas
+STATE_EVENT_TYPES = frozenset({"deal_card", "draw_card", "next_turn"})
+
+_JSON_MESSAGES = OUTBOUND_MESSAGES.labels("json")
+_JSON_BYTES = OUTBOUND_BYTES.labels("json")
+_BINARY_MESSAGES = OUTBOUND_MESSAGES.labels("binary")
+_BINARY_BYTES = OUTBOUND_BYTES.labels("binary")
+
 class User:
     """
     Represents a connected user.
@@ -13,19 +30,87 @@ class User:
         name (Optional[str]): Display name of the user.
         websocket (WebSocket): The WebSocket connection associated with the user.
         current_room (Optional[GameRoom]): The game room the user is currently in.
+        outbound (OutboundQueue): Messages waiting to be written to the websocket.
+        protocol (str): Wire protocol negotiated by the client, "json" or "binary".
+        state_sync (bool): Whether the client follows the game through state deltas.
+        session_token (str): Secret that lets the client resume the session on a new connection.
+        replay (ReplayBuffer): The last messages sent, replayed to a resuming client.
     """
 
+    __slots__ = (
+        "user_id",
+        "name",
+        "websocket",
+        "current_room",
+        "outbound",
+        "protocol",
+        "state_sync",
+        "session_token",
+        "replay",
+    )
+
     def __init__(self, user_id: Optional[str], websocket: WebSocket, name: Optional[str] = None):
         self.user_id = user_id if user_id else str(uuid.uuid4())  # If user_id is None, generate a new UUID
         self.name = name or f"User {user_id}"
         self.websocket = websocket
         self.current_room = None  # Will be set when the user joins a room
+        self.replay = ReplayBuffer()
+        self.outbound = OutboundQueue(self._write_frame, on_evict=self._evict, on_drop=self.replay.forget)
+        self.protocol = "json"
+        self.state_sync = False
+        self.session_token = secrets.token_urlsafe(16)
 
     async def send_message(self, message: dict) -> None:
-        """Sends a message to the user."""
-        await self.websocket.send_json(message)
+        """Queues a message for the user; never waits on the network."""
+        await self.send_frame(Frame(message))
+
+    async def send_frame(self, frame: Frame) -> None:
+        """Queues an already wrapped message, sharing its encoding with other recipients."""
+        if self.state_sync and frame.type in STATE_EVENT_TYPES:
+            return
+        with span("User.send_frame", frame.type):
+            outbound = self.outbound
+            # Recorded even while disconnected, so a resuming client can catch up, but
+            # not when dropped because the client is too slow: it will never count it
+            if outbound.put(frame) or outbound.closed:
+                self.replay.record(frame)
+
+    def attach(self, websocket: WebSocket) -> None:
+        """Moves the user to a new connection, with a fresh outbound queue."""
+        self.websocket = websocket
+        self.outbound = OutboundQueue(self._write_frame, on_evict=self._evict, on_drop=self.replay.forget)
+
+    async def _write_frame(self, frame: Frame) -> None:
+        if self.protocol == "binary":
+            data = frame.binary(self._seats())
+            await self.websocket.send_bytes(data)
+            _BINARY_MESSAGES.inc()
+            _BINARY_BYTES.inc(len(data))
+        else:
+            text = frame.text
+            await self.websocket.send_text(text)
+            _JSON_MESSAGES.inc()
+            _JSON_BYTES.inc(len(text))
+
+    def _seats(self) -> Dict[str, int]:
+        room = self.current_room
+        game = room.game_instance if room else None
+        return game.seats if game else _NO_SEATS
+
+    def _evict(self) -> None:
+        """Closes the connection of a client that cannot keep up; the endpoint then cleans up."""
+        print(f"Evicting slow user {self.user_id}.")
+        asyncio.get_running_loop().create_task(self._close_websocket(self.websocket))
+
+    async def _close_websocket(self, websocket: WebSocket) -> None:
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass  # Already closed
 
     async def disconnect(self) -> None:
-        """Handles user disconnection."""
-        await self.websocket.close()
+        """Handles user disconnection; a connection attached meanwhile is left open."""
+        websocket = self.websocket
+        await self.outbound.close()
+        await self._close_websocket(websocket)
         # Additional cleanup if necessary
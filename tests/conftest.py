@@ -0,0 +1,7 @@
+# conftest.py
+"""The server's modules import each other from src/, as when run from there."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
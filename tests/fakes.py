@@ -0,0 +1,33 @@
+# fakes.py
+"""Stand-ins for what the server talks to."""
+
+
+class FakeWebSocket:
+    """A connection that keeps what is sent on it."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(text)
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.sent.append(data)
+
+    async def close(self) -> None:
+        pass
+
+
+class StubUser:
+    """A user that keeps the messages sent to it."""
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.name = f"User {user_id}"
+        self.messages = []
+
+    async def send_message(self, message: dict) -> None:
+        self.messages.append(message)
@@ -0,0 +1,32 @@
+# test_batch.py
+
+import numpy as np
+import pytest
+from engine.Batch import BatchEngine, random_batch_policy
+from engine.Simulator import simulate
+
+GAMES = 3000
+
+
+@pytest.mark.parametrize("num_players", [2, 4])
+def test_batch_statistics_agree_with_engine(num_players):
+    result = simulate(GAMES, num_players, seed=1, workers=1)
+
+    engine = BatchEngine(GAMES, num_players, [random_batch_policy] * num_players, seed=1)
+    round_wins = np.zeros(num_players, dtype=np.int64)
+    totals = {"rounds": 0, "turns": 0}
+
+    def count_round(games: np.ndarray, winners: np.ndarray) -> None:
+        totals["rounds"] += len(games)
+        totals["turns"] += int(engine.turns[games].sum())
+        round_wins[:] += winners.sum(axis=0)
+
+    game_wins = np.bincount(engine.play_games(on_round_end=count_round), minlength=num_players)
+    rounds = totals["rounds"]
+
+    assert rounds / GAMES == pytest.approx(result.rounds / GAMES, rel=0.03)
+    assert totals["turns"] / rounds == pytest.approx(result.mean_round_length(), rel=0.03)
+    # Eliminations each card causes per round, and wins of each seat
+    assert engine.eliminations / rounds == pytest.approx(np.array(result.eliminations) / result.rounds, abs=0.03)
+    assert game_wins / GAMES == pytest.approx(result.win_rates(), abs=0.05)
+    assert round_wins / rounds == pytest.approx(np.array(result.round_wins) / result.rounds, abs=0.03)
@@ -0,0 +1,98 @@
+# test_binary_codec.py
+
+import pytest
+from card.CardTable import CARD_LABELS, CARD_NAMES, OUTCOMES
+from protocol.BinaryCodec import OP_JSON, decode, encode
+
+PLAYER_IDS = ["ann", "bob", "cy", "dee"]
+SEATS = {player_id: seat for seat, player_id in enumerate(PLAYER_IDS)}
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        {"type": "game_start"},
+        {"type": "deal_card", "your_hand": ["Guard", "Princess"]},
+        {"type": "deal_card", "your_hand": []},
+        {"type": "next_turn", "player_id": "dee"},
+        {"type": "draw_card", "card_name": "Countess"},
+        {
+            "type": "play_card",
+            "actor_id": "ann",
+            "target": "cy",
+            "card": "Guard(1)",
+            "outcome": "guess_wrong",
+            "guess": 5,
+            "discarded": None,
+        },
+        {
+            "type": "play_card",
+            "actor_id": "bob",
+            "target": None,
+            "card": "Handmaid(4)",
+            "outcome": "protect",
+            "guess": None,
+            "discarded": None,
+        },
+        {
+            "type": "player_eliminated",
+            "actor_id": "cy",
+            "player_id": "ann",
+            "card": "Baron(3)",
+            "outcome": "lost",
+            "guess": None,
+        },
+        {"type": "private_info", "outcome": "peek", "target": "bob", "card": "King(6)", "discarded": None},
+        {"type": "round_end", "winner_ids": ["bob", "dee"]},
+    ],
+)
+def test_game_events_round_trip(message):
+    frame = encode(message, SEATS)
+    assert frame[0] != OP_JSON
+    assert decode(frame, PLAYER_IDS) == message
+
+
+def test_every_card_and_outcome_round_trips():
+    for name, label in zip(CARD_NAMES, CARD_LABELS):
+        message = {"type": "draw_card", "card_name": name}
+        assert decode(encode(message, SEATS), PLAYER_IDS) == message
+        message = {"type": "private_info", "outcome": OUTCOMES[0], "target": None, "card": label, "discarded": label}
+        assert decode(encode(message, SEATS), PLAYER_IDS) == message
+    for outcome in OUTCOMES:
+        message = {"type": "private_info", "outcome": outcome, "target": "ann", "card": None, "discarded": None}
+        assert decode(encode(message, SEATS), PLAYER_IDS) == message
+
+
+def test_draw_card_with_legal_moves_is_sent_as_json():
+    message = {
+        "type": "draw_card",
+        "card_name": "Guard",
+        "legal_actions": [{"card_index": 0, "target": "bob", "guess": 7.5}, {"card_index": 1}],
+    }
+    frame = encode(message, SEATS)
+    assert frame[0] == OP_JSON
+    assert decode(frame, PLAYER_IDS) == message
+
+
+def test_text_is_left_to_the_client():
+    message = {"type": "next_turn", "player_id": "cy", "message": "It's cy's turn."}
+    assert decode(encode(message, SEATS), PLAYER_IDS) == {"type": "next_turn", "player_id": "cy"}
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        {"type": "chat", "user_id": "ann", "message": "Grüße ✉"},
+        {"type": "round_end", "message": "The deck ran out."},
+        {"type": "private_info", "message": "You saw a card."},
+    ],
+)
+def test_other_messages_round_trip_as_json(message):
+    frame = encode(message, SEATS)
+    assert frame[0] == OP_JSON
+    assert decode(frame, PLAYER_IDS) == message
+
+
+def test_unknown_opcode_is_rejected():
+    with pytest.raises(ValueError):
+        decode(bytes((0xFE,)), PLAYER_IDS)
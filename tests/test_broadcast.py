@@ -0,0 +1,31 @@
+# test_broadcast.py
+
+import asyncio
+from user.Broadcast import fan_out
+from user.OutboundQueue import OutboundQueue
+from user.User import User
+from fakes import FakeWebSocket
+
+
+class StalledWebSocket(FakeWebSocket):
+    """A connection whose writes never complete."""
+
+    async def send_text(self, text: str) -> None:
+        await asyncio.Event().wait()
+
+
+def test_lagging_clients_are_reported_slow():
+    async def run():
+        fast = User(None, FakeWebSocket())
+        stalled = User(None, StalledWebSocket())
+        stalled.outbound = OutboundQueue(stalled._write_frame, max_size=8)
+        recipients = [(fast.user_id, fast), (stalled.user_id, stalled)]
+        for _ in range(6):
+            result = await fan_out(recipients, {"type": "chat"})
+            await asyncio.sleep(0)
+        assert result.delivered == [fast.user_id]
+        assert result.slow == [stalled.user_id]
+        await fast.disconnect()
+        await stalled.outbound.close()
+
+    asyncio.run(run())
@@ -0,0 +1,49 @@
+# test_cfr.py
+
+import random
+from card.CardTable import CLASSIC_DECK
+from engine.CFR import Abstraction, CFRBot, StrategyTable
+from engine.Engine import Engine
+from engine.Knowledge import KnowledgeTracker
+
+
+class RoundActions:
+    """A recorder keeping the actions of the current round."""
+
+    def __init__(self):
+        self.actions = []
+        self.rounds = 0
+
+    def record_action(self, *action) -> None:
+        self.actions.append(action)
+
+    def record_round(self, engine, first_seat, winners) -> None:
+        self.actions = []
+        self.rounds += 1
+
+
+def test_policy_knows_what_the_seat_saw():
+    bot = CFRBot(StrategyTable(Abstraction(CLASSIC_DECK), [], b""))
+    recorder = RoundActions()
+    checked = 0
+
+    def policy(engine: Engine, seat: int):
+        nonlocal checked
+        state = engine.state
+        knowledge = bot._knowledge(engine, seat)
+        expected = KnowledgeTracker(seat, 2, CLASSIC_DECK, state.burned[1:])
+        for action in recorder.actions:
+            expected.record_action(*action)
+        for tracker in (knowledge, expected):
+            tracker.sync_hand(state.hand(seat))
+        assert knowledge.hand_distribution(1 - seat) == expected.hand_distribution(1 - seat)
+        checked += 1
+        return bot.choose(state, seat, engine.composition, engine.rng, knowledge)
+
+    engine = Engine(2, [policy, policy], rng=random.Random(5))
+    engine.recorder = recorder
+    for _ in range(30):
+        engine.play_round()
+    # The bot's log passed every call on to the recorder it replaced
+    assert recorder.rounds == 30
+    assert checked > 30
@@ -0,0 +1,111 @@
+# test_endgame.py
+
+import itertools
+import random
+import pytest
+from card.CardTable import CARD_VALUES
+from engine.Actions import ActionIndex
+from engine.Endgame import EndgameSolver
+from engine.Engine import Engine
+from engine.Policy import random_policy
+
+
+def score(state):
+    active = [seat for seat in range(state.num_players) if state.is_active(seat)]
+    best = max(CARD_VALUES[state.hands[2 * seat]] for seat in active)
+    winners = [seat for seat in active if CARD_VALUES[state.hands[2 * seat]] == best]
+    return [1.0 / len(winners) if seat in winners else 0.0 for seat in range(state.num_players)]
+
+
+def minimax(engine, state, actions):
+    """
+    Every seat's chance of winning with best play, found by playing every legal move
+    through the engine, with every guess, and averaging over every order of the draw
+    pile for the draws that follow it.
+    """
+    seat = state.current
+    best = None
+    for _, card_index, target, guess in actions.keyed_moves(state, seat):
+        values = [0.0] * state.num_players
+        orders = list(itertools.permutations(state.deck))
+        for order in orders:
+            engine.state = after = state.clone()
+            after.deck[:] = bytes(order)
+            if engine.take_turn(card_index, target, guess):
+                outcome = minimax(engine, after, actions)
+            else:
+                outcome = score(after)
+            for other in range(state.num_players):
+                values[other] += outcome[other] / len(orders)
+        if best is None or values[seat] > best[seat]:
+            best = values
+    return best
+
+
+def late_positions(count, deck_size):
+    """Two-player positions from random play, with at most `deck_size` cards left to draw."""
+    positions = []
+    seed = 0
+    while len(positions) < count:
+        engine = Engine(2, [random_policy] * 2, rng=random.Random(seed))
+        engine.start_round()
+        seed += 1
+        while len(engine.state.deck) > deck_size and engine.step():
+            pass
+        if not engine.is_round_over():
+            positions.append(engine.state.clone())
+    return positions
+
+
+@pytest.mark.parametrize("deck_size", [1, 2, 3])
+def test_solver_matches_exhaustive_minimax(deck_size):
+    solver = EndgameSolver()
+    engine = Engine(2, [random_policy] * 2)
+    actions = ActionIndex(2)
+    for state in late_positions(15, deck_size):
+        values, _ = solver.solve(state)
+        expected = minimax(engine, state, actions)
+        assert list(values) == pytest.approx(expected)
+        # The move it picks is worth that value
+        card_index, target, guess = solver.best_move(state)
+        seat = state.current
+        total = 0.0
+        orders = list(itertools.permutations(state.deck))
+        for order in orders:
+            engine.state = after = state.clone()
+            after.deck[:] = bytes(order)
+            outcome = minimax(engine, after, actions) if engine.take_turn(card_index, target, guess) else score(after)
+            total += outcome[seat] / len(orders)
+        assert total == pytest.approx(values[seat])
+
+
+def test_transposed_multisets_hash_equally():
+    solver = EndgameSolver()
+    state = late_positions(1, 3)[0]
+    solver.solve(state)
+    solved = len(solver)
+    # The same cards in another order, in hand and in the draw pile
+    transposed = state.clone()
+    seat = 2 * transposed.current
+    transposed.hands[seat], transposed.hands[seat + 1] = transposed.hands[seat + 1], transposed.hands[seat]
+    transposed.deck.reverse()
+    hits = solver.hits
+    assert solver.solve(transposed)[0] == solver.solve(state)[0]
+    assert solver.hits == hits + 2
+    assert len(solver) == solved
+
+
+def test_table_evicts_least_recently_used_at_capacity():
+    positions = late_positions(5, 3)
+    reference = EndgameSolver()
+    solver = EndgameSolver(max_entries=8)
+    for state in positions:
+        # Evictions cost re-solving, never a different answer
+        assert solver.solve(state) == reference.solve(state)
+        assert len(solver) <= 8
+    assert len(solver) == 8
+    assert solver.misses > 8
+    # The last position solved is the most recently used entry
+    misses = solver.misses
+    solver.solve(positions[-1])
+    assert solver.misses == misses
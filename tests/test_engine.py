@@ -0,0 +1,57 @@
+# test_engine.py
+
+import random
+from card.CardTable import EXTENDED_DECK, GUARD
+from engine.Archive import ACTION, GUESS_VALUES, NO_VALUE, Archive, ArchiveWriter, RoundRecorder
+from engine.Engine import Engine
+from engine.Policy import random_policy
+
+
+def guessing_policy(engine: Engine, seat: int):
+    """Plays like random_policy, but always names a guess."""
+    card_index, target, _ = random_policy(engine, seat)
+    return card_index, target, 4
+
+
+def test_only_guard_actions_archive_a_guess():
+    engine = Engine(4, [guessing_policy] * 4, rng=random.Random(3))
+    engine.recorder = RoundRecorder()
+    for _ in range(20):
+        engine.play_round()
+    actions = [
+        ACTION.unpack_from(records, offset)
+        for *_, records in engine.recorder.take()
+        for offset in range(0, len(records), ACTION.size)
+    ]
+    assert any(card == GUARD and guess != NO_VALUE and GUESS_VALUES[guess] == 4 for _, card, _, _, _, guess, _, _ in actions)
+    for _, card, _, target, _, guess, _, _ in actions:
+        if card != GUARD or target == NO_VALUE:
+            assert guess == NO_VALUE
+
+
+def archbishop_guessing_policy(engine: Engine, seat: int):
+    """Plays like random_policy, but always guesses the Archbishop's 7.5."""
+    card_index, target, _ = random_policy(engine, seat)
+    return card_index, target, 7.5
+
+
+def test_archived_guesses_round_trip(tmp_path):
+    engine = Engine(4, [archbishop_guessing_policy] * 4, rng=random.Random(5), deck=EXTENDED_DECK)
+    engine.recorder = RoundRecorder()
+    for _ in range(20):
+        engine.play_round()
+    writer = ArchiveWriter(str(tmp_path))
+    for round_record in engine.recorder.take():
+        writer.append_round("room", [f"p{seat}" for seat in range(4)], round_record)
+    writer.close()
+
+    archive = Archive(str(tmp_path))
+    actions = [archive.action(index) for index in range(archive.action_count)]
+    guessed = [index for index, action in enumerate(actions) if action["guess"] == 7.5]
+    assert guessed
+    assert all(actions[index]["card"] == GUARD for index in guessed)
+    assert archive.match_actions(guess=7.5) == guessed
+    assert archive.match_actions(card=GUARD, guess=[7.5, NO_VALUE]) == [
+        index for index, action in enumerate(actions) if action["card"] == GUARD
+    ]
+    archive.close()
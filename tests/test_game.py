@@ -0,0 +1,75 @@
+# test_game.py
+
+import asyncio
+import random
+from card.CardFactory import card_for_code
+from card.CardTable import HANDMAID
+from game.Game import Game
+from player.Player import Player
+from fakes import StubUser
+
+
+def assert_hands(game: Game) -> None:
+    """Every active player holds one card, except the one in turn, who drew a second."""
+    in_turn = game.player_in_turn()
+    for player in game.players:
+        if player.is_active:
+            assert len(player.hand) == (2 if player is in_turn else 1), [len(p.hand) for p in game.players]
+
+
+def test_rounds_deal_one_card_per_player():
+    async def play():
+        users = [StubUser(str(seat)) for seat in range(4)]
+        game = Game([Player(user) for user in users], rng=random.Random(7))
+        await game.initialize()
+        assert_hands(game)
+        rounds = 1
+        while game.round < 3:
+            player = game.player_in_turn()
+            move = game.legal_actions(player)[0]
+            card_index = move.pop("card_index")
+            await game.handle_player_action(player.user.user_id, card_index, move)
+            assert_hands(game)
+            if game.round > rounds:
+                # The winner of the last round opens the next one
+                rounds = game.round
+                winner_ids = [m for m in users[0].messages if m["type"] == "round_end"][-1]["winner_ids"]
+                assert game.player_in_turn().user.user_id == winner_ids[0]
+        errors = [m for user in users for m in user.messages if m["type"] == "error"]
+        assert errors == []
+
+    asyncio.run(play())
+
+
+def test_either_copy_of_a_doubled_card_can_be_played():
+    async def play():
+        users = [StubUser(str(seat)) for seat in range(2)]
+        game = Game([Player(user) for user in users], rng=random.Random(0))
+        await game.initialize()
+        player = game.player_in_turn()
+        player.hand = [card_for_code(HANDMAID), card_for_code(HANDMAID)]
+        await game.handle_player_action(player.user.user_id, 1, {})
+        assert [m for m in player.user.messages if m["type"] == "error"] == []
+        assert game.player_in_turn() is not player
+
+    asyncio.run(play())
+
+
+def test_state_sync_clients_get_their_legal_moves():
+    async def play():
+        users = [StubUser(str(seat)) for seat in range(3)]
+        for user in users:
+            user.state_sync = True
+        game = Game([Player(user) for user in users], rng=random.Random(2))
+        await game.initialize()
+        for _ in range(4):
+            player = game.player_in_turn()
+            views = [m for m in player.user.messages if m["type"] in ("state_delta", "state_snapshot")]
+            assert views[-1]["set"]["legal_actions"] == game.legal_actions(player)
+            move = game.legal_actions(player)[0]
+            card_index = move.pop("card_index")
+            await game.handle_player_action(player.user.user_id, card_index, move)
+            # Out of turn, the moves are cleared
+            assert player.user.messages[-1]["set"]["legal_actions"] == []
+
+    asyncio.run(play())
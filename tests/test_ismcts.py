@@ -0,0 +1,114 @@
+# test_ismcts.py
+
+import random
+import time
+from collections import Counter
+import pytest
+from card.CardTable import CLASSIC_DECK, COUNTESS, GUARD, KING, NO_CARD, PRINCE
+from engine import ISMCTS
+from engine.Actions import action_index
+from engine.Engine import Engine
+from engine.ISMCTS import ISMCTSBot
+from engine.Knowledge import KnowledgeTracker
+from engine.Policy import random_policy
+
+
+def checked(bot):
+    """Wraps a bot so that every move it returns is checked against the rules."""
+
+    def policy(engine, seat):
+        move = bot(engine, seat)
+        assert action_index(engine.num_players).is_legal(engine.state, seat, *move), move
+        return move
+
+    return policy
+
+
+@pytest.mark.parametrize("num_players", [2, 3, 4])
+def test_moves_are_legal(num_players):
+    engine = Engine(num_players, [checked(ISMCTSBot(iterations=40))] * num_players, rng=random.Random(num_players))
+    for _ in range(5):
+        engine.play_round()
+
+
+@pytest.mark.parametrize("forced", [KING, PRINCE])
+@pytest.mark.parametrize("countess_index", [0, 1])
+def test_countess_is_played_with_a_king_or_prince(forced, countess_index):
+    engine = Engine(3, [random_policy] * 3, rng=random.Random(0))
+    engine.start_round()
+    state = engine.state
+    seat = state.current
+    state.hands[2 * seat + countess_index] = COUNTESS
+    state.hands[2 * seat + 1 - countess_index] = forced
+    card_index, _, _ = ISMCTSBot(iterations=40).choose(state, seat, rng=random.Random(1))
+    assert card_index == countess_index
+    assert action_index(3).is_legal(state, seat, card_index)
+
+
+def test_iteration_budget(monkeypatch):
+    deals = []
+    determinize = ISMCTS.determinize
+
+    def counting(*args):
+        deals.append(1)
+        return determinize(*args)
+
+    monkeypatch.setattr(ISMCTS, "determinize", counting)
+    engine = Engine(4, [random_policy] * 4, rng=random.Random(2))
+    engine.start_round()
+    state = engine.state
+    state.hands[2 * state.current : 2 * state.current + 2] = bytes((GUARD, GUARD))
+    ISMCTSBot(iterations=37).choose(state, state.current, rng=random.Random(3))
+    assert len(deals) == 37
+
+
+def test_time_budget():
+    engine = Engine(4, [random_policy] * 4, rng=random.Random(2))
+    engine.start_round()
+    state = engine.state
+    state.hands[2 * state.current : 2 * state.current + 2] = bytes((GUARD, GUARD))
+    started = time.perf_counter()
+    ISMCTSBot(iterations=10**9, time_budget=0.05).choose(state, state.current, rng=random.Random(3))
+    assert time.perf_counter() - started < 0.5
+
+
+def hidden_cards(world, seat):
+    cards = [world.hands[2 * other] for other in range(world.num_players) if other != seat and world.is_active(other)]
+    return [*cards, *world.deck, *world.burned[:1]]
+
+
+@pytest.mark.parametrize("use_knowledge", [False, True])
+def test_determinizations_never_deal_visible_cards(monkeypatch, use_knowledge):
+    determinize = ISMCTS.determinize
+    checks = []
+
+    def checking(state, seat, composition, rng, knowledge=None):
+        world = determinize(state, seat, composition, rng, knowledge)
+        # What the seat sees is left as it is
+        assert world.hand(seat) == state.hand(seat)
+        assert world.discard_pile == state.discard_pile
+        assert world.burned[1:] == state.burned[1:]
+        visible = Counter([*state.hand(seat), *state.discard_pile, *state.burned[1:]])
+        dealt = Counter(hidden_cards(world, seat))
+        assert NO_CARD not in dealt
+        assert dealt + visible <= Counter(composition)
+        checks.append(1)
+        return world
+
+    monkeypatch.setattr(ISMCTS, "determinize", checking)
+    bot = ISMCTSBot(iterations=20)
+    for seed, num_players in enumerate((2, 3, 4)):
+        engine = Engine(num_players, [random_policy] * num_players, rng=random.Random(seed))
+        engine.start_round()
+        tracker = KnowledgeTracker(0, num_players, CLASSIC_DECK, engine.state.burned[1:])
+        engine.recorder = tracker
+        ongoing = True
+        while ongoing:
+            state = engine.state
+            if state.current == 0:
+                knowledge = tracker if use_knowledge else None
+                move = bot.choose(state.clone(), 0, CLASSIC_DECK, random.Random(seed), knowledge)
+            else:
+                move = random_policy(engine, state.current)
+            ongoing = engine.take_turn(*move)
+    assert checks
@@ -0,0 +1,138 @@
+# test_knowledge.py
+
+import itertools
+import random
+from collections import Counter
+import pytest
+from card.CardTable import (
+    BARON,
+    CARD_VALUES,
+    CLASSIC_DECK,
+    COUNTESS,
+    DISCARDED,
+    GUARD,
+    HANDMAID,
+    KING,
+    LOOKED,
+    NO_CARD,
+    PRIEST,
+    PRINCE,
+    SWAPPED,
+)
+from engine.Engine import Engine
+from engine.Knowledge import KnowledgeTracker
+from engine.Policy import random_policy
+
+
+def enumerate_opponent(composition, face_up, hand, excluded_values):
+    """
+    Deals every ordering of the deck as the face-down burned card, the face-up
+    cards, the observer's card, the opponent's card and the draw pile, and returns
+    the opponent's card distribution over the deals that match what the observer knows.
+    """
+    counts = Counter()
+    for deal in itertools.permutations(composition):
+        observer, opponent = deal[1 + len(face_up)], deal[2 + len(face_up)]
+        if deal[1 : 1 + len(face_up)] == tuple(face_up) and observer == hand:
+            if CARD_VALUES[opponent] not in excluded_values:
+                counts[opponent] += 1
+    total = sum(counts.values())
+    return {code: count / total for code, count in counts.items()}
+
+
+def enumerated_guard_chance(distribution):
+    by_value = Counter()
+    for code, probability in distribution.items():
+        if code != GUARD:
+            by_value[CARD_VALUES[code]] += probability
+    return max(by_value.values(), default=0.0)
+
+
+def enumerated_baron_odds(distribution, card):
+    mine = CARD_VALUES[card]
+    win = sum(p for code, p in distribution.items() if CARD_VALUES[code] < mine)
+    tie = sum(p for code, p in distribution.items() if CARD_VALUES[code] == mine)
+    lose = sum(p for code, p in distribution.items() if CARD_VALUES[code] > mine)
+    return win, tie, lose
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_two_player_queries_match_enumeration(seed):
+    rng = random.Random(seed)
+    composition = bytes(rng.sample(CLASSIC_DECK, 7))
+    deal = bytearray(composition)
+    rng.shuffle(deal)
+    # Half the cases burn three cards face-up, as a two-player round does
+    face_up = bytes(deal[1:4]) if seed % 2 else b""
+    hand = deal[1 + len(face_up)]
+    opponent = deal[2 + len(face_up)]
+    tracker = KnowledgeTracker(0, 2, composition, face_up)
+    tracker.sync_hand((hand,))
+    excluded = set()
+    if seed % 3:
+        # What a wrong Guard guess or a lost Baron duel would rule out
+        values = {CARD_VALUES[code] for code in composition} - {CARD_VALUES[opponent]}
+        excluded = set(rng.sample(sorted(values), min(2, len(values))))
+        mask = sum(1 << code for code in set(composition) if CARD_VALUES[code] in excluded)
+        tracker.rule_out(1, mask)
+
+    expected = enumerate_opponent(composition, face_up, hand, excluded)
+    distribution = tracker.hand_distribution(1)
+    assert distribution.keys() == expected.keys()
+    for code, probability in expected.items():
+        assert distribution[code] == pytest.approx(probability)
+    assert tracker.best_guard_guess(1)[1] == pytest.approx(enumerated_guard_chance(expected))
+    for card in set(composition):
+        assert tracker.baron_odds(1, card) == pytest.approx(enumerated_baron_odds(expected, card))
+
+
+def test_face_up_burn_of_a_two_player_round():
+    engine = Engine(2, [random_policy] * 2, rng=random.Random(1))
+    engine.start_round()
+    state = engine.state
+    face_up = bytes(state.burned[1:])
+    tracker = KnowledgeTracker(0, 2, CLASSIC_DECK, face_up)
+    tracker.sync_hand((state.hands[0],))
+    # The face-down card, the opponent's card and the draw pile stay hidden
+    assert tracker.unseen_total == len(CLASSIC_DECK) - 3 - 1
+    remaining = Counter(CLASSIC_DECK) - Counter(face_up) - Counter((state.hands[0],))
+    distribution = tracker.hand_distribution(1)
+    assert state.hands[2] in distribution
+    assert distribution == pytest.approx({code: count / tracker.unseen_total for code, count in remaining.items()})
+
+
+def test_priest_peek_then_prince_redraw():
+    tracker = KnowledgeTracker(0, 4, CLASSIC_DECK)
+    tracker.sync_hand((PRIEST, GUARD))
+    tracker.observe_action(0, PRIEST, GUARD, 2, BARON, -1, LOOKED)
+    assert tracker.hand_distribution(2) == {BARON: 1.0}
+    # One Baron of the two is accounted for
+    assert tracker.hand_distribution(1)[BARON] == pytest.approx(1 / tracker.unseen_total)
+    assert tracker.best_guard_guess(2) == (CARD_VALUES[BARON], 1.0)
+    assert tracker.baron_odds(2, GUARD) == (0.0, 0.0, 1.0)
+
+    # The Prince discards the known Baron; the redrawn card is unknown
+    unseen = list(tracker.unseen)
+    tracker.observe_action(3, PRINCE, HANDMAID, 2, BARON, -1, DISCARDED)
+    assert tracker.unseen[BARON] == unseen[BARON]
+    assert tracker.unseen[PRINCE] == unseen[PRINCE] - 1
+    distribution = tracker.hand_distribution(2)
+    assert distribution[BARON] == pytest.approx(tracker.unseen[BARON] / tracker.unseen_total)
+    assert sum(distribution.values()) == pytest.approx(1.0)
+
+
+def test_king_swaps():
+    tracker = KnowledgeTracker(0, 4, CLASSIC_DECK)
+    tracker.sync_hand((KING, HANDMAID))
+    tracker.observe_action(0, KING, HANDMAID, 1, COUNTESS, -1, SWAPPED)
+    # The observer gave its Handmaid away and got the Countess
+    assert tracker.hand == [COUNTESS]
+    assert tracker.hand_distribution(0) == {COUNTESS: 1.0}
+    assert tracker.hand_distribution(1) == {HANDMAID: 1.0}
+    assert tracker.unseen[COUNTESS] == 0
+
+    # A swap between two other seats moves what the observer knows with the cards
+    tracker.observe_action(2, KING, PRIEST, 1, NO_CARD, -1, SWAPPED)
+    assert tracker.hand_distribution(2) == {HANDMAID: 1.0}
+    assert tracker.known[1] == NO_CARD
+    assert sum(tracker.hand_distribution(1).values()) == pytest.approx(1.0)
@@ -0,0 +1,63 @@
+# test_metrics.py
+
+from fastapi.testclient import TestClient
+import server
+from monitoring.Metrics import ERRORS, Registry
+
+
+def test_labelled_histogram_exposition():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("card", "note"), buckets=(1, 0.1, 5))
+    child = histogram.labels("Guard", 'say "hi"\\\n')
+    for value in (0.05, 0.1, 0.5, 2, 10):
+        child.observe(value)
+    histogram.labels("Baron", "").observe(0.25)
+
+    labels = 'card="Guard",note="say \\"hi\\"\\\\\\n"'
+    assert registry.render().splitlines() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        # Buckets are cumulative, and an observation on a bound falls in its bucket
+        f'latency_seconds_bucket{{{labels},le="0.1"}} 2',
+        f'latency_seconds_bucket{{{labels},le="1"}} 3',
+        f'latency_seconds_bucket{{{labels},le="5"}} 4',
+        f'latency_seconds_bucket{{{labels},le="+Inf"}} 5',
+        f"latency_seconds_sum{{{labels}}} 12.65",
+        f"latency_seconds_count{{{labels}}} 5",
+        'latency_seconds_bucket{card="Baron",note="",le="0.1"} 0',
+        'latency_seconds_bucket{card="Baron",note="",le="1"} 1',
+        'latency_seconds_bucket{card="Baron",note="",le="5"} 1',
+        'latency_seconds_bucket{card="Baron",note="",le="+Inf"} 1',
+        'latency_seconds_sum{card="Baron",note=""} 0.25',
+        'latency_seconds_count{card="Baron",note=""} 1',
+    ]
+    assert child.count == 5
+    assert histogram.labels("Guard", 'say "hi"\\\n') is child
+
+
+def test_counter_and_gauge_exposition():
+    registry = Registry()
+    registry.counter("plays_total", "Plays.").inc(3)
+    registry.gauge("rooms", "Rooms.", function=lambda: 7)
+    assert registry.render() == (
+        "# HELP plays_total Plays.\n"
+        "# TYPE plays_total counter\n"
+        "plays_total 3\n"
+        "# HELP rooms Rooms.\n"
+        "# TYPE rooms gauge\n"
+        "rooms 7\n"
+    )
+
+
+def test_metrics_endpoint(monkeypatch):
+    monkeypatch.setattr(server, "game_rooms", {"a": None, "b": None})
+    ERRORS.labels("test_metrics", "ValueError").inc()
+
+    response = TestClient(server.app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert "# TYPE love_letter_action_seconds histogram" in lines
+    assert "love_letter_rooms 2" in lines
+    assert "love_letter_active_users 0" in lines
+    assert 'love_letter_errors_total{source="test_metrics",type="ValueError"} 1' in lines
@@ -0,0 +1,75 @@
+# test_recovery.py
+
+import asyncio
+import server
+from game.EventLog import EventLogStore
+from game.GameRoom import GameRoom
+from game.TimerWheel import TimerWheel
+from user.ConnectionManager import ConnectionManager
+from user.User import User
+from fakes import FakeWebSocket
+
+
+async def settle() -> None:
+    """Lets the room actors and writer tasks handle what was queued."""
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+async def play_first_move(room: GameRoom, user: User) -> None:
+    game = room.game_instance
+    move = game.legal_actions(game.get_player(user.user_id))[0]
+    await room.handle_command(user, {"type": "play_card", **move})
+
+
+def test_recovered_seats_can_be_claimed_and_played(tmp_path, monkeypatch):
+    async def crashed_process():
+        # A game that is a few moves in when the process dies, log unclosed
+        store = EventLogStore(str(tmp_path))
+        room = GameRoom("room1", store, timer_wheel=TimerWheel(), turn_timeout=0)
+        users = [User(None, FakeWebSocket(), name) for name in ("ann", "bob", "cy")]
+        for user in users:
+            await room.add_user(user)
+        await room.start_game()
+        for _ in range(3):
+            game = room.game_instance
+            await play_first_move(room, game.player_in_turn().user)
+        await store.flush()
+        game = room.game_instance
+        in_turn = game.player_in_turn().user.user_id
+        hands = {player.user.user_id: [card.name for card in player.hand] for player in game.players}
+        return {user.user_id: user.session_token for user in users}, in_turn, hands
+
+    async def restarted_process(tokens, in_turn, hands):
+        monkeypatch.setattr(server, "event_store", EventLogStore(str(tmp_path)))
+        monkeypatch.setattr(server, "manager", ConnectionManager())
+        monkeypatch.setattr(server, "game_rooms", {})
+        await server.start_event_log()
+        room = server.game_rooms["room1"]
+        game = room.game_instance
+        assert {player.user.user_id: [card.name for card in player.hand] for player in game.players} == hands
+
+        user = await server.manager.connect(FakeWebSocket())
+        user = await server.manager.resume(user, tokens[in_turn], 0)
+        await settle()
+        assert user.user_id == in_turn
+        assert room.users[in_turn] is user
+        assert game.get_player(in_turn).user is user
+        assert user.current_room is room
+        assert any('"state_snapshot"' in text for text in user.websocket.sent)
+
+        # The claimed seat plays on through the server
+        turn = game.turn
+        move = game.legal_actions(game.get_player(in_turn))[0]
+        await server.handle_client_message(user, {"type": "play_card", **move})
+        await settle()
+        assert game.turn == turn + 1
+
+        # A token that never held a seat is refused
+        stranger = await server.manager.connect(FakeWebSocket())
+        assert await server.manager.resume(stranger, "unknown", 0) is stranger
+        room.close()
+        await server.event_store.close()
+
+    state = asyncio.run(crashed_process())
+    asyncio.run(restarted_process(*state))
@@ -0,0 +1,66 @@
+# test_resume.py
+
+import asyncio
+import json
+import server
+from fastapi import WebSocketDisconnect
+from user.ConnectionManager import ConnectionManager
+from user.OutboundQueue import OutboundQueue
+from user.User import User
+from fakes import FakeWebSocket
+
+
+class StalledWebSocket(FakeWebSocket):
+    """A connection whose writes never complete."""
+
+    async def send_text(self, text: str) -> None:
+        await asyncio.Event().wait()
+
+
+class ScriptedWebSocket(FakeWebSocket):
+    """A connection the client sends the given messages on, then closes."""
+
+    def __init__(self, messages):
+        super().__init__()
+        self.messages = list(messages)
+
+    async def receive_json(self) -> dict:
+        # Waiting on the client lets the writer task send what was queued
+        for _ in range(5):
+            await asyncio.sleep(0)
+        if not self.messages:
+            raise WebSocketDisconnect()
+        return self.messages.pop(0)
+
+
+def test_dropped_messages_are_not_replayed():
+    async def run():
+        user = User(None, StalledWebSocket())
+        user.outbound = OutboundQueue(user._write_frame, max_size=4, on_drop=user.replay.forget)
+        for number in range(10):
+            await user.send_message({"type": "chat", "number": number})
+        await asyncio.sleep(0)
+        outbound = user.outbound
+        assert outbound.dropped > 0
+        assert user.replay.sent == 10 - outbound.dropped
+        # Only the messages still queued are missing on the client
+        received = user.replay.sent - len(outbound._queue)
+        queued = [frame for frame, _ in outbound._queue]
+        assert user.replay.since(received) == queued
+        await outbound.close()
+
+    asyncio.run(run())
+
+
+def test_malformed_resume_count_is_an_error(monkeypatch):
+    async def run():
+        monkeypatch.setattr(server, "manager", ConnectionManager())
+        websocket = ScriptedWebSocket([
+            {"type": "resume", "token": "t", "received": "many"},
+            {"type": "resume", "token": "t", "received": -1},
+        ])
+        await server.websocket_endpoint(websocket)
+        errors = [json.loads(text) for text in websocket.sent if '"error"' in text]
+        assert [error["message"] for error in errors] == ["Invalid received count."] * 2
+
+    asyncio.run(run())
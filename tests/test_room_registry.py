@@ -0,0 +1,90 @@
+# test_room_registry.py
+
+import asyncio
+import os
+import subprocess
+import sys
+import server
+from game.RoomRegistry import InProcessRoomRegistry, SqliteRoomRegistry, create_registry, shard_for_room
+from user.User import User
+from fakes import FakeWebSocket, StubUser
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def test_shards_are_stable_across_processes():
+    # Pinned: every worker, on every box, must agree on who owns a room
+    assert [shard_for_room(room_id, 4) for room_id in ("room1", "abc123", "lobby")] == [2, 0, 3]
+    assert [shard_for_room(room_id, 7) for room_id in ("room1", "abc123", "lobby")] == [4, 1, 1]
+    script = "from game.RoomRegistry import shard_for_room; print([shard_for_room(str(i), 5) for i in range(50)])"
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=SRC,
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in ("1", "2", "3")
+    }
+    assert outputs == {str([shard_for_room(str(i), 5) for i in range(50)]) + "\n"}
+
+
+def test_sqlite_registrations_are_shared(tmp_path):
+    path = str(tmp_path / "rooms.db")
+    first = create_registry(f"sqlite:{path}")
+    second = SqliteRoomRegistry(path)
+    assert first.shared and second.shared
+    first.register("room1", 1)
+    first.register("room2", 0)
+    assert second.lookup("room1") == 1
+    assert sorted(second.rooms()) == ["room1", "room2"]
+    assert second.rooms(0) == ["room2"]
+    second.register("room1", 2)
+    second.unregister("room2")
+    assert first.lookup("room1") == 2
+    assert first.lookup("room2") is None
+    first.close()
+    second.close()
+
+
+def test_join_room_redirects_to_the_owning_shard(monkeypatch):
+    async def run():
+        monkeypatch.setattr(server, "SHARD", 0)
+        monkeypatch.setattr(server, "SHARD_COUNT", 4)
+        monkeypatch.setattr(server, "SHARD_URLS", ["ws://a", "ws://b", "ws://c", "ws://d"])
+        monkeypatch.setattr(server, "registry", InProcessRoomRegistry())
+        monkeypatch.setattr(server, "game_rooms", {})
+        user = StubUser("u")
+        user.current_room = None
+
+        # "room1" belongs to shard 2
+        await server.handle_client_message(user, {"type": "join_room", "room_id": "room1"})
+        assert user.messages[-1] == {"type": "redirect", "room_id": "room1", "shard": 2, "url": "ws://c"}
+
+        # A shared registry knows the room does not exist anywhere
+        shared = SqliteRoomRegistry(":memory:")
+        monkeypatch.setattr(server, "registry", shared)
+        await server.handle_client_message(user, {"type": "join_room", "room_id": "room1"})
+        assert user.messages[-1] == {"type": "error", "message": "Room not found."}
+        shared.register("room1", 2)
+        await server.handle_client_message(user, {"type": "join_room", "room_id": "room1"})
+        assert user.messages[-1]["type"] == "redirect"
+
+        # A room of this shard is joined here
+        host, guest = User(None, FakeWebSocket()), User(None, FakeWebSocket())
+        await server.handle_client_message(host, {"type": "create_room"})
+        (room_id,) = server.game_rooms
+        assert shard_for_room(room_id, 4) == 0
+        assert shared.lookup(room_id) == 0
+        await server.handle_client_message(guest, {"type": "join_room", "room_id": room_id})
+        room = server.game_rooms[room_id]
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert guest.current_room is room
+        assert list(room.users) == [host.user_id, guest.user_id]
+        room.close()
+        shared.close()
+
+    asyncio.run(run())
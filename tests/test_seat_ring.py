@@ -0,0 +1,64 @@
+# test_seat_ring.py
+
+import asyncio
+import random
+from game.Game import Game
+from game.SeatRing import SeatRing
+from player.Player import Player
+from fakes import StubUser
+
+
+def linear_next(active, seat):
+    """The next active seat as the old find_next_player scanned for it, or -1."""
+    size = len(active)
+    index = seat
+    for _ in range(size):
+        index = (index + 1) % size
+        if active[index]:
+            return index
+    return -1
+
+
+def test_next_matches_a_linear_scan():
+    rng = random.Random(5)
+    for size in range(2, 9):
+        for _ in range(20):
+            ring = SeatRing(size)
+            active = [True] * size
+            order = list(range(size))
+            rng.shuffle(order)
+            for seat in order:
+                assert ring.remove(seat)
+                assert not ring.remove(seat)
+                active[seat] = False
+                assert len(ring) == sum(active)
+                assert list(ring) == [s for s in range(size) if active[s]]
+                for other in range(size):
+                    assert ring.next(other) == linear_next(active, other)
+            ring.reset()
+            assert list(ring) == list(range(size))
+            assert [ring.next(seat) for seat in range(size)] == [(seat + 1) % size for seat in range(size)]
+
+
+def test_game_indexes():
+    async def play():
+        users = [StubUser(str(seat)) for seat in range(5)]
+        game = Game([Player(user) for user in users], rng=random.Random(1))
+        await game.initialize()
+        assert game.get_player("3") is game.players[3]
+        assert game.get_player_id_by_name("User 2") == "2"
+        assert game.get_player("unknown") is None
+        assert game.get_player_id_by_name("nobody") is None
+
+        for seat in (3, 0, 4):
+            game.eliminate(game.players[seat])
+            active = [player.is_active for player in game.players]
+            for player in game.players:
+                following = game.find_next_player(player)
+                assert game.players.index(following) == linear_next(active, game.players.index(player))
+
+        await game.initialize()
+        assert list(game.ring) == list(range(5))
+        assert all(player.is_active for player in game.players)
+
+    asyncio.run(play())
@@ -0,0 +1,26 @@
+# test_server.py
+
+import asyncio
+import server
+from user.User import User
+from fakes import FakeWebSocket
+
+
+def test_commands_right_after_join_reach_the_room(monkeypatch):
+    async def run():
+        monkeypatch.setattr(server, "game_rooms", {})
+        host, guest = User(None, FakeWebSocket()), User(None, FakeWebSocket())
+        await server.handle_client_message(host, {"type": "create_room"})
+        (room_id,) = server.game_rooms
+        # No wait for room_joined: the start must still follow the join
+        await server.handle_client_message(guest, {"type": "join_room", "room_id": room_id})
+        await server.handle_client_message(guest, {"type": "start_game"})
+        room = server.game_rooms[room_id]
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert list(room.users) == [host.user_id, guest.user_id]
+        assert room.game_instance is not None
+        assert set(room.game_instance.seats) == {host.user_id, guest.user_id}
+        room.close()
+
+    asyncio.run(run())
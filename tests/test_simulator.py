@@ -0,0 +1,14 @@
+# test_simulator.py
+
+from engine.Simulator import simulate
+
+
+def test_results_do_not_depend_on_the_worker_count():
+    kwargs = dict(games=400, num_players=3, policies=["random", "endgame", "random"], seed=11, chunk_size=50)
+    serial = simulate(workers=1, **kwargs)
+    parallel = simulate(workers=4, **kwargs)
+    assert serial.games == parallel.games == 400
+    assert serial.to_dict() == parallel.to_dict()
+    assert serial.round_lengths == parallel.round_lengths
+    # Another seed plays other games
+    assert simulate(workers=1, **{**kwargs, "seed": 12}).to_dict() != serial.to_dict()
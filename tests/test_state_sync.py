@@ -0,0 +1,120 @@
+# test_state_sync.py
+
+import asyncio
+import copy
+import json
+import random
+from game.Game import Game
+from game.StateSync import MAX_PENDING_VERSIONS, StateSync, diff_views, player_view
+from player.Player import Player
+from user.User import User
+from fakes import FakeWebSocket, StubUser
+
+
+def test_diff_views_sets_changes_and_appends_growth():
+    base = {"hand": ["Guard"], "discard_pile": ["Priest"], "deck_count": 9, "active": [True, True]}
+    view = {"hand": ["Baron"], "discard_pile": ["Priest", "Guard"], "deck_count": 8, "active": [True, True]}
+    assert diff_views(base, view) == {
+        "set": {"hand": ["Baron"], "deck_count": 8},
+        "append": {"discard_pile": ["Guard"]},
+    }
+    # A list that shrank or started empty is sent whole
+    assert diff_views({"discard_pile": ["Guard"]}, {"discard_pile": []}) == {"set": {"discard_pile": []}}
+    assert diff_views({"discard_pile": []}, {"discard_pile": ["Guard"]}) == {"set": {"discard_pile": ["Guard"]}}
+    assert diff_views(view, dict(view)) == {}
+
+
+def test_deltas_are_against_the_last_acknowledged_version():
+    sync = StateSync()
+    assert sync.update({"deck_count": 9})["base"] == 0
+    assert sync.update({"deck_count": 9}) is None
+    sync.update({"deck_count": 8})
+    sync.acknowledge(2)
+    delta = sync.update({"deck_count": 7})
+    assert (delta["base"], delta["version"], delta["set"]) == (2, 3, {"deck_count": 7})
+
+    # Stale and unknown versions are ignored
+    sync.acknowledge(1)
+    sync.acknowledge(99)
+    assert sync.acked_version == 2
+    sync.acknowledge(3)
+    sync.acknowledge(2)
+    assert sync.acked_version == 3
+    assert sync.update({"deck_count": 6})["base"] == 3
+
+
+def test_lagging_client_gets_a_snapshot():
+    sync = StateSync()
+    for count in range(MAX_PENDING_VERSIONS):
+        assert sync.update({"deck_count": count})["type"] == "state_delta"
+    message = sync.update({"deck_count": -1})
+    assert message == {"type": "state_snapshot", "version": MAX_PENDING_VERSIONS + 1, "state": {"deck_count": -1}}
+    assert sync.acked_version == MAX_PENDING_VERSIONS + 1
+    # Later deltas build on the snapshot
+    delta = sync.update({"deck_count": -2})
+    assert delta["base"] == MAX_PENDING_VERSIONS + 1
+
+
+class SyncClient:
+    """Rebuilds a player's view from the state messages it was sent, acking some of them."""
+
+    def __init__(self, game: Game, user: StubUser, rng: random.Random):
+        self.game = game
+        self.user = user
+        self.rng = rng
+        self.versions = {0: {}}
+        self.latest = 0
+        self.read = 0
+
+    def receive(self) -> None:
+        messages = self.user.messages
+        for message in messages[self.read :]:
+            if message["type"] == "state_snapshot":
+                view = message["state"]
+            elif message["type"] == "state_delta":
+                view = copy.deepcopy(self.versions[message["base"]])
+                view.update(message.get("set", {}))
+                for key, tail in message.get("append", {}).items():
+                    view[key] = view[key] + tail
+            else:
+                continue
+            self.latest = message["version"]
+            self.versions[self.latest] = view
+            # Half the acks are lost on the way
+            if self.rng.random() < 0.5:
+                self.game.syncs[self.user.user_id].acknowledge(self.latest)
+        self.read = len(messages)
+
+
+def test_clients_rebuild_their_views_with_acks_dropped():
+    async def play():
+        rng = random.Random(4)
+        users = [StubUser(str(seat)) for seat in range(3)]
+        for user in users:
+            user.state_sync = True
+        game = Game([Player(user) for user in users], rng=random.Random(4))
+        clients = [SyncClient(game, user, rng) for user in users]
+        await game.initialize()
+        while game.round < 3:
+            for client, player in zip(clients, game.players):
+                client.receive()
+                assert client.versions[client.latest] == player_view(game, player)
+            player = game.player_in_turn()
+            move = rng.choice(game.legal_actions(player))
+            card_index = move.pop("card_index")
+            await game.handle_player_action(player.user.user_id, card_index, move)
+
+    asyncio.run(play())
+
+
+def test_state_sync_users_skip_the_events_their_views_carry():
+    async def run():
+        user = User(None, FakeWebSocket())
+        user.state_sync = True
+        for message_type in ("deal_card", "draw_card", "next_turn", "play_card", "state_delta"):
+            await user.send_message({"type": message_type})
+        await asyncio.sleep(0)
+        assert [json.loads(text)["type"] for text in user.websocket.sent] == ["play_card", "state_delta"]
+        await user.disconnect()
+
+    asyncio.run(run())
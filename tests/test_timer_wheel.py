@@ -0,0 +1,49 @@
+# test_timer_wheel.py
+
+import random
+from game.TimerWheel import SLOTS, TimerWheel
+
+
+def test_timers_fire_on_their_tick_across_cascades():
+    rng = random.Random(7)
+    wheel = TimerWheel(tick=1.0)
+    fired = {}
+    expected = {}
+    timers = {}
+
+    def fire(key):
+        assert key not in fired
+        fired[key] = wheel.ticks
+
+    def schedule(key):
+        # Deadlines on every level, some landing exactly on slot boundaries
+        delay = rng.choice((
+            rng.randrange(1, SLOTS),
+            rng.randrange(SLOTS, SLOTS**2),
+            rng.randrange(SLOTS**2, SLOTS**3),
+            rng.choice((SLOTS, SLOTS**2, SLOTS**3)) - wheel.ticks % SLOTS,
+        ))
+        timers[key] = wheel.schedule(delay, fire, key)
+        expected[key] = wheel.ticks + delay
+
+    def cancel(key):
+        timer = timers[key]
+        if key in fired:
+            assert not timer.pending
+            assert not timer.cancel()
+        elif key in expected:
+            assert timer.cancel()
+            assert not timer.cancel()
+            del expected[key]
+
+    for key in range(2000):
+        schedule(key)
+    # Timers scheduled while the wheel is part way through its slots
+    for key in range(2000, 4000):
+        wheel.advance(rng.randrange(1, 300))
+        schedule(key)
+        cancel(rng.randrange(key + 1))
+    wheel.advance(max(expected.values()) - wheel.ticks)
+
+    assert fired == expected
+    assert len(wheel) == 0
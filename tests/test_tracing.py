@@ -0,0 +1,45 @@
+# test_tracing.py
+
+import asyncio
+from monitoring.Tracing import Tracer, span, traced
+from user.User import User
+from fakes import FakeWebSocket
+
+
+@traced("Room.work")
+async def work(user: User) -> None:
+    with span("Room.send"):
+        await user.send_message({"type": "next_turn", "player_id": user.user_id})
+
+
+def test_socket_writes_are_part_of_the_trace():
+    async def run():
+        tracer = Tracer()
+        user = User(None, FakeWebSocket())
+        with tracer.trace("handle_client_message", force=True):
+            await work(user)
+        # The write is still queued: the trace waits for it
+        assert not tracer.finished
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert user.websocket.sent
+        (trace,) = tracer.finished
+        names = [name for name, _, _, _ in trace.spans]
+        assert sorted(names) == sorted(
+            ["Room.send", "User.send_frame", "Room.work", "handle_client_message", "User.write_frame"]
+        )
+        await user.disconnect()
+
+    asyncio.run(run())
+
+
+def test_dropped_messages_release_their_trace():
+    async def run():
+        tracer = Tracer()
+        user = User(None, FakeWebSocket())
+        with tracer.trace("handle_client_message", force=True):
+            await user.send_message({"type": "next_turn"})
+        await user.outbound.close()
+        assert len(tracer.finished) == 1
+
+    asyncio.run(run())